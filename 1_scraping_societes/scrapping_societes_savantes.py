@@ -1,42 +1,63 @@
+import asyncio
 import json
+import os
+import re
+import sys
+import unicodedata
+from urllib.parse import urljoin, urlparse
+
 import requests
 from bs4 import BeautifulSoup
 
-# URL cible
-with open('url.txt', 'r') as file:
-    URL = file.read().strip()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from outils.analyse_html import constructeur_bs4
+from outils.base_resultats import obtenir_base
+from outils.recuperation import RecuperateurAsync
+from outils.urls import canoniser, cle_url
 
-# Headers pour éviter d'être bloqué par le site
-headers = {'User-Agent': 'Mozilla/5.0'}
+# ===========================
+# 📂 Paramètres
+# ===========================
+URL_FILE = "url.txt"  # Une ou plusieurs pages d'entrée de l'annuaire, une par ligne
+OUTPUT_FILE = "1_scraping_societes/societes_savantes.json"
 
-# Effectuer la requête HTTP
-response = requests.get(URL, headers=headers)
+# ⚡ Limites de concurrence (globale et par site)
+CONCURRENCE = 8
+CONCURRENCE_PAR_HOTE = 4
+PAGES_MAX = 500  # Garde-fou : nombre max de pages d'annuaire visitées
 
-if response.status_code == 200:
-    soup = BeautifulSoup(response.text, "html.parser")
-    
-    # Trouver les blocs contenant les sociétés savantes
-    societies = soup.find_all("article", class_="article-list-item")
+# Liens de pagination : rel="next", ?page=N, /page/N, numéros et flèches
+PARAMETRE_PAGE = re.compile(r"(^|&)(page|p|pg|paged|start|offset)=\d+", re.IGNORECASE)
+CHEMIN_PAGE = re.compile(r"/(page|p)/\d+/?$", re.IGNORECASE)
+TEXTE_PAGE = re.compile(r"^(\d+|suivant|suivante|next|précédent|précédente|previous|dernière|last|[«»‹›<>]+)$", re.IGNORECASE)
+EXTENSIONS_IGNOREES = (".pdf", ".doc", ".docx", ".ppt", ".pptx", ".xls", ".xlsx", ".zip", ".jpg", ".jpeg", ".png", ".gif")
 
+# ===========================
+# 🏛️ Extraction des sociétés d'une page
+# ===========================
+def extraire_societes(soup):
+    """Sociétés savantes listées sur une page d'annuaire (blocs `article.article-list-item`)."""
     data = []
-    
-    for society in societies:
+    for society in soup.find_all("article", class_="article-list-item"):
         details = {}
 
         # Récupérer les informations demandées
-        details["Organisation"] = society.find("h2").text.strip() if society.find("h2") else "N/A"
-        details["Abréviation"] = society.find("h3").text.strip() if society.find("h3") else "N/A"
-        
+        titre = society.find("h2")
+        abreviation = society.find("h3")
+        details["Organisation"] = titre.text.strip() if titre else "N/A"
+        details["Abréviation"] = abreviation.text.strip() if abreviation else "N/A"
+
         # Récupérer spécialité et type
         spans = society.find_all("span", class_="info-label")
         for span in spans:
             label = span.text.strip().lower()
-            value = span.find_next_sibling("span").text.strip() if span.find_next_sibling("span") else "N/A"
+            voisin = span.find_next_sibling("span")
+            value = voisin.text.strip() if voisin else "N/A"
             if "spécialité" in label:
                 details["Spécialité"] = value
             elif "type" in label:
                 details["Type"] = value
-        
+
         # Récupérer les liens utiles
         links = society.find_all("a", href=True)
         for link in links:
@@ -52,7 +73,7 @@ if response.status_code == 200:
                 details["Publications RSS"] = href
             elif "social" in text:
                 details["Social"] = href
-        
+
         # Ajouter un contrôle pour les champs manquants
         details.setdefault("Actualités", "N/A")
         details.setdefault("RSS", "N/A")
@@ -61,13 +82,172 @@ if response.status_code == 200:
         details.setdefault("Social", "N/A")
 
         data.append(details)
+    return data
+
+# ===========================
+# 🔗 Découverte de la pagination et des catégories
+# ===========================
+def est_pagination(lien, url):
+    """Vrai pour un lien vers une autre page de la même liste."""
+    morceaux = urlparse(url)
+    return (
+        "next" in (lien.get("rel") or []) or "prev" in (lien.get("rel") or [])
+        or bool(PARAMETRE_PAGE.search(morceaux.query)) or bool(CHEMIN_PAGE.search(morceaux.path))
+        or bool(TEXTE_PAGE.match(lien.get_text(strip=True)))
+    )
+
+def prefixe_rubrique(chemin):
+    """Dossier couvert par une page d'entrée, terminé par "/" ; None pour la racine du site.
+
+    `/annuaire` et `/annuaire/index.html` couvrent `/annuaire/` (mais pas `/annuaire-old`).
+    À la racine, tout le site serait une « sous-rubrique » : on n'y suit que la pagination.
+    """
+    dernier = chemin.rsplit("/", 1)[-1]
+    if "." in dernier:
+        chemin = chemin[:len(chemin) - len(dernier)]
+    prefixe = chemin.rstrip("/") + "/"
+    return None if prefixe == "/" else prefixe
+
+def sous_rubrique(chemin, depart):
+    prefixe = prefixe_rubrique(depart.path)
+    return prefixe is not None and (chemin + "/").startswith(prefixe)
+
+def liens_annuaire(soup, url_page, departs):
+    """Autres pages de l'annuaire liées depuis une page de liste.
+
+    Les liens des blocs de sociétés sont ignorés ; on garde la pagination du même
+    site et les sous-rubriques (catégories) situées sous une page d'entrée.
+    """
+    liens = []
+    for lien in soup.find_all("a", href=True):
+        if lien.find_parent("article", class_="article-list-item"):
+            continue
+        try:
+            url = canoniser(urljoin(url_page, lien["href"]))
+        except ValueError:
+            continue  # Lien mal formé (port non numérique, IPv6 invalide…)
+        morceaux = urlparse(url)
+        if morceaux.scheme not in ("http", "https") or morceaux.path.lower().endswith(EXTENSIONS_IGNOREES):
+            continue
+        for depart in departs:
+            if morceaux.netloc != depart.netloc:
+                continue
+            if sous_rubrique(morceaux.path, depart) or est_pagination(lien, url):
+                liens.append(url)
+                break
+    return liens
+
+# ===========================
+# 🧬 Fusion et déduplication
+# ===========================
+def normaliser(texte):
+    """Nom ou abréviation comparable : minuscules, sans accents ni ponctuation."""
+    if not texte or texte == "N/A":
+        return ""
+    texte = unicodedata.normalize("NFKD", texte).encode("ascii", "ignore").decode().lower()
+    return " ".join(re.findall(r"\w+", texte))
+
+def fusionner(pages):
+    """Sociétés de toutes les pages, dédoublonnées par nom puis par abréviation.
+
+    Une même société listée dans plusieurs catégories n'apparaît qu'une fois ; ses
+    champs manquants ("N/A") sont complétés par les autres occurrences.
+    """
+    societes, par_nom, par_abreviation = [], {}, {}
+    doublons = 0
+    for data in pages:
+        for details in data:
+            nom = normaliser(details["Organisation"])
+            abreviation = normaliser(details["Abréviation"])
+            existante = par_nom.get(nom) if nom else None
+            if existante is None and abreviation in par_abreviation:
+                candidate = par_abreviation[abreviation]
+                # Même abréviation : même société seulement si les noms ne se contredisent pas
+                if not nom or not normaliser(candidate["Organisation"]):
+                    existante = candidate
+            if existante is None:
+                existante = dict(details)
+                societes.append(existante)
+            else:
+                doublons += 1
+                for cle, valeur in details.items():
+                    if existante.get(cle, "N/A") == "N/A" and valeur != "N/A":
+                        existante[cle] = valeur
+            if normaliser(existante["Organisation"]):
+                par_nom.setdefault(normaliser(existante["Organisation"]), existante)
+            if normaliser(existante["Abréviation"]):
+                par_abreviation.setdefault(normaliser(existante["Abréviation"]), existante)
+    return societes, doublons
+
+# ===========================
+# ⚡ Parcours parallèle de l'annuaire
+# ===========================
+async def parcourir_annuaire(urls_depart):
+    """Visite toutes les pages de l'annuaire en parallèle ; résultats dans l'ordre de découverte."""
+    departs = [urlparse(canoniser(url)) for url in urls_depart]
+    a_visiter = [canoniser(url) for url in urls_depart]
+    vues = {cle_url(url) for url in a_visiter}
+    resultats = {}
+    erreurs = 0
+
+    async def visiter(recuperateur, rang, url):
+        nonlocal erreurs
+        try:
+            response = await recuperateur.recuperer(url)
+        except requests.RequestException as e:
+            erreurs += 1
+            print(f"⚠️ Erreur lors de l'accès à {url} : {e}")
+            return []
+        soup = BeautifulSoup(response.content, constructeur_bs4())
+        data = extraire_societes(soup)
+        resultats[rang] = data
+        print(f"📄 [{rang + 1}] {url} : {len(data)} sociétés")
+        # Seules les pages de liste mènent aux autres pages de l'annuaire
+        return liens_annuaire(soup, url, departs) if data or rang < len(departs) else []
+
+    async with RecuperateurAsync(CONCURRENCE, CONCURRENCE_PAR_HOTE) as recuperateur:
+        en_cours = {asyncio.create_task(visiter(recuperateur, rang, url)) for rang, url in enumerate(a_visiter)}
+        while en_cours:
+            finies, en_cours = await asyncio.wait(en_cours, return_when=asyncio.FIRST_COMPLETED)
+            for tache in finies:
+                for url in tache.result():
+                    if cle_url(url) in vues or len(a_visiter) >= PAGES_MAX:
+                        continue
+                    vues.add(cle_url(url))
+                    a_visiter.append(url)
+                    en_cours.add(asyncio.create_task(visiter(recuperateur, len(a_visiter) - 1, url)))
+
+    if len(a_visiter) >= PAGES_MAX:
+        print(f"⚠️ Limite de {PAGES_MAX} pages atteinte, l'annuaire n'est peut-être pas complet.")
+    return [resultats[rang] for rang in sorted(resultats)], erreurs
+
+def main():
+    # URL(s) cible(s)
+    with open(URL_FILE, 'r') as file:
+        urls = [ligne.strip() for ligne in file if ligne.strip()]
+    if not urls:
+        print(f"❌ Aucune URL trouvée dans {URL_FILE}.")
+        exit(1)
+
+    pages, erreurs = asyncio.run(parcourir_annuaire(urls))
+    if not pages:
+        print("❌ Échec de récupération de l'annuaire.")
+        exit(1)
+
+    data, doublons = fusionner(pages)
 
     # 📂 Sauvegarde dans un fichier JSON
-    output_file = "1_scraping_societes/societes_savantes.json"
-    with open(output_file, "w", encoding="utf-8") as file:
+    with open(OUTPUT_FILE, "w", encoding="utf-8") as file:
         json.dump(data, file, indent=4, ensure_ascii=False)
 
-    print(f"\n✅ Données enregistrées dans : {output_file}")
+    # 🗃️ Et dans la base des résultats, identifiées par leur nom (ou abréviation) normalisé
+    obtenir_base().enregistrer_societes(
+        data, cle=lambda societe: normaliser(societe["Organisation"]) or normaliser(societe["Abréviation"])
+    )
+
+    print(f"\n✅ {len(data)} sociétés ({len(pages)} pages, {doublons} doublons fusionnés) enregistrées dans : {OUTPUT_FILE}")
+    if erreurs:
+        print(f"⚠️ {erreurs} pages n'ont pas pu être récupérées.")
 
-else:
-    print(f"❌ Échec de récupération de la page, code HTTP: {response.status_code}")
+if __name__ == "__main__":
+    main()
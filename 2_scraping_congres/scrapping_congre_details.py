@@ -1,25 +1,26 @@
+import argparse
+import asyncio
 import json
-import requests
-from bs4 import BeautifulSoup
 import os
+import sys
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from outils.analyse_html import Selecteurs
+from outils.base_resultats import obtenir_base
+from outils.cache_http import obtenir_cache
+from outils.flux import EcrivainFlux
+from outils.rafraichissement import Rafraichissement
+from outils.recuperation import RecuperateurAsync
 
 # 📂 Chemins des fichiers mis à jour
-INPUT_FILE = "3_filtrage_congres/liste_congrès_reformat.json"
-OUTPUT_FILE = "2_scraping_congres/congres_bruts.json"
+INPUT_FILE = "2_scraping_congres/liste_urls_congres.json"  # Pages congrès de l'annuaire, une URL par entrée
+OUTPUT_FILE = "2_scraping_congres/congres_bruts.jsonl"  # Un congrès par ligne, écrit dès qu'il est scrapé
 LOG_FILE = "2_scraping_congres/scraping_errors.log"
 
-# Vérifier si le fichier d'entrée existe
-if not os.path.exists(INPUT_FILE):
-    print(f"❌ Erreur : Le fichier {INPUT_FILE} n'existe pas.")
-    exit(1)
-
-# Charger la liste de liens depuis le fichier JSON
-with open(INPUT_FILE, "r", encoding="utf-8") as file:
-    urls = json.load(file)  # Assurez-vous que le fichier contient une liste de liens
-
-if not urls:
-    print("❌ Aucune URL trouvée dans le fichier d'entrée.")
-    exit(1)
+# ⚡ Limites de concurrence (globale et par site)
+CONCURRENCE = 20
+CONCURRENCE_PAR_HOTE = 4
 
 # Sélecteurs CSS pour extraire les données
 SELECTORS = {
@@ -32,29 +33,33 @@ SELECTORS = {
     "description": "div:nth-of-type(3)",
     "specialites": "div:nth-of-type(2) > p:nth-of-type(7) > a"
 }
+# Compilés une fois pour le moteur le plus rapide disponible (ANALYSE_HTML_MOTEUR pour l'imposer)
+SELECTEURS = Selecteurs(SELECTORS)
+
+# Fonction pour extraire les données d'une page déjà téléchargée
+def analyser_page(url, contenu):
+    # Une seule analyse du document pour tous les sélecteurs
+    trouves = SELECTEURS.extraire(contenu)
 
-# Headers pour éviter d'être bloqué par certains sites
-HEADERS = {'User-Agent': 'Mozilla/5.0'}
+    data = {}
+    for key, textes in trouves.items():
+        if key == "specialites":
+            data[key] = textes or ["Non disponible"]
+        else:
+            data[key] = textes[0] if textes else "Non disponible"
+
+    data["lien_source"] = url  # Ajouter le lien source
+    return data
 
 # Fonction pour scraper une page donnée
-def scrape_page(url):
+async def scrape_page(recuperateur, versions, url):
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        response.raise_for_status()  # Vérifier si la requête a réussi
-        soup = BeautifulSoup(response.content, "html.parser")
-
-        # Extraire les données avec BeautifulSoup
-        data = {}
-        for key, selector in SELECTORS.items():
-            elements = soup.select(selector)
-            if key == "specialites":
-                data[key] = [el.get_text(strip=True) for el in elements] or ["Non disponible"]
-            elif key == "description":
-                data[key] = elements[0].get_text(strip=True) if elements else "Non disponible"
-            else:
-                data[key] = elements[0].get_text(strip=True) if elements else "Non disponible"
-
-        data["lien_source"] = url  # Ajouter le lien source
+        etat, response, precedente = await versions.recuperer_async(recuperateur, url)
+        if versions.reutilisable(etat, precedente):
+            data = precedente["resultat"]  # Page inchangée : pas de nouvelle analyse
+        else:
+            data = analyser_page(url, response.content)
+        versions.confirmer(url, response, data, precedente)
         return data
 
     except requests.RequestException as e:
@@ -64,22 +69,54 @@ def scrape_page(url):
         print(f"⚠️ Erreur lors de l'accès à {url} : {e}")
         return None
 
-# Scraper toutes les pages et stocker les résultats
-resultats = []
-total_urls = len(urls)
+# Scraper toutes les pages en parallèle ; chaque congrès part dans le flux dès qu'il est prêt
+async def scraper_toutes_pages(urls, sortie, versions):
+    total_urls = len(urls)
+    termines = 0
+
+    async def suivre(url):
+        nonlocal termines
+        data = await scrape_page(recuperateur, versions, url)
+        termines += 1
+        print(f"➡️ [{termines}/{total_urls}] Scraping de {url}...")
+        if data:
+            await asyncio.to_thread(obtenir_base().enregistrer_annuaire, data)
+            sortie.ajouter(data)
+
+    async with RecuperateurAsync(CONCURRENCE, CONCURRENCE_PAR_HOTE) as recuperateur:
+        await asyncio.gather(*(suivre(url) for url in urls))
+    return sortie.nombre
+
+def main(rafraichir=False):
+    # Vérifier si le fichier d'entrée existe
+    if not os.path.exists(INPUT_FILE):
+        print(f"❌ Erreur : Le fichier {INPUT_FILE} n'existe pas.")
+        exit(1)
+
+    # Charger la liste de liens depuis le fichier JSON
+    with open(INPUT_FILE, "r", encoding="utf-8") as file:
+        urls = json.load(file)  # Assurez-vous que le fichier contient une liste de liens
 
-print(f"🔍 Début du scraping de {total_urls} congrès...")
+    if not urls:
+        print("❌ Aucune URL trouvée dans le fichier d'entrée.")
+        exit(1)
 
-for index, url in enumerate(urls, start=1):
-    print(f"➡️ [{index}/{total_urls}] Scraping de {url}...")
-    data = scrape_page(url)
-    if data:
-        resultats.append(data)
+    print(f"🔍 Début du scraping de {len(urls)} congrès...")
+    # Versions déjà analysées : en rafraîchissement, seules les pages modifiées sont réanalysées
+    versions = Rafraichissement("2", actif=rafraichir)
+    with EcrivainFlux(OUTPUT_FILE) as sortie:
+        total = asyncio.run(scraper_toutes_pages(urls, sortie, versions))
 
-# Sauvegarder les résultats dans un fichier JSON
-with open(OUTPUT_FILE, "w", encoding="utf-8") as file:
-    json.dump(resultats, file, indent=4, ensure_ascii=False)
+    print(f"\n✅ Scraping terminé ({total} congrès). Résultats sauvegardés dans '{OUTPUT_FILE}'.")
+    versions.afficher_rapport()
+    if obtenir_cache() is not None:
+        obtenir_cache().afficher_stats()
+    if os.path.exists(LOG_FILE):
+        print(f"⚠️ Des erreurs ont été enregistrées dans '{LOG_FILE}'.")
 
-print(f"\n✅ Scraping terminé. Résultats sauvegardés dans '{OUTPUT_FILE}'.")
-if os.path.exists(LOG_FILE):
-    print(f"⚠️ Des erreurs ont été enregistrées dans '{LOG_FILE}'.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scraping du détail des congrès de l'annuaire.")
+    parser.add_argument("--rafraichir", action="store_true",
+                        help="Revalide chaque page auprès du serveur et ne réanalyse que celles qui ont changé")
+    args = parser.parse_args()
+    main(rafraichir=args.rafraichir)
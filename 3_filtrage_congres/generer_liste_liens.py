@@ -1,28 +1,32 @@
-import json
+import argparse
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from outils.flux import EcrivainFlux, lire_flux
 
 # 📂 Chemins des fichiers
-INPUT_FILE = "2_scraping_congres/congres_bruts.json"
-OUTPUT_FILE = "3_filtrage_congres/liste_congrès_reformat.json"
+INPUT_FILE = "2_scraping_congres/congres_bruts.jsonl"
+OUTPUT_FILE = "3_filtrage_congres/liste_congrès_reformat.jsonl"
+
+parser = argparse.ArgumentParser(description="Extrait les liens des congrès scrapés.")
+parser.add_argument("--suivre", action="store_true",
+                    help="Lit les congrès au fil de l'étape 2 au lieu d'attendre sa fin")
+args = parser.parse_args()
 
 # Vérifier si le fichier d'entrée existe
-if not os.path.exists(INPUT_FILE):
+if not args.suivre and not os.path.exists(INPUT_FILE):
     print(f"❌ Erreur : Le fichier {INPUT_FILE} n'existe pas.")
     exit(1)
 
-# Charger les données des congrès
-with open(INPUT_FILE, "r", encoding="utf-8") as file:
-    congres_data = json.load(file)
+# Extraire uniquement les liens, congrès par congrès
+with EcrivainFlux(OUTPUT_FILE) as sortie:
+    for congres in lire_flux(INPUT_FILE, suivre=args.suivre):
+        if "lien" in congres:
+            sortie.ajouter(congres.get("lien"))
 
-# Extraire uniquement les liens
-liens = [congres.get("lien") for congres in congres_data if "lien" in congres]
-
-if not liens:
+if not sortie.nombre:
     print("❌ Aucun lien trouvé dans le fichier des congrès.")
     exit(1)
 
-# Enregistrer le fichier JSON avec la liste des liens
-with open(OUTPUT_FILE, "w", encoding="utf-8") as file:
-    json.dump(liens, file, indent=4, ensure_ascii=False)
-
 print(f"✅ Liste des liens enregistrée dans : {OUTPUT_FILE}")
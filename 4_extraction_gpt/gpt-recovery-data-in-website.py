@@ -1,80 +1,87 @@
+import argparse
+import asyncio
 import json
 import requests
-import time
 import os
-from openai import OpenAI
+import sys
+from collections import Counter
+from openai import AsyncOpenAI, OpenAI
 from bs4 import BeautifulSoup
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from outils.base_resultats import obtenir_base
+from outils.cache_gpt import CacheGPT, empreinte_bloc
+from outils.cache_http import obtenir_cache
+from outils.decoupage import decouper_en_blocs
+from outils.flux import SUFFIXE_PRECEDENT, EcrivainFlux, lire_flux
+from outils.journal import lire_journal
+from outils.extraction_contenu import extraire_contenu_principal, rapport_reduction
+from outils.lot_gpt import LotGPT
+from outils.planificateur_gpt import PlanificateurGPT
+from outils.pre_extraction import CHAMPS_LISTES, au_format_etape4, completer, en_liste, necessite_gpt, pre_extraire
+from outils.rafraichissement import Rafraichissement
+from outils.recuperation import telecharger
+
 # 📂 Chemins des fichiers mis à jour
-INPUT_FILE = "3_filtrage_congres/liste_congrès_reformat.json"
-OUTPUT_FILE = "4_extraction_gpt/congres_enrichis.json"
+INPUT_FILE = "3_filtrage_congres/liste_congrès_reformat.jsonl"
+OUTPUT_FILE = "4_extraction_gpt/congres_enrichis.jsonl"  # Un congrès par ligne, lisible par l'étape 5 au fil de l'eau
+JOURNAL_FILE = "4_extraction_gpt/journal_extraction.jsonl"  # Ancien journal, importé dans la base des résultats
+ANCIEN_OUTPUT_FILE = "4_extraction_gpt/congres_enrichis.json"
 LOG_FILE = "4_extraction_gpt/gpt_extraction_errors.log"
+LOT_FILE = "4_extraction_gpt/lot_en_cours.json"
 
 # Activer ou désactiver le mode debug
 DEBUG_MODE = True
 
-# Vérifier si le fichier d'entrée existe
-if not os.path.exists(INPUT_FILE):
-    print(f"❌ Erreur : Le fichier {INPUT_FILE} n'existe pas.")
-    exit(1)
-
-# Lecture de la clé API et de l'ID d'organisation
-with open('key.txt', 'r') as file:
-    secret_key = file.read().strip()
+# Modèle et version du prompt (à incrémenter à chaque modification du prompt)
+MODELE = "gpt-4"
+VERSION_PROMPT = "etape4-v1"
 
-# Initialisation du client OpenAI
-client = OpenAI(api_key=secret_key)
+# Nombre de congrès traités simultanément (les requêtes GPT sont bornées par le planificateur)
+CONGRES_EN_PARALLELE = 10
 
-# Charger la liste des congrès
-with open(INPUT_FILE, "r", encoding="utf-8") as file:
-    congres_data = json.load(file)
+# Cache des extractions déjà payées
+cache_gpt = CacheGPT()
 
-if not congres_data:
-    print("❌ Aucun congrès trouvé dans le fichier d'entrée.")
-    exit(1)
+# Blocs envoyés à GPT / traités uniquement par les motifs locaux
+statistiques_blocs = Counter()
 
-# Vérifier si un fichier de sauvegarde existe déjà (pour reprendre en cas d'arrêt)
-if os.path.exists(OUTPUT_FILE):
-    with open(OUTPUT_FILE, "r", encoding="utf-8") as file:
-        resultats = json.load(file)
-    print(f"🔄 Reprise du traitement : {len(resultats)} congrès déjà traités.")
-else:
-    resultats = []
+# Fonction pour enregistrer une erreur
+def log_erreur(message):
+    with open(LOG_FILE, "a", encoding="utf-8") as log_file:
+        log_file.write(f"{message}\n")
+    print(message)
 
-traites = {item["lien"] for item in resultats}  # Liens déjà traités
+# Fonction pour nettoyer le contenu d'une page web déjà téléchargée
+def nettoyer_contenu(url, response):
+    # Seule la zone principale (et les blocs de coordonnées) part vers GPT
+    texte = extraire_contenu_principal(response.text)
+    rapport_reduction(url, BeautifulSoup(response.text, "html.parser").get_text(), texte)
+    return texte
 
 # Fonction pour récupérer et nettoyer le contenu d'une page web
 def recuperer_contenu(url):
     try:
-        response = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        return soup.get_text()
+        return nettoyer_contenu(url, telecharger(url, timeout=10))
     except requests.RequestException as e:
-        with open(LOG_FILE, "a", encoding="utf-8") as log_file:
-            log_file.write(f"❌ Erreur accès {url}: {e}\n")
-        print(f"❌ Erreur accès {url}: {e}")
+        log_erreur(f"❌ Erreur accès {url}: {e}")
         return None
 
-# Fonction pour découper un texte en blocs de 5000 caractères
-def decouper_texte(texte, taille_bloc=5000):
-    return [texte[i:i+taille_bloc] for i in range(0, len(texte), taille_bloc)]
-
-# Fonction pour demander à GPT d'extraire les infos sous format JSON
-def extraire_informations(text, url):
-    blocs = decouper_texte(text)
-    extraction_finale = {
-        "contacts": [],
-        "personnes": [],
-        "lieux": [],
-        "dates": [],
-        "résumé": ""
-    }
+# Fonction pour récupérer une page en la comparant à sa dernière version extraite : (état, réponse, précédente)
+def recuperer_version(url, versions):
+    try:
+        return versions.recuperer(url, timeout=10)
+    except requests.RequestException as e:
+        log_erreur(f"❌ Erreur accès {url}: {e}")
+        return None
 
-    for i, bloc in enumerate(blocs):
-        print(f"→ Envoi du bloc {i+1}/{len(blocs)} pour {url}...")
+# Fonction pour découper un texte en blocs mesurés en jetons, sur les frontières de paragraphes
+def decouper_texte(texte):
+    return decouper_en_blocs(texte)
 
-        prompt = f"""
+# Fonction pour construire le prompt d'extraction d'un bloc
+def construire_prompt(bloc, url):
+    return f"""
         Voici un extrait d'une page web issue de {url}. Analyse-le et retourne **uniquement** un JSON **valide** en **français**, contenant :
 
         {{
@@ -97,70 +104,392 @@ def extraire_informations(text, url):
         {bloc}
         """
 
-        # Système de gestion du rate limit avec réessai
-        attente = 2
-        for tentative in range(5):  # Essaye 5 fois max
-            try:
-                response = client.chat.completions.create(
-                    model="gpt-4",
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                contenu_gpt = response.choices[0].message.content.strip()
+# Fonction pour valider la réponse brute de GPT (ValueError => nouvel essai)
+def analyser_reponse(contenu_gpt):
+    if DEBUG_MODE:
+        print(f"🧐 Réponse brute de GPT :\n{contenu_gpt}")
 
-                if DEBUG_MODE:
-                    print(f"🧐 Réponse brute de GPT (Bloc {i+1}):\n{contenu_gpt}")
+    if contenu_gpt.startswith("{") and contenu_gpt.endswith("}"):
+        return json.loads(contenu_gpt)
+    raise ValueError("La réponse de GPT n'est pas un JSON valide.")
+
+# Fonction pour créer une extraction vide
+def nouvelle_extraction():
+    return {
+        "contacts": [],
+        "personnes": [],
+        "lieux": [],
+        "dates": [],
+        "résumé": ""
+    }
 
-                if contenu_gpt.startswith("{") and contenu_gpt.endswith("}"):
-                    resultat = json.loads(contenu_gpt)
-                else:
-                    raise ValueError("La réponse de GPT n'est pas un JSON valide.")
+# Fonction pour ajouter le résultat d'un bloc à l'extraction du congrès
+def fusionner_resultat(extraction_finale, resultat):
+    for champ in CHAMPS_LISTES:
+        extraction_finale[champ].extend(en_liste(resultat.get(champ)))
+    extraction_finale["résumé"] += " " + str(resultat.get("résumé") or "")
 
-                extraction_finale["contacts"].extend(resultat.get("contacts", []))
-                extraction_finale["personnes"].extend(resultat.get("personnes", []))
-                extraction_finale["lieux"].extend(resultat.get("lieux", []))
-                extraction_finale["dates"].extend(resultat.get("dates", []))
-                extraction_finale["résumé"] += " " + resultat.get("résumé", "")
+# Fonction pour choisir les blocs qui ont encore besoin de GPT (personnes, rôles, résumé)
+def selectionner_blocs(blocs, compter=True):
+    choix = []
+    besoin_resume = True
+    for bloc in blocs:
+        envoyer = necessite_gpt(bloc, besoin_resume)
+        besoin_resume = besoin_resume and not envoyer
+        if compter:
+            statistiques_blocs["gpt" if envoyer else "regex"] += 1
+        choix.append(envoyer)
+    return choix
 
-                break  # Sortir de la boucle en cas de succès
+# Fonction pour extraire localement contacts, dates et lieux (emails, téléphones, adresses...)
+def extraction_locale(text):
+    return au_format_etape4(pre_extraire(text))
 
-            except Exception as e:
-                print(f"⚠️ Erreur avec GPT (tentative {tentative+1}/5) : {e}")
-                time.sleep(attente)
-                attente *= 2  # Double le temps d'attente à chaque échec
-
-    return extraction_finale
-
-# Processus principal
-total_congres = len(congres_data)
-for index, item in enumerate(congres_data):
-    if isinstance(item, str):
-        url = item
-    elif isinstance(item, dict) and "lien" in item:
-        url = item["lien"]
+# Fonction pour enregistrer l'état d'un bloc : "fait" (avec son résultat) ou "echec" (avec l'erreur)
+def journaliser_bloc(base, url, i, bloc, resultat=None, erreur=None):
+    if erreur is None:
+        base.enregistrer_bloc(url, i, empreinte_bloc(bloc), "fait", resultat=resultat)
     else:
-        print(f"⚠️ Format invalide détecté : {item}")
-        continue
+        # Le texte est conservé pour pouvoir réessayer le bloc sans recharger la page
+        base.enregistrer_bloc(url, i, empreinte_bloc(bloc), "echec", erreur=str(erreur), texte=bloc)
+
+# Fonction pour demander à GPT d'extraire les infos sous format JSON
+async def extraire_informations(text, url, planificateur, base, blocs_faits=None):
+    blocs = decouper_texte(text)
+    envois = selectionner_blocs(blocs)
+    blocs_faits = blocs_faits or {}
+    extraction_finale = nouvelle_extraction()
+    echecs = []
+
+    # Plan du congrès : les blocs sans état "fait"/"echec" sont en attente
+    base.planifier_blocs(url, [empreinte_bloc(bloc) for bloc, envoyer in zip(blocs, envois) if envoyer])
 
-    if url in traites:
-        print(f"⏩ {url} déjà traité, passage au suivant...")
-        continue
+    async def traiter_bloc(i, bloc):
+        if not envois[i]:
+            print(f"⚡ Bloc {i+1}/{len(blocs)} pour {url} entièrement résolu localement.")
+            return None
 
-    print(f"\n🔍 [{index+1}/{total_congres}] Traitement de {url}...")
-    contenu = recuperer_contenu(url)
+        empreinte = empreinte_bloc(bloc)
+        if empreinte in blocs_faits:
+            print(f"♻️ Bloc {i+1}/{len(blocs)} pour {url} repris de la base.")
+            return blocs_faits[empreinte]
 
-    if contenu:
-        infos = extraire_informations(contenu, url)
-        resultats.append({"lien": url, "extraction": infos})
+        resultat = cache_gpt.obtenir(MODELE, VERSION_PROMPT, bloc)
+        if resultat is not None:
+            print(f"💾 Bloc {i+1}/{len(blocs)} pour {url} déjà extrait (cache).")
+            return resultat
+
+        print(f"→ Envoi du bloc {i+1}/{len(blocs)} pour {url}...")
+        try:
+            resultat = await planificateur.soumettre(construire_prompt(bloc, url), groupe=url,
+                                                     analyser=analyser_reponse)
+        except Exception as e:
+            log_erreur(f"⚠️ Abandon du bloc {i+1}/{len(blocs)} pour {url} : {e}")
+            journaliser_bloc(base, url, i, bloc, erreur=e)
+            echecs.append({"index": i, "empreinte": empreinte, "erreur": str(e)})
+            return None
+        cache_gpt.enregistrer(MODELE, VERSION_PROMPT, bloc, resultat)
+        journaliser_bloc(base, url, i, bloc, resultat)
+        return resultat
+
+    # Les blocs partent en parallèle mais sont fusionnés dans l'ordre de la page
+    for resultat in await asyncio.gather(*(traiter_bloc(i, bloc) for i, bloc in enumerate(blocs))):
+        if resultat is not None:
+            fusionner_resultat(extraction_finale, resultat)
+
+    # Les blocs en échec restent visibles dans le résultat (et réessayables avec --retry-failed)
+    if echecs:
+        extraction_finale["blocs_en_echec"] = sorted(echecs, key=lambda echec: echec["index"])
+    return completer(extraction_finale, extraction_locale(text))
+
+# Fonction pour afficher l'état des blocs au démarrage
+def afficher_etat_blocs(base):
+    compteur = base.compter_blocs()
+    if compteur:
+        print(f"📋 Blocs planifiés : {compteur.get('fait', 0)} faits, {compteur.get('en attente', 0)} en attente, "
+              f"{compteur.get('echec', 0)} en échec.")
+
+# Fonction pour rejouer un journal JSON Lines dans la base (la dernière version l'emporte)
+def importer_journal(base, chemin):
+    nombre = 0
+    with base.transaction():
+        for enregistrement in lire_journal(chemin):
+            if enregistrement.get("type") == "plan":
+                base.planifier_blocs(enregistrement["lien"], enregistrement["blocs"])
+            elif enregistrement.get("type") == "bloc" and "empreinte" in enregistrement:
+                base.enregistrer_bloc(enregistrement["lien"], enregistrement["index"], enregistrement["empreinte"],
+                                      enregistrement["etat"], resultat=enregistrement.get("resultat"),
+                                      erreur=enregistrement.get("erreur"), texte=enregistrement.get("texte"))
+            elif enregistrement.get("type") == "congres":
+                base.enregistrer_extraction_congres(enregistrement["lien"], enregistrement["extraction"])
+                nombre += 1
+    return nombre
+
+# Fonction pour reprendre les anciennes sauvegardes dans la base, une seule fois puis mises de côté
+def migrer_ancienne_sauvegarde(base):
+    # Ancienne sortie JSON d'abord : les journaux, plus récents, l'emportent
+    if os.path.exists(ANCIEN_OUTPUT_FILE):
+        with open(ANCIEN_OUTPUT_FILE, "r", encoding="utf-8") as file:
+            anciens = json.load(file)
+        with base.transaction():
+            for item in anciens:
+                base.enregistrer_extraction_congres(item["lien"], item["extraction"])
+        os.replace(ANCIEN_OUTPUT_FILE, ANCIEN_OUTPUT_FILE + ".migré")
+        print(f"🔄 {len(anciens)} congrès repris de '{ANCIEN_OUTPUT_FILE}' dans {base.fichier}.")
+    # Journaux JSON Lines : l'actuel, ou l'ancien qui portait le nom de la sortie (mis de côté par run_pipeline.py)
+    for ancien_journal in (OUTPUT_FILE + SUFFIXE_PRECEDENT, OUTPUT_FILE, JOURNAL_FILE):
+        if os.path.exists(ancien_journal) and next(lire_journal(ancien_journal), {}).get("type"):
+            nombre = importer_journal(base, ancien_journal)
+            os.replace(ancien_journal, ancien_journal + ".migré")
+            print(f"🔄 {nombre} congrès repris de '{ancien_journal}' dans {base.fichier}.")
+
+# Fonction pour publier dans le flux de sortie les congrès déjà extraits
+def publier_extraits(base, sortie, sauf=None):
+    for lien, extraction in base.iterer_extractions():
+        if sauf is None or lien not in sauf:
+            sortie.ajouter({"lien": lien, "extraction": extraction})
+
+# Fonction pour lister les congrès restant à traiter : (index, url), au fil du flux d'entrée
+def congres_a_traiter(congres_data, traites):
+    for index, item in enumerate(congres_data):
+        if isinstance(item, str):
+            url = item
+        elif isinstance(item, dict) and "lien" in item:
+            url = item["lien"]
+        else:
+            print(f"⚠️ Format invalide détecté : {item}")
+            continue
+
+        if url in traites:
+            print(f"⏩ {url} déjà traité, passage au suivant...")
+            continue
+        traites.add(url)  # Évite de traiter deux fois un lien présent en double
+        yield index, url
+
+# Processus principal : les congrès sont lus au fil du flux, CONGRES_EN_PARALLELE à la fois
+async def traiter_congres(congres_data, base, sortie, traites, planificateur, versions):
+    limite = asyncio.Semaphore(CONGRES_EN_PARALLELE)
+
+    async def traiter(index, url):
+        try:
+            print(f"\n🔍 [{index+1}] Traitement de {url}...")
+            page = await asyncio.to_thread(recuperer_version, url, versions)
+            if page is None:
+                extraction = base.extraction_congres(url) if versions.actif else None
+                if extraction is not None:
+                    # Site inaccessible pendant le rafraîchissement : l'extraction précédente est conservée
+                    sortie.ajouter({"lien": url, "extraction": extraction})
+                return
+            etat, response, precedente = page
+            # Rafraîchissement : page inchangée depuis la dernière extraction, ni analyse ni appel GPT
+            if versions.reutilisable(etat, precedente):
+                print(f"⏩ {url} inchangé depuis la dernière extraction.")
+                sortie.ajouter({"lien": url, "extraction": base.extraction_congres(url) or precedente["resultat"]})
+                return
+            contenu = await asyncio.to_thread(nettoyer_contenu, url, response)
+            if not contenu:
+                return
+            # Les blocs déjà payés lors d'un run interrompu ne sont pas redemandés
+            blocs_faits = {bloc["empreinte"]: bloc["resultat"] for bloc in base.blocs(url, "fait")}
+            infos = await extraire_informations(contenu, url, planificateur, base, blocs_faits)
+            # Point de reprise : le congrès est définitivement acquis, puis transmis à l'étape 5
+            base.enregistrer_extraction_congres(url, infos)
+            versions.confirmer(url, response, infos, precedente)
+            sortie.ajouter({"lien": url, "extraction": infos})
+        finally:
+            limite.release()
+
+    # Le flux d'entrée peut attendre l'étape 3 : on le lit hors de la boucle asyncio
+    a_traiter = congres_a_traiter(congres_data, traites)
+    taches = set()
+    while True:
+        await limite.acquire()
+        suivant = await asyncio.to_thread(next, a_traiter, None)
+        if suivant is None:
+            limite.release()
+            break
+        tache = asyncio.create_task(traiter(*suivant))
+        taches.add(tache)
+        tache.add_done_callback(taches.discard)
+    await asyncio.gather(*taches)
+
+# Mode lot : tous les blocs non encore extraits partent dans un seul lot Batch API
+def preparer_lot(congres_data, traites):
+    demandes = {}
+    metadonnees = {"congres": []}
+    for index, url in congres_a_traiter(congres_data, traites):
+        print(f"🔍 [{index+1}] Préparation de {url}...")
+        contenu = recuperer_contenu(url)
+        if not contenu:
+            continue
+        n = len(metadonnees["congres"])
+        blocs = decouper_texte(contenu)
+        metadonnees["congres"].append({"lien": url, "blocs": blocs})
+        for i, (bloc, envoyer) in enumerate(zip(blocs, selectionner_blocs(blocs))):
+            if envoyer and cache_gpt.obtenir(MODELE, VERSION_PROMPT, bloc) is None:
+                demandes[f"c{n}-b{i}"] = construire_prompt(bloc, url)
+    return demandes, metadonnees
+
+def fusionner_lot(metadonnees, reponses, erreurs, base, traites):
+    for n, congres in enumerate(metadonnees["congres"]):
+        url = congres["lien"]
+        extraction = nouvelle_extraction()
+        echecs = []
+        for i, (bloc, envoyer) in enumerate(zip(congres["blocs"], selectionner_blocs(congres["blocs"], compter=False))):
+            cle = f"c{n}-b{i}"
+            if not envoyer:
+                continue
+            if cle in reponses:
+                try:
+                    resultat = analyser_reponse(reponses[cle])
+                except ValueError as e:
+                    log_erreur(f"⚠️ Bloc {i+1} de {url} inexploitable dans le lot : {e}")
+                    journaliser_bloc(base, url, i, bloc, erreur=e)
+                    echecs.append({"index": i, "empreinte": empreinte_bloc(bloc), "erreur": str(e)})
+                    continue
+                cache_gpt.enregistrer(MODELE, VERSION_PROMPT, bloc, resultat)
+                journaliser_bloc(base, url, i, bloc, resultat)
+            else:
+                resultat = cache_gpt.obtenir(MODELE, VERSION_PROMPT, bloc, compter=False)  # Déjà compté à la préparation
+                if resultat is None:
+                    log_erreur(f"⚠️ Bloc {i+1} de {url} en échec dans le lot : {erreurs.get(cle)}")
+                    journaliser_bloc(base, url, i, bloc, erreur=erreurs.get(cle))
+                    echecs.append({"index": i, "empreinte": empreinte_bloc(bloc), "erreur": str(erreurs.get(cle))})
+                    continue
+            fusionner_resultat(extraction, resultat)
+        if echecs:
+            extraction["blocs_en_echec"] = echecs
+        completer(extraction, extraction_locale("\n\n".join(congres["blocs"])))
+        base.enregistrer_extraction_congres(url, extraction)
         traites.add(url)
 
-    # Sauvegarde toutes les 5 requêtes
-    if len(resultats) % 5 == 0:
-        with open(OUTPUT_FILE, "w", encoding="utf-8") as output_file:
-            json.dump(resultats, output_file, indent=4, ensure_ascii=False)
-        print("💾 Sauvegarde intermédiaire effectuée.")
+def traiter_par_lot(congres_data, base, traites, client):
+    lot = LotGPT(client, MODELE, LOT_FILE)
+    etat = lot.lot_en_cours()
+    if etat is not None:
+        print(f"🔄 Reprise du lot {etat['batch_id']}...")
+        for congres in etat["metadonnees"]["congres"]:
+            traites.add(congres["lien"])
+    else:
+        demandes, metadonnees = preparer_lot(congres_data, traites)
+        if not demandes:
+            # Tout est déjà dans le cache : rien à soumettre
+            fusionner_lot(metadonnees, {}, {}, base, traites)
+            return
+        etat = lot.soumettre(demandes, metadonnees)
+
+    reponses, erreurs = lot.resultats(lot.attendre(etat))
+    fusionner_lot(etat["metadonnees"], reponses, erreurs, base, traites)
+    lot.terminer()
+
+# Mode --retry-failed : ne relance que les blocs en échec, sur tout le jeu de données
+async def reessayer_echecs(base, planificateur):
+    bilan = Counter()
+
+    async def reessayer(lien, extraction, echecs):
+        async def reessayer_bloc(enregistrement):
+            bloc, i = enregistrement["texte"], enregistrement["rang"]
+            print(f"🔁 Nouvel essai du bloc {i+1} pour {lien}...")
+            try:
+                resultat = await planificateur.soumettre(construire_prompt(bloc, lien), groupe=lien,
+                                                         analyser=analyser_reponse)
+            except Exception as e:
+                log_erreur(f"⚠️ Bloc {i+1} pour {lien} toujours en échec : {e}")
+                journaliser_bloc(base, lien, i, bloc, erreur=e)
+                return {"index": i, "empreinte": enregistrement["empreinte"], "erreur": str(e)}, None
+            cache_gpt.enregistrer(MODELE, VERSION_PROMPT, bloc, resultat)
+            journaliser_bloc(base, lien, i, bloc, resultat)
+            return None, resultat
+
+        restants = []
+        for echec, resultat in await asyncio.gather(*(reessayer_bloc(e) for e in echecs)):
+            if resultat is not None:
+                fusionner_resultat(extraction, resultat)
+                bilan["réussis"] += 1
+            else:
+                restants.append(echec)
+                bilan["toujours en échec"] += 1
+        extraction.pop("blocs_en_echec", None)
+        if restants:
+            extraction["blocs_en_echec"] = sorted(restants, key=lambda echec: echec["index"])
+        base.enregistrer_extraction_congres(lien, extraction)
+
+    echecs_par_congres = {}
+    for bloc in base.blocs(etat="echec"):
+        echecs_par_congres.setdefault(bloc["lien"], []).append(bloc)
+    taches = []
+    for lien, echecs in echecs_par_congres.items():
+        extraction = base.extraction_congres(lien)
+        if extraction is not None:
+            taches.append(reessayer(lien, extraction, echecs))
+    await asyncio.gather(*taches)
+    print(f"🔁 Blocs réessayés : {bilan['réussis']} réussis, {bilan['toujours en échec']} toujours en échec.")
+
+async def main(mode_lot=False, reessayer=False, suivre=False, rafraichir=False):
+    # Vérifier si le fichier d'entrée existe
+    if not suivre and not reessayer and not os.path.exists(INPUT_FILE):
+        print(f"❌ Erreur : Le fichier {INPUT_FILE} n'existe pas.")
+        exit(1)
+
+    # Lecture de la clé API et de l'ID d'organisation
+    with open('key.txt', 'r') as file:
+        secret_key = file.read().strip()
+
+    # Liste des congrès, lue lien par lien (au fil de l'étape 3 avec --suivre)
+    congres_data = lire_flux(INPUT_FILE, suivre=suivre)
+
+    # Reprise en cas d'arrêt : la base des résultats fait foi
+    base = obtenir_base()
+    migrer_ancienne_sauvegarde(base)
+    # Liens déjà traités, vérifiés un par un dans la base ; en rafraîchissement, ils sont revérifiés au lieu d'être sautés
+    traites = base.congres_traites(reprendre=not rafraichir)
+    if not rafraichir and base.nombre_extraits():
+        print(f"🔄 Reprise du traitement : {base.nombre_extraits()} congrès déjà traités.")
+    versions = Rafraichissement("4", actif=rafraichir)
+    afficher_etat_blocs(base)
+
+    with EcrivainFlux(OUTPUT_FILE) as sortie:
+        if reessayer:
+            client = AsyncOpenAI(api_key=secret_key, max_retries=0)
+            async with PlanificateurGPT(client, MODELE) as planificateur:
+                await reessayer_echecs(base, planificateur)
+            planificateur.afficher_stats()
+            publier_extraits(base, sortie)
+        elif mode_lot:
+            traiter_par_lot(congres_data, base, traites, OpenAI(api_key=secret_key))
+            publier_extraits(base, sortie)
+        else:
+            # Les congrès déjà acquis partent tout de suite vers l'étape 5, les nouveaux au fil de l'eau
+            if not rafraichir:
+                publier_extraits(base, sortie)
+            # Initialisation du client OpenAI (les réessais sont gérés par le planificateur)
+            client = AsyncOpenAI(api_key=secret_key, max_retries=0)
+            async with PlanificateurGPT(client, MODELE) as planificateur:
+                await traiter_congres(congres_data, base, sortie, traites, planificateur, versions)
+            planificateur.afficher_stats()
+            if rafraichir:
+                # Congrès de la base absents de l'entrée : conservés tels quels, comme hors rafraîchissement
+                publier_extraits(base, sortie, sauf=traites)
 
-# Sauvegarde finale
-with open(OUTPUT_FILE, "w", encoding="utf-8") as output_file:
-    json.dump(resultats, output_file, indent=4, ensure_ascii=False)
+    print(f"\n✅ Extraction terminée ({sortie.nombre} congrès). Résultats sauvegardés dans '{OUTPUT_FILE}'.")
+    print(f"⚡ Blocs : {statistiques_blocs['gpt']} envoyés à GPT, "
+          f"{statistiques_blocs['regex']} résolus uniquement par motifs locaux.")
+    versions.afficher_rapport()
+    cache_gpt.afficher_stats()
+    if obtenir_cache() is not None:
+        obtenir_cache().afficher_stats()
 
-print(f"\n✅ Extraction terminée. Résultats sauvegardés dans '{OUTPUT_FILE}'.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extraction des informations des congrès avec GPT.")
+    parser.add_argument("--lot", action="store_true",
+                        help="Passe par la Batch API (moins cher, résultats différés)")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Relance uniquement les blocs en échec de tous les congrès déjà traités")
+    parser.add_argument("--suivre", action="store_true",
+                        help="Lit les liens au fil de l'étape 3 au lieu d'attendre sa fin")
+    parser.add_argument("--rafraichir", action="store_true",
+                        help="Revérifie les congrès déjà extraits et ne réextrait que les pages modifiées")
+    args = parser.parse_args()
+    if args.rafraichir and (args.lot or args.retry_failed):
+        parser.error("--rafraichir ne se combine pas avec --lot ni --retry-failed")
+    asyncio.run(main(mode_lot=args.lot, reessayer=args.retry_failed, suivre=args.suivre, rafraichir=args.rafraichir))
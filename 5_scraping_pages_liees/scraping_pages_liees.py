@@ -1,38 +1,176 @@
+import argparse
 import json
 import requests
 import time
 import os
 import re
-from urllib.parse import urlparse, urljoin
+import sys
+import threading
+from collections import Counter
+from urllib.parse import unquote, urlparse, urljoin
 from bs4 import BeautifulSoup
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from outils.base_resultats import obtenir_base
+from outils.cache_http import obtenir_cache
+from outils.empreintes import DetecteurDoublons, simhash
+from outils.extraction_contenu import extraire_contenu_principal
+from outils.flux import EcrivainFlux, lire_flux
+from outils.frontiere import Frontiere
+from outils.politesse import BudgetDomaine, PolitesseAdaptative, delai_retry_after
+from outils.rafraichissement import Rafraichissement
+from outils.recuperation import HEADERS, FichierRefuse, telecharger, telecharger_en_flux
+from outils.urls import canoniser, cle_url
+from outils.visites import RegistreVisites
 
 # ===========================
 # 📂 Chemins et Paramètres
 # ===========================
-INPUT_FILE = "4_extraction_gpt/congres_enrichis.json"
+INPUT_FILE = "4_extraction_gpt/congres_enrichis.jsonl"
 OUTPUT_DIR = "5_scraping_pages_liees"
+OUTPUT_FILE = os.path.join(OUTPUT_DIR, "congres_enrichis_avec_pages.jsonl")
 LOG_FILE = os.path.join(OUTPUT_DIR, "pages_liees_errors.log")
+VISITES_FILE = os.path.join(OUTPUT_DIR, "pages_visitees.sqlite")
+CRAWL_TERMINE = ".crawl_termine"  # Posé dans le dossier d'un domaine dès que son crawl est fini
 
 TIMEOUT = 15
-SLEEP_TIME = 2
-MAX_PAGES = 300
+SLEEP_TIME = 2  # Délai initial entre deux requêtes vers un même hôte, ajusté ensuite à sa vitesse
+MAX_PAGES = 300  # Pages pertinentes conservées par domaine
+
+# ⏱️ Budget de chaque domaine : pages récupérées (pertinentes ou non) et durée du crawl
+PAGES_MAX_DOMAINE = 1000
+DUREE_MAX_DOMAINE = 15 * 60
+BUDGETS_DOMAINES = {}  # Exceptions par domaine, ex. {"www.univ-exemple.fr": {"pages": 3000, "duree": 3600}}
 MAX_CONTENT = 10000
 
+# 📥 Fichiers liés : taille maximale et types de contenu acceptés
+TAILLE_MAX_FICHIER = 50 * 1024 * 1024
+TYPES_FICHIERS = {
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "text/plain",
+    "application/octet-stream",
+    "binary/octet-stream",
+    "application/zip",
+    "application/x-zip-compressed",
+}
+MANIFESTE = "manifeste_fichiers.json"  # Ancien manifeste par domaine, importé dans la base des résultats
+
+# 🖥️ Pool de navigateurs : nombre de workers et recyclage après K pages
+NB_NAVIGATEURS = 4
+PAGES_PAR_NAVIGATEUR = 100
+
+# ⏱️ Attente adaptative : document prêt puis réseau calme, bornée
+DELAI_CHARGEMENT_MAX = 10
+DUREE_RESEAU_CALME = 0.5
+
+# 🧪 Détection des pages qui ont besoin du rendu JavaScript
+TEXTE_MIN_STATIQUE = 200
+CONTENEURS_SPA = ["root", "app", "__next", "__nuxt", "___gatsby"]
+MARQUEURS_SPA = ["ng-version", "data-reactroot", "window.__NUXT__", "ng-app"]
+
 # 🗂️ Mots-clés pour filtrer les pages pertinentes
 MOTS_CLES = [
     "congre", "congres", "congress", "congresse", "congresses",
     "2025", "2026", "2027", "event", "events", "planning"
 ]
 
+# 🧭 Score des liens avant téléchargement (les plus prometteurs d'abord)
+POIDS_URL = 4           # Mot-clé dans le chemin du lien
+POIDS_ANCRE = 3         # Mot-clé dans le texte du lien
+POIDS_PARENT = 2        # Lien trouvé sur une page pertinente
+POIDS_VOISINS = 3       # Part de pages pertinentes dans le même dossier
+POIDS_PROFONDEUR = 1    # Pénalité par clic depuis la page du congrès
+VOISINS_MIN = 2         # Pages du dossier à avoir vues avant d'en tenir compte
+SCORE_MIN = -2          # En dessous, le lien n'est jamais téléchargé
+
+EXTENSIONS_IGNOREES = re.compile(
+    r"\.(jpg|jpeg|png|gif|svg|webp|ico|css|js|json|xml|rss|zip|rar|gz|mp3|mp4|avi|mov|pdf|docx|pptx|txt)$", re.IGNORECASE
+)
+SEGMENTS_HORS_SUJET = re.compile(
+    r"(?:^|[/_\-.?=&])(login|logout|signin|sign-in|connexion|deconnexion|register|account|compte|"
+    r"cart|panier|checkout|privacy|confidentialite|cookies?|mentions-legales|legal|terms|cgu|cgv|"
+    r"wp-admin|wp-login|feed|share|print|newsletter|search|recherche)(?:$|[/_\-.?=&])",
+    re.IGNORECASE
+)
+
 # ===========================
 # 🖥️ Initialisation Selenium
 # ===========================
-options = webdriver.ChromeOptions()
-options.add_argument('--headless')
-options.add_argument('--disable-dev-shm-usage')
-options.add_argument('--no-sandbox')
-driver = webdriver.Chrome(options=options)
+def creer_driver():
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--no-sandbox')
+    # driver.get rend la main dès le DOM prêt ; la suite est gérée par attendre_chargement
+    options.page_load_strategy = "eager"
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(TIMEOUT)
+    return driver
+
+def attendre_chargement(driver, delai_max=DELAI_CHARGEMENT_MAX):
+    """Rend la main dès que le document est prêt et que plus aucune ressource n'arrive."""
+    fin = time.monotonic() + delai_max
+    try:
+        WebDriverWait(driver, delai_max, poll_frequency=0.1).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except TimeoutException:
+        return
+
+    nb_ressources = -1
+    stable_depuis = time.monotonic()
+    while time.monotonic() < fin:
+        n = driver.execute_script("return performance.getEntriesByType('resource').length")
+        maintenant = time.monotonic()
+        if n != nb_ressources:
+            nb_ressources = n
+            stable_depuis = maintenant
+        elif maintenant - stable_depuis >= DUREE_RESEAU_CALME:
+            return
+        time.sleep(0.1)
+
+class NavigateurRecyclable:
+    """Driver Chrome propre à un worker, recréé après K pages ou après un crash."""
+
+    def __init__(self, pages_max=PAGES_PAR_NAVIGATEUR):
+        self.pages_max = pages_max
+        self.driver = None
+        self.pages = 0
+
+    def recycler(self):
+        self.fermer()
+        self.driver = creer_driver()
+        self.pages = 0
+
+    def charger(self, url):
+        """Charge une page et retourne le driver prêt à être lu."""
+        if self.driver is None or self.pages >= self.pages_max:
+            self.recycler()
+        try:
+            self.driver.get(url)
+            self.pages += 1
+            # Le navigateur peut aussi planter pendant l'attente (execute_script)
+            attendre_chargement(self.driver)
+        except TimeoutException:
+            raise
+        except WebDriverException:
+            # Navigateur planté ou session perdue : on repart d'un driver neuf
+            self.recycler()
+            raise
+        return self.driver
+
+    def fermer(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            self.driver = None
 
 # ===========================
 # 📂 Gestion des dossiers
@@ -46,25 +184,127 @@ def creer_dossier_domaine(domaine):
 # ===========================
 # 📝 Gestion des logs
 # ===========================
+_verrou_log = threading.Lock()
+_verrou_stats = threading.Lock()
+
 def log_erreur(message):
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
+    with _verrou_log, open(LOG_FILE, "a", encoding="utf-8") as f:
         f.write(f"{message}\n")
     print(f"❌ {message}")
 
+# ===========================
+# 🐢 Politesse et versions des pages
+# ===========================
+def lire_robots(url):
+    """Contenu du robots.txt d'un hôte (via le cache HTTP), ou None."""
+    try:
+        return telecharger(url, timeout=TIMEOUT).text
+    except requests.RequestException:
+        return None
+
+# Politesse : délai propre à chaque hôte, adapté à ses temps de réponse, à ses erreurs et à son robots.txt
+limiteur = PolitesseAdaptative(SLEEP_TIME, lire_robots, agent=HEADERS["User-Agent"])
+
+def signaler_echec(url, debut, erreur):
+    """Transmet au limiteur une requête en échec : 429/503 et erreurs serveur ralentissent l'hôte."""
+    reponse = getattr(erreur, "response", None)
+    statut = reponse.status_code if reponse is not None else None
+    limiteur.signaler(
+        url, time.monotonic() - debut, statut=statut,
+        erreur=statut is None or statut >= 500,
+        retry_after=delai_retry_after(reponse.headers.get("Retry-After")) if reponse is not None else None,
+    )
+
+# Versions des pages déjà crawlées (créé au lancement, actif en mode --rafraichir)
+_versions = None
+
 # ===========================
 # 📂 Gestion des pages visitées
 # ===========================
+_registre_visites = None
+_verrou_registre = threading.Lock()
+
 def charger_pages_visitees(domaine):
-    path = os.path.join(OUTPUT_DIR, domaine, "pages_visitées.json")
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            return set(json.load(f))
-    return set()
+    """Pages visitées du domaine, lues et écrites directement dans la base SQLite partagée."""
+    global _registre_visites
+    with _verrou_registre:
+        if _registre_visites is None:
+            _registre_visites = RegistreVisites(VISITES_FILE)
+
+    # Reprise d'un ancien pages_visitées.json, importé une seule fois puis mis de côté
+    ancien = os.path.join(OUTPUT_DIR, domaine, "pages_visitées.json")
+    if os.path.exists(ancien):
+        with open(ancien, "r", encoding="utf-8") as f:
+            _registre_visites.ajouter(domaine, [cle_url(page) for page in json.load(f)])
+        os.replace(ancien, ancien + ".migré")
+        print(f"📦 {ancien} importé dans {VISITES_FILE}")
+    return _registre_visites.domaine(domaine)
+
+# ===========================
+# ⚡ Récupération statique d'abord, navigateur en secours
+# ===========================
+def necessite_javascript(html, soup):
+    """Indique si une page récupérée en HTTP simple doit être rendue par le navigateur."""
+    corps = soup.body
+    if corps is None:
+        return True
+
+    # Texte visible hors scripts/styles et hors <noscript>
+    visible = BeautifulSoup(str(corps), "html.parser")
+    for balise in visible(["script", "style", "template", "noscript"]):
+        balise.decompose()
+    texte = visible.get_text(" ", strip=True)
+    if len(texte) < TEXTE_MIN_STATIQUE:
+        return True
+
+    # Contenu présent uniquement dans <noscript>
+    texte_noscript = " ".join(n.get_text(" ", strip=True) for n in corps.find_all("noscript"))
+    if len(texte_noscript) >= len(texte):
+        return True
+
+    # Conteneur d'application monopage resté vide côté serveur
+    for identifiant in CONTENEURS_SPA:
+        conteneur = soup.find(id=identifiant)
+        if conteneur is not None and not conteneur.get_text(strip=True):
+            return True
+    return any(marqueur in html for marqueur in MARQUEURS_SPA) and len(texte) < 2 * TEXTE_MIN_STATIQUE
+
+def recuperer_soupe(page_url, navigateur, statistiques, response):
+    """Analyse la réponse du GET HTTP simple et ne passe par Selenium que si la page l'exige (ou si le GET a échoué)."""
+    if response is not None and response.status_code >= 400:
+        # Lien mort ou erreur serveur : un rendu complet dans le navigateur n'y changerait rien
+        response.raise_for_status()
+    if response is not None and "html" in response.headers.get("Content-Type", ""):
+        soup = BeautifulSoup(response.text, "html.parser")
+        if not necessite_javascript(response.text, soup):
+            statistiques["statique"] += 1
+            return soup
+
+    limiteur.attendre(page_url)
+    debut = time.monotonic()
+    try:
+        driver = navigateur.charger(page_url)
+    except WebDriverException as e:
+        signaler_echec(page_url, debut, e)
+        raise
+    limiteur.signaler(page_url, time.monotonic() - debut)
+    statistiques["navigateur"] += 1
+    return BeautifulSoup(driver.page_source, "html.parser")
 
-def sauvegarder_pages_visitees(domaine, pages):
-    path = os.path.join(OUTPUT_DIR, domaine, "pages_visitées.json")
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(list(pages), f, indent=4, ensure_ascii=False)
+def afficher_resume(titre, statistiques):
+    total = statistiques["statique"] + statistiques["navigateur"] + statistiques["inchangees"]
+    print(f"📊 {titre} : {total} pages récupérées — "
+          f"{statistiques['statique']} en HTTP simple, {statistiques['navigateur']} via le navigateur"
+          + (f", {statistiques['inchangees']} inchangées depuis le dernier crawl" if statistiques["inchangees"] else ""))
+    if total:
+        print(f"🎯 {statistiques['pertinentes']} pages pertinentes sur {total} récupérées "
+              f"({statistiques['pertinentes'] / total:.0%}), "
+              f"{statistiques['liens_ecartes']} liens écartés sans téléchargement")
+    if statistiques["budgets_epuises"]:
+        print(f"⏱️ {statistiques['budgets_epuises']} domaines arrêtés par leur budget de pages ou de temps")
+    if statistiques["variantes_url"] or statistiques["doublons"]:
+        print(f"♻️ {statistiques['variantes_url']} variantes d'URL fusionnées avant téléchargement, "
+              f"{statistiques['doublons']} pages en double ni stockées ni explorées")
 
 # ===========================
 # 📍 Filtre URL et titres avec mots-clés
@@ -75,10 +315,67 @@ def contient_mot_cle(texte):
     texte = texte.lower()
     return any(mot in texte for mot in MOTS_CLES)
 
+def score_lien(candidat, frontiere):
+    """Estime l'intérêt d'un lien avant de le récupérer ; None s'il est clairement hors sujet."""
+    if candidat["profondeur"] == 0:
+        return float("inf")
+
+    url = urlparse(candidat["url"])
+    chemin = url.path + ("?" + url.query if url.query else "")
+    if EXTENSIONS_IGNOREES.search(url.path) or SEGMENTS_HORS_SUJET.search(chemin):
+        return None
+
+    # Le domaine est exclu : il contient souvent « congress » pour toutes les pages
+    score = -POIDS_PROFONDEUR * candidat["profondeur"]
+    if contient_mot_cle(chemin):
+        score += POIDS_URL
+    if any(contient_mot_cle(ancre) for ancre in candidat["ancres"]):
+        score += POIDS_ANCRE
+    if candidat["parent_pertinent"]:
+        score += POIDS_PARENT
+
+    pertinentes, total = frontiere.voisins(candidat["url"])
+    if total >= VOISINS_MIN:
+        score += POIDS_VOISINS * (2 * pertinentes / total - 1)
+    return score
+
 # ===========================
 # 📥 Téléchargement de fichiers (Sans Images)
 # ===========================
-def telecharger_fichier(url, dossier):
+_verrou_fichiers = threading.RLock()
+
+def importer_manifestes():
+    """Reprise des anciens manifeste_fichiers.json, importés une seule fois dans la base puis mis de côté."""
+    base = obtenir_base()
+    for domaine in os.listdir(OUTPUT_DIR):
+        base_path = os.path.join(OUTPUT_DIR, domaine)
+        path = os.path.join(base_path, MANIFESTE)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            manifeste = json.load(f)
+        with base.transaction():
+            for url, entree in manifeste.items():
+                base.enregistrer_fichier(domaine, url, os.path.join(base_path, "fichiers", entree["fichier"]),
+                                         entree["empreinte"], entree["taille"], entree["type"])
+        os.replace(path, path + ".migré")
+        print(f"📦 {path} importé dans {base.fichier}")
+
+def fichier_deja_stocke(empreinte, dossier):
+    """Chemin d'un fichier de même contenu déjà téléchargé, de préférence dans `dossier`."""
+    chemins = [chemin for chemin in obtenir_base().fichiers_par_empreinte(empreinte) if os.path.exists(chemin)]
+    chemins.sort(key=lambda chemin: os.path.dirname(chemin) != dossier)
+    return chemins[0] if chemins else None
+
+def nom_disponible(dossier, url, empreinte):
+    """Nom du fichier tiré de l'URL, suffixé par l'empreinte si un autre fichier le porte déjà."""
+    nom = unquote(os.path.basename(urlparse(url).path)) or "fichier"
+    if not os.path.exists(os.path.join(dossier, nom)):
+        return nom
+    racine, extension = os.path.splitext(nom)
+    return f"{racine}_{empreinte[:8]}{extension}"
+
+def telecharger_fichier(url, base_path):
     if re.search(r"\.(jpg|jpeg|png|gif|svg|webp)$", url, re.IGNORECASE):
         print(f"🚫 Ignoré (image) : {url}")
         return
@@ -88,107 +385,311 @@ def telecharger_fichier(url, dossier):
         print(f"🚫 Ignoré (pas pertinent) : {url}")
         return
 
+    # Un même fichier lié depuis plusieurs pages n'est transféré qu'une fois
+    url = canoniser(url)
+    domaine = os.path.basename(base_path)
+    if obtenir_base().fichier_telecharge(domaine, url) is not None:
+        return
+
+    dossier = os.path.join(base_path, "fichiers")
+    temporaire = os.path.join(dossier, f".telechargement_{threading.get_ident()}.tmp")
     try:
-        response = requests.get(url, timeout=TIMEOUT)
-        response.raise_for_status()
-        filename = os.path.basename(url)
-        filepath = os.path.join(dossier, filename)
-        with open(filepath, "wb") as f:
-            f.write(response.content)
-        print(f"✅ Fichier téléchargé : {filename}")
+        limiteur.attendre(url)
+        empreinte, taille, type_contenu = telecharger_en_flux(
+            url, temporaire, TAILLE_MAX_FICHIER, TYPES_FICHIERS, timeout=TIMEOUT
+        )
+    except FichierRefuse as e:
+        print(f"🚫 Ignoré ({e}) : {url}")
+        return
     except Exception as e:
         log_erreur(f"Erreur téléchargement {url}: {e}")
+        return
+
+    # Contenu identique déjà stocké : dans ce domaine on le référence, ailleurs on le lie
+    with _verrou_fichiers:
+        existant = fichier_deja_stocke(empreinte, dossier)
+        if existant and os.path.dirname(existant) == dossier:
+            os.remove(temporaire)
+            filename = os.path.basename(existant)
+            print(f"♻️ Fichier identique à {filename} : {url}")
+        else:
+            filename = nom_disponible(dossier, url, empreinte)
+            filepath = os.path.join(dossier, filename)
+            if existant:
+                try:
+                    os.link(existant, filepath)
+                    os.remove(temporaire)
+                except OSError:
+                    os.replace(temporaire, filepath)
+            else:
+                os.replace(temporaire, filepath)
+            print(f"✅ Fichier téléchargé : {filename}")
+
+        obtenir_base().enregistrer_fichier(domaine, url, os.path.join(dossier, filename),
+                                           empreinte, taille, type_contenu)
 
 # ===========================
 # 🌐 Scraping complet d'un domaine
 # ===========================
-def collecter_pages(url):
+def recuperer_version(page_url):
+    """GET HTTP simple comparé à la dernière version crawlée : (état, réponse, précédente), ou None.
+
+    None (le navigateur prendra le relais) seulement si le serveur n'a pas répondu ;
+    un statut d'erreur (404, 410, 500…) est relevé : la page est sautée.
+    """
+    limiteur.attendre(page_url)
+    debut = time.monotonic()
+    try:
+        version = _versions.recuperer(page_url, TIMEOUT)
+    except requests.RequestException as e:
+        signaler_echec(page_url, debut, e)
+        if getattr(e, "response", None) is not None:
+            raise
+        return None
+    # Une réponse servie par le cache ne dit rien de la vitesse du serveur
+    if not getattr(version[1], "depuis_cache", False):
+        limiteur.signaler(page_url, time.monotonic() - debut, statut=version[1].status_code)
+    return version
+
+def analyser_page(page_url, soup, domaine):
+    """Résumé réutilisable d'une page fraîchement récupérée : titre, pertinence, empreinte, liens et texte."""
+    # 🚫 Supprimer les balises <img>
+    for img_tag in soup.find_all("img"):
+        img_tag.decompose()
+
+    # 📍 Filtrer pages avec mots-clés
+    title = soup.title.string if soup.title else ""
+    contenu_principal = extraire_contenu_principal(str(soup))
+    liens = []
+    for lien in soup.find_all("a", href=True):
+        href = urljoin(page_url, lien["href"])
+        if domaine in urlparse(href).netloc:
+            liens.append([href, " ".join(filter(None, [lien.get_text(" ", strip=True), lien.get("title")]))])
+    return {
+        "titre": title,
+        "pertinente": contient_mot_cle(page_url) or contient_mot_cle(title),
+        "simhash": simhash(contenu_principal) if contenu_principal.strip() else None,
+        "liens": liens,
+        # 📜 Extraire le texte
+        "contenu": soup.get_text(separator="\n", strip=True)[:MAX_CONTENT],
+    }
+
+def collecter_pages(url, navigateur, statistiques=None):
+    """Crawle le domaine de `url` ; retourne (pages pertinentes, vrai si une page est nouvelle ou modifiée)."""
     domaine = urlparse(url).netloc
     base_path = creer_dossier_domaine(domaine)
 
-    pages_visitees = charger_pages_visitees(domaine)
-    pages_a_visiter = {url}
+    # En rafraîchissement, tout le domaine est revu : chaque page est revalidée auprès du serveur
+    pages_visitees = set() if _versions.actif else charger_pages_visitees(domaine)
+    schema = urlparse(url).scheme
+    frontiere = Frontiere(score_lien, SCORE_MIN, cle=cle_url)
+    frontiere.ajouter(canoniser(url), profondeur=0)
+    doublons = DetecteurDoublons()
+    liens_bruts, cles_liens = set(), set()
     pages_scrapées = []
+    stats_domaine = Counter()
+    a_change = False
+    limites = BUDGETS_DOMAINES.get(domaine, {})
+    budget = BudgetDomaine(limites.get("pages", PAGES_MAX_DOMAINE), limites.get("duree", DUREE_MAX_DOMAINE))
 
-    while pages_a_visiter and len(pages_scrapées) < MAX_PAGES:
-        page_url = pages_a_visiter.pop()
-        if page_url in pages_visitees:
+    while len(pages_scrapées) < MAX_PAGES:
+        raison = budget.epuise()
+        if raison:
+            print(f"⏱️ Budget de {domaine} épuisé ({raison}) : crawl arrêté.")
+            stats_domaine["budgets_epuises"] += 1
+            break
+        candidat = frontiere.suivant()
+        if candidat is None:
+            break
+        page_url = candidat["url"]
+        if cle_url(page_url) in pages_visitees:
             continue
+        budget.consommer()
 
         try:
             print(f"🌐 Scraping : {page_url}")
-            driver.get(page_url)
-            time.sleep(3)
-            contenu = driver.page_source
-            soup = BeautifulSoup(contenu, "html.parser")
-
-            # 🚫 Supprimer les balises <img>
-            for img_tag in soup.find_all("img"):
-                img_tag.decompose()
-
-            # 📍 Filtrer pages avec mots-clés
-            title = soup.title.string if soup.title else ""
-            if not contient_mot_cle(page_url) and not contient_mot_cle(title):
-                print(f"🚫 Ignoré (titre/URL non pertinent) : {page_url}")
+            version = recuperer_version(page_url)
+            etat, response, precedente = version or (None, None, None)
+            if version is not None and _versions.reutilisable(etat, precedente):
+                # Page inchangée : résumé du crawl précédent, sans analyse ni navigateur
+                resume, soup = precedente["resultat"], None
+                stats_domaine["inchangees"] += 1
+            else:
+                a_change = True
+                soup = recuperer_soupe(page_url, navigateur, stats_domaine, response)
+                resume = analyser_page(page_url, soup, domaine)
+                if response is not None:
+                    _versions.confirmer(page_url, response, resume, precedente)
+            pertinente = resume["pertinente"]
+
+            # ♻️ Quasi-doublon d'une page déjà vue (version imprimable, langue miroir…) : ni stockée ni explorée
+            original = None
+            if resume["simhash"] is not None:
+                original = doublons.doublon_empreinte(resume["simhash"], page_url)
+            if original:
+                print(f"♻️ Doublon de {original} : {page_url}")
+                stats_domaine["doublons"] += 1
+                pages_visitees.add(cle_url(page_url))
                 continue
+            frontiere.noter(page_url, pertinente)
 
-            # 💾 Enregistrer HTML pertinent
-            html_filename = re.sub(r'\W+', '_', urlparse(page_url).path) or "index"
-            html_filepath = os.path.join(base_path, "pages_html", f"{html_filename}.html")
-            with open(html_filepath, "w", encoding="utf-8") as f:
-                f.write(soup.prettify())
+            # 🧭 Ajouter les liens du domaine à la frontière, notés avant tout téléchargement
+            for href, ancre in resume["liens"]:
+                liens_bruts.add(href)
+                try:
+                    href = canoniser(href, schema)
+                except ValueError:
+                    continue  # Lien mal formé : ne doit pas faire perdre le reste de la page
+                cles_liens.add(cle_url(href))
+                if cle_url(href) not in pages_visitees:
+                    frontiere.ajouter(href, candidat["profondeur"] + 1, ancre, pertinente)
 
-            # 📜 Extraire le texte
-            texte = soup.get_text(separator="\n", strip=True)
+            if not pertinente:
+                print(f"🚫 Ignoré (titre/URL non pertinent) : {page_url}")
+                pages_visitees.add(cle_url(page_url))
+                continue
+            stats_domaine["pertinentes"] += 1
 
-            # 📥 Collecter fichiers téléchargeables (hors images)
-            for lien in soup.find_all("a", href=True):
-                href = urljoin(page_url, lien["href"])
-                if href not in pages_visitees and domaine in urlparse(href).netloc:
-                    pages_a_visiter.add(href)
+            html_filepath = None
+            if soup is not None:
+                # 💾 Enregistrer HTML pertinent
+                html_filename = re.sub(r'\W+', '_', urlparse(page_url).path) or "index"
+                html_filepath = os.path.join(base_path, "pages_html", f"{html_filename}.html")
+                with open(html_filepath, "w", encoding="utf-8") as f:
+                    f.write(soup.prettify())
 
-                # Téléchargement sauf images, avec filtre mots-clés
-                if re.search(r"\.(pdf|docx|pptx|txt)$", href, re.IGNORECASE):
-                    telecharger_fichier(href, os.path.join(base_path, "fichiers"))
+                # 📥 Collecter fichiers téléchargeables (hors images), avec filtre mots-clés
+                for lien in soup.find_all("a", href=True):
+                    href = urljoin(page_url, lien["href"])
+                    if re.search(r"\.(pdf|docx|pptx|txt)$", href, re.IGNORECASE):
+                        telecharger_fichier(href, base_path)
 
+            # 🗃️ Page pertinente dans la base des résultats (le fichier HTML d'une page inchangée est conservé)
+            obtenir_base().enregistrer_page(page_url, domaine, url, resume["titre"], resume["contenu"],
+                                            resume["simhash"], html_filepath)
             pages_scrapées.append({
                 "url": page_url,
-                "titre": title,
-                "contenu": texte[:MAX_CONTENT]
+                "titre": resume["titre"],
+                "contenu": resume["contenu"]
             })
 
         except Exception as e:
             log_erreur(f"Erreur scraping {page_url}: {e}")
 
-        pages_visitees.add(page_url)
-        sauvegarder_pages_visitees(domaine, pages_visitees)
-        time.sleep(SLEEP_TIME)
+        pages_visitees.add(cle_url(page_url))
 
-    return pages_scrapées
+    # Pages pertinentes d'un crawl précédent, sautées car déjà visitées : relues depuis la base
+    deja_listees = {cle_url(page["url"]) for page in pages_scrapées}
+    for page in obtenir_base().pages_domaine(domaine):
+        if len(pages_scrapées) >= MAX_PAGES:
+            break
+        cle = cle_url(page["url"])
+        if cle in pages_visitees and cle not in deja_listees:
+            deja_listees.add(cle)
+            pages_scrapées.append({"url": page["url"], "titre": page["titre"], "contenu": page["contenu"]})
+            stats_domaine["deja_crawlees"] += 1
+
+    stats_domaine["liens_ecartes"] = frontiere.nb_rejetes
+    stats_domaine["variantes_url"] = len(liens_bruts) - len(cles_liens)
+    afficher_resume(f"Crawl de {domaine}", stats_domaine)
+    print(limiteur.resume(domaine))
+    if statistiques is not None:
+        with _verrou_stats:
+            statistiques.update(stats_domaine)
+    return pages_scrapées, a_change
+
+# ===========================
+# 👷 Workers du pool de navigateurs
+# ===========================
+_verrou_domaines = threading.Lock()
+_verrous_par_domaine = {}
+
+def verrou_domaine(domaine):
+    with _verrou_domaines:
+        return _verrous_par_domaine.setdefault(domaine, threading.Lock())
+
+def marquer_crawl_termine(domaine):
+    """Signale à l'étape 6 que le domaine peut être analysé sans attendre la fin du crawl."""
+    dossier = os.path.join(OUTPUT_DIR, domaine)
+    if domaine and os.path.isdir(dossier):
+        with open(os.path.join(dossier, CRAWL_TERMINE), "w", encoding="utf-8") as f:
+            f.write(time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+def travailleur(congres_a_crawler, verrou_entree, sortie, statistiques):
+    """Prend les congrès du flux d'entrée un par un et les crawle avec son propre navigateur."""
+    navigateur = NavigateurRecyclable()
+    try:
+        while True:
+            with verrou_entree:
+                congres = next(congres_a_crawler, None)
+            if congres is None:
+                return
+            url_principale = congres.get("lien")
+            domaine = urlparse(url_principale or "").netloc
+
+            # Un même domaine n'est jamais crawlé par deux navigateurs à la fois
+            with verrou_domaine(domaine):
+                print(f"\n🚀 Scraping des pages pour : {url_principale}")
+                a_change = True
+                try:
+                    congres["pages_liées"], a_change = collecter_pages(url_principale, navigateur, statistiques)
+                except Exception as e:
+                    log_erreur(f"Erreur crawl {url_principale}: {e}")
+                    congres["pages_liées"] = []
+                # Domaine inchangé : l'étape 6 n'a pas à le réanalyser
+                if a_change:
+                    marquer_crawl_termine(domaine)
+
+            # Le congrès part dans le flux de sortie et ne reste pas en mémoire
+            sortie.ajouter(congres)
+    finally:
+        navigateur.fermer()
 
 # ===========================
 # 💾 Fonction principale
 # ===========================
-def enrichir_congres_avec_pages():
-    with open(INPUT_FILE, "r", encoding="utf-8") as file:
-        congres_data = json.load(file)
+def enrichir_congres_avec_pages(suivre=False, rafraichir=False):
+    if not suivre and not os.path.exists(INPUT_FILE):
+        print(f"❌ Erreur : Le fichier {INPUT_FILE} n'existe pas.")
+        exit(1)
+
+    global _versions
+    _versions = Rafraichissement("5", actif=rafraichir)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    importer_manifestes()
 
-    for congres in congres_data:
-        url_principale = congres.get("lien")
-        print(f"\n🚀 Scraping des pages pour : {url_principale}")
-        pages = collecter_pages(url_principale)
-        congres["pages_liées"] = pages
+    statistiques = Counter()
+    verrou_entree = threading.Lock()
+    with EcrivainFlux(OUTPUT_FILE) as sortie:
+        congres_a_crawler = lire_flux(INPUT_FILE, suivre=suivre)
+        workers = [
+            threading.Thread(target=travailleur, args=(congres_a_crawler, verrou_entree, sortie, statistiques))
+            for _ in range(NB_NAVIGATEURS)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
 
-    # 💾 Sauvegarde finale
-    output_file = os.path.join(OUTPUT_DIR, "congres_enrichis_avec_pages.json")
-    with open(output_file, "w", encoding="utf-8") as output_file:
-        json.dump(congres_data, output_file, indent=4, ensure_ascii=False)
+    afficher_resume("Bilan du crawl", statistiques)
+    _versions.afficher_rapport()
+    if obtenir_cache() is not None:
+        obtenir_cache().afficher_stats()
+    global _registre_visites
+    if _registre_visites is not None:
+        _registre_visites.fermer()
+        _registre_visites = None
 
-    print(f"\n✅ Scraping terminé ! Résultats dans '{output_file}'.")
+    print(f"\n✅ Scraping terminé ({sortie.nombre} congrès) ! Résultats dans '{OUTPUT_FILE}'.")
 
 # ===========================
 # ▶️ Exécution
 # ===========================
 if __name__ == "__main__":
-    enrichir_congres_avec_pages()
-    driver.quit()
+    parser = argparse.ArgumentParser(description="Crawl des pages et fichiers liés à chaque congrès.")
+    parser.add_argument("--suivre", action="store_true",
+                        help="Lit les congrès au fil de l'étape 4 au lieu d'attendre sa fin")
+    parser.add_argument("--rafraichir", action="store_true",
+                        help="Revalide les pages déjà crawlées et ne réanalyse que celles qui ont changé")
+    args = parser.parse_args()
+    enrichir_congres_avec_pages(suivre=args.suivre, rafraichir=args.rafraichir)
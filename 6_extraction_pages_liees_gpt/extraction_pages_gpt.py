@@ -1,11 +1,21 @@
+import argparse
+import asyncio
 import json
 import os
-import time
 import re
-import pymupdf as fitz  # PyMuPDF
-import docx
-import pptx
-from openai import OpenAI
+import sys
+from collections import Counter
+from openai import AsyncOpenAI, OpenAI
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from outils.base_resultats import obtenir_base
+from outils.cache_gpt import CacheGPT
+from outils.documents import lire_fichiers
+from outils.empreintes import DetecteurDoublons
+from outils.extraction_contenu import extraire_contenu_principal, rapport_reduction
+from outils.lot_gpt import LotGPT
+from outils.planificateur_gpt import PlanificateurGPT
+from outils.pre_extraction import au_format_etape6, completer, necessite_gpt, pre_extraire
 
 # ===========================
 # 📂 Chemins et Paramètres
@@ -13,8 +23,13 @@ from openai import OpenAI
 INPUT_DIR = "5_scraping_pages_liees"
 OUTPUT_DIR = "6_extraction_pages_gpt"
 LOG_FILE = os.path.join(OUTPUT_DIR, "gpt_pages_errors.log")
+LOT_FILE = os.path.join(OUTPUT_DIR, "lot_en_cours.json")
 MAX_CONTENT = 10000
 
+# Modèle et version du prompt (à incrémenter à chaque modification du prompt)
+MODELE = "gpt-4"
+VERSION_PROMPT = "etape6-v1"
+
 # Mots-clés pour filtrer uniquement les pages pertinentes
 MOTS_CLES = [
     "congre", "congres", "congress", "congresse", "congresses",
@@ -24,10 +39,18 @@ MOTS_CLES = [
 # ===========================
 # 💬 Initialisation GPT
 # ===========================
-with open('key.txt', 'r') as file:
-    secret_key = file.read().strip()
+cache_gpt = CacheGPT()
+
+# Documents envoyés à GPT / résolus uniquement par les motifs locaux
+statistiques_documents = Counter()
 
-client = OpenAI(api_key=secret_key)
+def lire_cle():
+    with open('key.txt', 'r') as file:
+        return file.read().strip()
+
+def creer_client():
+    """Client OpenAI asynchrone ; les réessais sont gérés par le planificateur."""
+    return AsyncOpenAI(api_key=lire_cle(), max_retries=0)
 
 # ===========================
 # 📝 Gestion des logs
@@ -49,56 +72,24 @@ def contient_mot_cle(texte):
     return any(mot in texte for mot in MOTS_CLES)
 
 # ===========================
-# 📖 Lecture des fichiers téléchargés
+# 💬 Analyse du contenu avec GPT
 # ===========================
-def lire_fichier(filepath):
-    """Lit le contenu d’un fichier selon son type."""
-    if filepath.endswith(".pdf"):
-        return lire_pdf(filepath)
-    elif filepath.endswith(".docx"):
-        return lire_docx(filepath)
-    elif filepath.endswith(".pptx"):
-        return lire_pptx(filepath)
-    return ""
-
-def lire_pdf(filepath):
-    """Lit le contenu d’un fichier PDF."""
-    try:
-        doc = fitz.open(filepath)
-        return "\n".join([page.get_text() for page in doc])
-    except Exception as e:
-        log_erreur(f"Erreur lecture PDF {filepath}: {e}")
-        return ""
+class ReponseNonJSON(ValueError):
+    """Réponse de GPT qui n'est pas un objet JSON."""
 
-def lire_docx(filepath):
-    """Lit le contenu d’un fichier DOCX."""
-    try:
-        doc = docx.Document(filepath)
-        return "\n".join([p.text for p in doc.paragraphs])
-    except Exception as e:
-        log_erreur(f"Erreur lecture DOCX {filepath}: {e}")
-        return ""
+    def __init__(self, contenu_brut):
+        super().__init__("Réponse non JSON")
+        self.contenu_brut = contenu_brut
 
-def lire_pptx(filepath):
-    """Lit le contenu d’un fichier PPTX."""
-    try:
-        presentation = pptx.Presentation(filepath)
-        texte = ""
-        for slide in presentation.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    texte += shape.text + "\n"
-        return texte
-    except Exception as e:
-        log_erreur(f"Erreur lecture PPTX {filepath}: {e}")
-        return ""
+def analyser_reponse(resultat):
+    """Décode la réponse de GPT ; une ValueError déclenche un nouvel essai."""
+    if resultat.startswith("{") and resultat.endswith("}"):
+        return json.loads(resultat)
+    raise ReponseNonJSON(resultat)
 
-# ===========================
-# 💬 Analyse du contenu avec GPT
-# ===========================
-def analyser_contenu_avec_gpt(url, contenu):
-    """Envoie le contenu à GPT pour analyse et retourne un JSON structuré."""
-    prompt = f"""
+def construire_prompt(url, extrait):
+    """Construit le prompt d’extraction pour un extrait de page ou de fichier."""
+    return f"""
     Voici un extrait d'une page web issue de {url}. Analyse-le et retourne **uniquement** un JSON valide en français, contenant :
 
     {{
@@ -199,104 +190,253 @@ def analyser_contenu_avec_gpt(url, contenu):
     }}
 
     Extrait :
-    {contenu[:MAX_CONTENT]}
+    {extrait}
+    """
+
+async def analyser_contenu_avec_gpt(url, contenu, planificateur, groupe=""):
+    """Envoie le contenu à GPT pour analyse et retourne un JSON structuré.
+
+    Contacts, dates et lieux reconnaissables par motifs sont extraits localement ;
+    GPT n'est appelé que s'il reste des personnes, des rôles ou de quoi résumer.
     """
+    extrait = contenu[:MAX_CONTENT]
+    locale = au_format_etape6(pre_extraire(extrait))
+    if not necessite_gpt(extrait, besoin_resume=True):
+        print(f"⚡ {url} entièrement résolu localement.")
+        statistiques_documents["regex"] += 1
+        return completer({}, locale)
+    statistiques_documents["gpt"] += 1
+
+    resultat = cache_gpt.obtenir(MODELE, VERSION_PROMPT, extrait)
+    if resultat is not None:
+        print(f"💾 {url} déjà analysé (cache).")
+        return completer(resultat, locale)
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        resultat = response.choices[0].message.content.strip()
-
-        if resultat.startswith("{") and resultat.endswith("}"):
-            return json.loads(resultat)
-        else:
-            log_erreur(f"Erreur JSON GPT sur {url} : {resultat[:500]}")
-            return {"erreur": "Réponse non JSON", "contenu_brut": resultat}
+        analyse = await planificateur.soumettre(construire_prompt(url, extrait), groupe=groupe,
+                                                analyser=analyser_reponse)
+        cache_gpt.enregistrer(MODELE, VERSION_PROMPT, extrait, analyse)
+        return completer(analyse, locale)
 
+    except ReponseNonJSON as e:
+        log_erreur(f"Erreur JSON GPT sur {url} : {e.contenu_brut[:500]}")
+        return completer({"erreur": "Réponse non JSON", "contenu_brut": e.contenu_brut}, locale)
     except Exception as e:
         log_erreur(f"Erreur GPT sur {url}: {e}")
-        return {"erreur": str(e)}
+        return completer({"erreur": str(e)}, locale)
 
 # ===========================
 # 💾 Fonction principale
 # ===========================
-def analyser_toutes_pages():
-    """Parcourt toutes les pages et fichiers téléchargés et lance l'analyse GPT."""
-    for domaine in os.listdir(INPUT_DIR):
-        domaine_path = os.path.join(INPUT_DIR, domaine)
-        if not os.path.isdir(domaine_path):
+def chemins_domaine(domaine_path):
+    """Pages HTML et fichiers crawlés d'un domaine, d'après la base (le dossier pour un ancien crawl)."""
+    base = obtenir_base()
+    domaine = os.path.basename(domaine_path)
+    pages = sorted({page["chemin"] for page in base.pages_domaine(domaine) if page["chemin"]})
+    fichiers = sorted({fichier["chemin"] for fichier in base.fichiers_domaine(domaine)})
+
+    pages_dir = os.path.join(domaine_path, "pages_html")
+    if not pages and os.path.exists(pages_dir):
+        pages = [os.path.join(pages_dir, nom) for nom in sorted(os.listdir(pages_dir))]
+    fichiers_dir = os.path.join(domaine_path, "fichiers")
+    if not fichiers and os.path.exists(fichiers_dir):
+        fichiers = [os.path.join(fichiers_dir, nom) for nom in sorted(os.listdir(fichiers_dir))]
+    return [p for p in pages if os.path.exists(p)], [f for f in fichiers if os.path.exists(f)]
+
+def lister_documents(domaine_path):
+    """Retourne les pages HTML et fichiers pertinents d'un domaine : (type, nom, contenu)."""
+    documents = []
+    pages, fichiers = chemins_domaine(domaine_path)
+    doublons = DetecteurDoublons()
+
+    def est_doublon(nom, contenu):
+        original = doublons.doublon(contenu, nom)
+        if original:
+            print(f"♻️ Ignoré (doublon de {original}) : {nom}")
+            statistiques_documents["doublons"] += 1
+        return bool(original)
+
+    # ===========================
+    # 📖 Pages HTML
+    # ===========================
+    for chemin_page in pages:
+        page_file = os.path.basename(chemin_page)
+        with open(chemin_page, "r", encoding="utf-8") as f:
+            html = f.read()
+
+        # Zone principale et coordonnées seulement : menus, scripts et bannières retirés
+        contenu = extraire_contenu_principal(html)
+        rapport_reduction(page_file, html, contenu)
+
+        # Filtrage par mots-clés
+        if not contient_mot_cle(contenu) and not contient_mot_cle(page_file):
+            print(f"🚫 Ignoré (page non pertinente) : {page_file}")
             continue
+        if est_doublon(page_file, contenu):
+            continue
+        documents.append(("page_html", page_file, contenu))
+
+    # ===========================
+    # 📂 Fichiers Téléchargés
+    # ===========================
+    if fichiers:
+        chemins = []
+        for chemin in fichiers:
+            # Exclure les images
+            if re.search(r"\.(jpg|jpeg|png|gif|svg|webp)$", chemin, re.IGNORECASE):
+                print(f"🚫 Ignoré (image) : {os.path.basename(chemin)}")
+                continue
+            chemins.append(chemin)
+
+        # Lecture en parallèle, arrêtée dès que MAX_CONTENT caractères sont lus
+        for chemin, contenu, erreur in lire_fichiers(chemins, budget=MAX_CONTENT):
+            fichier = os.path.basename(chemin)
+            if erreur:
+                log_erreur(erreur)
+
+            # Filtrage par mots-clés
+            if not contient_mot_cle(contenu) and not contient_mot_cle(fichier):
+                print(f"🚫 Ignoré (fichier non pertinent) : {fichier}")
+                continue
+            if est_doublon(fichier, contenu):
+                continue
+            documents.append(("fichier", fichier, contenu))
+
+    return documents
+
+async def analyser_domaine(domaine, planificateur):
+    """Analyse en parallèle toutes les pages et fichiers d'un domaine."""
+    domaine_path = os.path.join(INPUT_DIR, domaine)
+    print(f"\n🚀 Analyse GPT pour le domaine : {domaine}")
+    documents = await asyncio.to_thread(lister_documents, domaine_path)
+
+    async def analyser(type_document, nom, contenu):
+        print(f"💬 Analyse GPT {'de la page' if type_document == 'page_html' else 'du fichier'} : {nom}")
+        resultat = await analyser_contenu_avec_gpt(nom, contenu, planificateur, groupe=domaine)
+        return {
+            "type": type_document,
+            "nom": nom,
+            "contenu": contenu[:500],
+            "analyse": resultat
+        }
+
+    analyses = await asyncio.gather(*(analyser(*document) for document in documents))
+    enregistrer_analyses(domaine, analyses)
 
-        print(f"\n🚀 Analyse GPT pour le domaine : {domaine}")
+def enregistrer_analyses(domaine, analyses):
+    """Enregistre les analyses d'un domaine dans la base et les exporte dans son *_analyses_gpt.json."""
+    obtenir_base().enregistrer_analyses(domaine, analyses)
+    output_domaine = os.path.join(OUTPUT_DIR, domaine)
+    os.makedirs(output_domaine, exist_ok=True)
+    output_file = os.path.join(output_domaine, f"{domaine}_analyses_gpt.json")
+
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(analyses, f, indent=4, ensure_ascii=False)
+
+    print(f"✅ Analyse GPT terminée pour {domaine}. Résultats dans {output_file}")
+
+def lister_domaines(selection=None):
+    """Domaines crawlés par l'étape 5, éventuellement restreints à `selection`."""
+    domaines = [d for d in os.listdir(INPUT_DIR) if os.path.isdir(os.path.join(INPUT_DIR, d))]
+    return [d for d in domaines if selection is None or d in selection]
+
+async def analyser_toutes_pages(selection=None):
+    """Parcourt tous les domaines crawlés et lance l'analyse GPT, domaines en parallèle."""
+    domaines = lister_domaines(selection)
+    async with PlanificateurGPT(creer_client(), MODELE) as planificateur:
+        await asyncio.gather(*(analyser_domaine(domaine, planificateur) for domaine in domaines))
+    planificateur.afficher_stats()
+
+# ===========================
+# 📦 Mode lot (Batch API)
+# ===========================
+def preparer_lot(selection=None):
+    """Regroupe dans un lot tous les extraits absents du cache, tous domaines confondus."""
+    demandes = {}
+    metadonnees = {"domaines": {}}
+    for domaine in lister_domaines(selection):
+        print(f"\n📦 Préparation du lot pour le domaine : {domaine}")
+        documents = []
+        for k, (type_document, nom, contenu) in enumerate(lister_documents(os.path.join(INPUT_DIR, domaine))):
+            extrait = contenu[:MAX_CONTENT]
+            documents.append({"type": type_document, "nom": nom, "extrait": extrait})
+            if necessite_gpt(extrait, besoin_resume=True) and cache_gpt.obtenir(MODELE, VERSION_PROMPT, extrait) is None:
+                demandes[f"{domaine}#{k}"] = construire_prompt(nom, extrait)
+        metadonnees["domaines"][domaine] = documents
+    return demandes, metadonnees
+
+def fusionner_lot(metadonnees, reponses, erreurs):
+    """Écrit les *_analyses_gpt.json à partir des réponses du lot et du cache."""
+    for domaine, documents in metadonnees["domaines"].items():
         analyses = []
+        for k, document in enumerate(documents):
+            cle = f"{domaine}#{k}"
+            extrait = document["extrait"]
+            locale = au_format_etape6(pre_extraire(extrait))
+            if not necessite_gpt(extrait, besoin_resume=True):
+                statistiques_documents["regex"] += 1
+                resultat = {}
+            elif cle in reponses:
+                statistiques_documents["gpt"] += 1
+                try:
+                    resultat = analyser_reponse(reponses[cle])
+                    cache_gpt.enregistrer(MODELE, VERSION_PROMPT, extrait, resultat)
+                except ReponseNonJSON as e:
+                    log_erreur(f"Erreur JSON GPT sur {document['nom']} : {e.contenu_brut[:500]}")
+                    resultat = {"erreur": "Réponse non JSON", "contenu_brut": e.contenu_brut}
+                except ValueError as e:
+                    log_erreur(f"Erreur JSON GPT sur {document['nom']} : {e}")
+                    resultat = {"erreur": str(e)}
+            else:
+                statistiques_documents["gpt"] += 1
+                resultat = cache_gpt.obtenir(MODELE, VERSION_PROMPT, extrait, compter=False)  # Déjà compté à la préparation
+                if resultat is None:
+                    log_erreur(f"Erreur GPT sur {document['nom']}: {erreurs.get(cle)}")
+                    resultat = {"erreur": str(erreurs.get(cle))}
+            analyses.append({
+                "type": document["type"],
+                "nom": document["nom"],
+                "contenu": extrait[:500],
+                "analyse": completer(resultat, locale)
+            })
+        enregistrer_analyses(domaine, analyses)
 
-        # ===========================
-        # 📖 Analyse des Pages HTML
-        # ===========================
-        pages_dir = os.path.join(domaine_path, "pages_html")
-        if os.path.exists(pages_dir):
-            for page_file in os.listdir(pages_dir):
-                with open(os.path.join(pages_dir, page_file), "r", encoding="utf-8") as f:
-                    contenu = f.read()
-
-                # Filtrage par mots-clés
-                if not contient_mot_cle(contenu) and not contient_mot_cle(page_file):
-                    print(f"🚫 Ignoré (page non pertinente) : {page_file}")
-                    continue
-
-                print(f"💬 Analyse GPT de la page : {page_file}")
-                resultat = analyser_contenu_avec_gpt(page_file, contenu)
-                analyses.append({
-                    "type": "page_html",
-                    "nom": page_file,
-                    "contenu": contenu[:500],
-                    "analyse": resultat
-                })
-
-        # ===========================
-        # 📂 Analyse des Fichiers Téléchargés
-        # ===========================
-        fichiers_dir = os.path.join(domaine_path, "fichiers")
-        if os.path.exists(fichiers_dir):
-            for fichier in os.listdir(fichiers_dir):
-                # Exclure les images
-                if re.search(r"\.(jpg|jpeg|png|gif|svg|webp)$", fichier, re.IGNORECASE):
-                    print(f"🚫 Ignoré (image) : {fichier}")
-                    continue
-
-                contenu = lire_fichier(os.path.join(fichiers_dir, fichier))
-
-                # Filtrage par mots-clés
-                if not contient_mot_cle(contenu) and not contient_mot_cle(fichier):
-                    print(f"🚫 Ignoré (fichier non pertinent) : {fichier}")
-                    continue
-
-                print(f"💬 Analyse GPT du fichier : {fichier}")
-                resultat = analyser_contenu_avec_gpt(fichier, contenu)
-                analyses.append({
-                    "type": "fichier",
-                    "nom": fichier,
-                    "contenu": contenu[:500],
-                    "analyse": resultat
-                })
-
-        # ===========================
-        # 💾 Enregistrement des Résultats
-        # ===========================
-        output_domaine = os.path.join(OUTPUT_DIR, domaine)
-        os.makedirs(output_domaine, exist_ok=True)
-        output_file = os.path.join(output_domaine, f"{domaine}_analyses_gpt.json")
-
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(analyses, f, indent=4, ensure_ascii=False)
-
-        print(f"✅ Analyse GPT terminée pour {domaine}. Résultats dans {output_file}")
+def analyser_par_lot(selection=None):
+    """Soumet (ou reprend) un lot Batch API puis fusionne ses résultats."""
+    lot = LotGPT(OpenAI(api_key=lire_cle()), MODELE, LOT_FILE)
+    etat = lot.lot_en_cours()
+    if etat is not None:
+        print(f"🔄 Reprise du lot {etat['batch_id']}...")
+    else:
+        demandes, metadonnees = preparer_lot(selection)
+        if not demandes:
+            fusionner_lot(metadonnees, {}, {})
+            return
+        etat = lot.soumettre(demandes, metadonnees)
+
+    reponses, erreurs = lot.resultats(lot.attendre(etat))
+    fusionner_lot(etat["metadonnees"], reponses, erreurs)
+    lot.terminer()
 
 # ===========================
 # ▶️ Exécution
 # ===========================
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse GPT des pages et fichiers liés aux congrès.")
+    parser.add_argument("--lot", action="store_true",
+                        help="Passe par la Batch API (moins cher, résultats différés)")
+    parser.add_argument("--domaines", nargs="+",
+                        help="N'analyse que ces domaines (utilisé par run_pipeline.py pendant le crawl)")
+    args = parser.parse_args()
+
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    analyser_toutes_pages()
+    if args.lot:
+        analyser_par_lot(args.domaines)
+    else:
+        asyncio.run(analyser_toutes_pages(args.domaines))
+    cache_gpt.afficher_stats()
+    print(f"⚡ Documents : {statistiques_documents['gpt']} envoyés à GPT, "
+          f"{statistiques_documents['regex']} résolus uniquement par motifs locaux.")
+    if statistiques_documents["doublons"]:
+        print(f"♻️ {statistiques_documents['doublons']} documents en double écartés : "
+              f"autant d'appels GPT évités.")
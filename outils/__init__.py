@@ -0,0 +1 @@
+"""Outils partagés entre les différentes étapes du pipeline."""
@@ -0,0 +1,135 @@
+import os
+import re
+
+import soupsieve
+from bs4 import BeautifulSoup, UnicodeDammit
+
+# Moteurs plus rapides, utilisés s'ils sont installés
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    from cssselect import GenericTranslator
+except ImportError:
+    GenericTranslator = None
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+# Moteur imposé (sinon le plus rapide disponible) : selectolax, lxml ou html.parser
+MOTEUR = os.environ.get("ANALYSE_HTML_MOTEUR", "")
+
+def moteurs_disponibles():
+    moteurs = []
+    if LexborHTMLParser is not None:
+        moteurs.append("selectolax")
+    if lxml is not None:
+        moteurs.append("lxml")
+    moteurs.append("html.parser")
+    return moteurs
+
+def moteur_par_defaut():
+    return MOTEUR or moteurs_disponibles()[0]
+
+def constructeur_bs4():
+    """Constructeur d'arbre BeautifulSoup le plus rapide disponible (lxml, sinon html.parser)."""
+    return "lxml" if lxml is not None and MOTEUR != "html.parser" else "html.parser"
+
+# ===========================
+# 🔁 CSS → XPath pour lxml
+# ===========================
+_ETAPE_CSS = re.compile(r"^([a-zA-Z][\w-]*|\*)(?::nth-of-type\((\d+)\))?$")
+
+def css_vers_xpath(selecteur):
+    """Traduit un sélecteur CSS en XPath (cssselect si installé, sinon balises, :nth-of-type, > et espace).
+
+    Comme en CSS, `div:nth-of-type(2)` désigne le deuxième div parmi ses frères, à
+    n'importe quelle profondeur, et non le deuxième div du document.
+    """
+    if GenericTranslator is not None:
+        return GenericTranslator().css_to_xpath(selecteur)
+    xpath = "descendant-or-self::*"
+    axe = "/"
+    for jeton in re.findall(r">|[^\s>]+", selecteur):
+        if jeton == ">":
+            axe = "/"
+            continue
+        etape = _ETAPE_CSS.match(jeton)
+        if etape is None:
+            raise ValueError(f"Sélecteur non pris en charge sans cssselect : {selecteur}")
+        balise, rang = etape.groups()
+        if balise == "*" and rang:
+            raise ValueError(f"Sélecteur non pris en charge sans cssselect : {selecteur}")
+        xpath += axe + balise + (f"[{rang}]" if rang else "")
+        axe = "//"
+    return xpath
+
+def en_utf8(html):
+    """Document en octets UTF-8 : lxml suppose sinon du latin-1 quand la page ne déclare pas son encodage."""
+    if isinstance(html, str):
+        return html.encode("utf-8")
+    try:
+        html.decode("utf-8")
+        return html
+    except UnicodeDecodeError:
+        return UnicodeDammit(html, is_html=True).unicode_markup.encode("utf-8")
+
+# ===========================
+# 🧭 Table de sélecteurs compilée
+# ===========================
+class Selecteurs:
+    """Table {clé: sélecteur CSS} compilée une fois, évaluée sur un document analysé une seule fois.
+
+    `extraire(html)` retourne {clé: [textes des éléments trouvés]}, dans l'ordre du document.
+    """
+
+    def __init__(self, table, moteur=None):
+        self.table = dict(table)
+        self.moteur = moteur or moteur_par_defaut()
+        if self.moteur == "lxml":
+            # Textes visibles, comme get_text de BeautifulSoup (scripts et styles exclus)
+            self._textes = etree.XPath(".//text()[not(parent::script or parent::style)]")
+            self._xpaths = {cle: etree.XPath(css_vers_xpath(css)) for cle, css in self.table.items()}
+        elif self.moteur == "html.parser":
+            # Un seul parcours de l'arbre pour la liste complète, puis attribution de chaque élément trouvé
+            self._union = soupsieve.compile(", ".join(self.table.values()))
+            self._unitaires = {cle: soupsieve.compile(css) for cle, css in self.table.items()}
+        elif self.moteur != "selectolax":
+            raise ValueError(f"Moteur d'analyse HTML inconnu : {self.moteur}")
+
+    def extraire(self, html):
+        if not html.strip():
+            return {cle: [] for cle in self.table}
+        if self.moteur == "lxml":
+            try:
+                racine = lxml.html.document_fromstring(en_utf8(html), parser=lxml.html.HTMLParser(encoding="utf-8"))
+            except etree.ParserError:
+                # Aucun élément (page réduite à un commentaire…) : rien à extraire
+                return {cle: [] for cle in self.table}
+            return {
+                cle: ["".join(t.strip() for t in self._textes(element)) for element in xpath(racine)]
+                for cle, xpath in self._xpaths.items()
+            }
+        if self.moteur == "selectolax":
+            arbre = LexborHTMLParser(en_utf8(html).decode("utf-8"))
+            return {
+                cle: [noeud.text(deep=True, separator="", strip=True) for noeud in arbre.css(css)]
+                for cle, css in self.table.items()
+            }
+
+        soup = BeautifulSoup(html, "html.parser")
+        trouves = {cle: [] for cle in self.table}
+        for element in self._union.select(soup):
+            texte = element.get_text(strip=True)
+            for cle, selecteur in self._unitaires.items():
+                if selecteur.match(element):
+                    trouves[cle].append(texte)
+        return trouves
@@ -0,0 +1,399 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+BASE_FILE = os.environ.get("BASE_RESULTATS_FICHIER", "resultats.sqlite")
+
+# Attente maximale (secondes) d'un verrou d'écriture tenu par une autre étape
+DELAI_VERROU = 120
+TAILLE_LOT_LECTURE = 500
+
+# Colonnes JSON, décodées à la lecture et à l'export
+COLONNES_JSON = {"donnees", "annuaire", "extraction", "resultat", "analyse"}
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS societes (
+        cle TEXT PRIMARY KEY,
+        organisation TEXT,
+        abreviation TEXT,
+        donnees TEXT,
+        maj_le REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS congres (
+        lien TEXT PRIMARY KEY,
+        lien_source TEXT,
+        domaine TEXT,
+        annuaire TEXT,
+        extraction TEXT,
+        maj_le REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_congres_domaine ON congres(domaine)",
+    "CREATE INDEX IF NOT EXISTS idx_congres_source ON congres(lien_source)",
+    """
+    CREATE TABLE IF NOT EXISTS pages (
+        url TEXT PRIMARY KEY,
+        domaine TEXT,
+        lien_congres TEXT,
+        titre TEXT,
+        contenu TEXT,
+        empreinte TEXT,
+        simhash TEXT,
+        chemin TEXT,
+        maj_le REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_pages_domaine ON pages(domaine)",
+    "CREATE INDEX IF NOT EXISTS idx_pages_empreinte ON pages(empreinte)",
+    """
+    CREATE TABLE IF NOT EXISTS fichiers (
+        domaine TEXT,
+        url TEXT,
+        chemin TEXT,
+        empreinte TEXT,
+        taille INTEGER,
+        type TEXT,
+        maj_le REAL,
+        PRIMARY KEY (domaine, url)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_fichiers_url ON fichiers(url)",
+    "CREATE INDEX IF NOT EXISTS idx_fichiers_empreinte ON fichiers(empreinte)",
+    """
+    CREATE TABLE IF NOT EXISTS blocs (
+        lien TEXT,
+        empreinte TEXT,
+        rang INTEGER,
+        etat TEXT,
+        resultat TEXT,
+        erreur TEXT,
+        texte TEXT,
+        maj_le REAL,
+        PRIMARY KEY (lien, empreinte)
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_blocs_etat ON blocs(etat)",
+    """
+    CREATE TABLE IF NOT EXISTS extractions (
+        domaine TEXT,
+        type TEXT,
+        nom TEXT,
+        contenu TEXT,
+        analyse TEXT,
+        maj_le REAL,
+        PRIMARY KEY (domaine, type, nom)
+    ) WITHOUT ROWID
+    """,
+]
+
+TABLES = ["societes", "congres", "pages", "fichiers", "blocs", "extractions"]
+
+def _json(valeur):
+    return json.dumps(valeur, ensure_ascii=False) if valeur is not None else None
+
+def _ligne(curseur, ligne):
+    """Ligne SQLite en dict, colonnes JSON décodées."""
+    return {
+        colonne[0]: json.loads(valeur) if colonne[0] in COLONNES_JSON and valeur is not None else valeur
+        for colonne, valeur in zip(curseur.description, ligne)
+    }
+
+def empreinte_texte(texte):
+    return hashlib.sha256(texte.encode("utf-8")).hexdigest()
+
+# ===========================
+# 🗃️ Base des résultats du pipeline
+# ===========================
+class BaseResultats:
+    """Sociétés, congrès, pages, fichiers, blocs GPT et extractions dans une seule base SQLite.
+
+    Chaque écriture est un upsert validé dans sa propre transaction (ou groupé avec
+    `transaction()`) : les étapes interrogent la base au lieu de relire des JSON entiers.
+    """
+
+    def __init__(self, fichier=BASE_FILE):
+        self.fichier = fichier
+        self._verrou = threading.RLock()
+        # Les étapes 4, 5 et 6 écrivent en même temps depuis des processus distincts
+        self._db = sqlite3.connect(fichier, timeout=DELAI_VERROU, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._profondeur = 0
+        with self.transaction():
+            for instruction in SCHEMA:
+                self._db.execute(instruction)
+
+    @contextmanager
+    def transaction(self):
+        """Regroupe plusieurs écritures : tout est validé ensemble, ou rien en cas d'erreur."""
+        with self._verrou:
+            if self._profondeur == 0:
+                self._db.execute("BEGIN IMMEDIATE")
+            self._profondeur += 1
+            try:
+                yield self._db
+            except BaseException:
+                self._profondeur -= 1
+                if self._profondeur == 0:
+                    self._db.execute("ROLLBACK")
+                raise
+            self._profondeur -= 1
+            if self._profondeur == 0:
+                self._db.execute("COMMIT")
+
+    def _lire(self, requete, parametres=()):
+        with self._verrou:
+            curseur = self._db.execute(requete, parametres)
+            return [_ligne(curseur, ligne) for ligne in curseur.fetchall()]
+
+    # ----- Étape 1 : sociétés -----
+    def enregistrer_societes(self, societes, cle):
+        """Upsert des sociétés ; `cle(societe)` donne leur identifiant (nom ou abréviation normalisés)."""
+        maintenant = time.time()
+        with self.transaction() as db:
+            db.executemany(
+                """INSERT INTO societes VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(cle) DO UPDATE SET organisation = excluded.organisation,
+                   abreviation = excluded.abreviation, donnees = excluded.donnees, maj_le = excluded.maj_le""",
+                ((cle(s), s.get("Organisation"), s.get("Abréviation"), _json(s), maintenant) for s in societes),
+            )
+
+    # ----- Étapes 2 et 4 : congrès -----
+    def enregistrer_annuaire(self, data):
+        """Upsert des données de l'annuaire (étape 2) ; le site officiel sert de clé quand il est connu."""
+        lien = data.get("lien", "")
+        if not lien.startswith(("http://", "https://")):
+            lien = data["lien_source"]
+        with self.transaction() as db:
+            db.execute(
+                """INSERT INTO congres (lien, lien_source, domaine, annuaire, maj_le) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(lien) DO UPDATE SET lien_source = excluded.lien_source,
+                   annuaire = excluded.annuaire, maj_le = excluded.maj_le""",
+                (lien, data.get("lien_source"), urlparse(lien).netloc, _json(data), time.time()),
+            )
+
+    def enregistrer_extraction_congres(self, lien, extraction):
+        """Upsert de l'extraction GPT d'un congrès (étape 4)."""
+        with self.transaction() as db:
+            db.execute(
+                """INSERT INTO congres (lien, domaine, extraction, maj_le) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(lien) DO UPDATE SET extraction = excluded.extraction, maj_le = excluded.maj_le""",
+                (lien, urlparse(lien).netloc, _json(extraction), time.time()),
+            )
+
+    def congres_extrait(self, lien):
+        """Vrai si l'extraction GPT de ce congrès est déjà enregistrée (recherche par clé primaire)."""
+        with self._verrou:
+            return self._db.execute(
+                "SELECT 1 FROM congres WHERE lien = ? AND extraction IS NOT NULL", (lien,)
+            ).fetchone() is not None
+
+    def extraction_congres(self, lien):
+        with self._verrou:
+            ligne = self._db.execute(
+                "SELECT extraction FROM congres WHERE lien = ? AND extraction IS NOT NULL", (lien,)
+            ).fetchone()
+        return json.loads(ligne[0]) if ligne else None
+
+    def nombre_extraits(self):
+        with self._verrou:
+            return self._db.execute("SELECT COUNT(*) FROM congres WHERE extraction IS NOT NULL").fetchone()[0]
+
+    def iterer_extractions(self):
+        """(lien, extraction) des congrès extraits, lus par lots de TAILLE_LOT_LECTURE sans tout charger."""
+        dernier = 0
+        while True:
+            with self._verrou:
+                lignes = self._db.execute(
+                    "SELECT rowid, lien, extraction FROM congres WHERE extraction IS NOT NULL AND rowid > ? "
+                    "ORDER BY rowid LIMIT ?", (dernier, TAILLE_LOT_LECTURE),
+                ).fetchall()
+            if not lignes:
+                return
+            for _, lien, extraction in lignes:
+                yield lien, json.loads(extraction)
+            dernier = lignes[-1][0]
+
+    def congres_traites(self, reprendre=True):
+        return CongresTraites(self, reprendre)
+
+    # ----- Étape 4 : blocs envoyés à GPT -----
+    def planifier_blocs(self, lien, empreintes):
+        """Blocs prévus pour un congrès : « en attente » tant qu'ils ne sont ni faits ni en échec."""
+        maintenant = time.time()
+        with self.transaction() as db:
+            db.executemany(
+                "INSERT OR IGNORE INTO blocs (lien, empreinte, etat, maj_le) VALUES (?, ?, 'en attente', ?)",
+                ((lien, empreinte, maintenant) for empreinte in empreintes),
+            )
+
+    def enregistrer_bloc(self, lien, rang, empreinte, etat, resultat=None, erreur=None, texte=None):
+        with self.transaction() as db:
+            db.execute(
+                """INSERT INTO blocs VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(lien, empreinte) DO UPDATE SET rang = excluded.rang, etat = excluded.etat,
+                   resultat = excluded.resultat, erreur = excluded.erreur, texte = excluded.texte,
+                   maj_le = excluded.maj_le""",
+                (lien, empreinte, rang, etat, _json(resultat), erreur, texte, time.time()),
+            )
+
+    def blocs(self, lien=None, etat=None):
+        """Blocs connus, éventuellement restreints à un congrès et/ou à un état."""
+        conditions, parametres = [], []
+        if lien is not None:
+            conditions.append("lien = ?")
+            parametres.append(lien)
+        if etat is not None:
+            conditions.append("etat = ?")
+            parametres.append(etat)
+        clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._lire(f"SELECT * FROM blocs{clause} ORDER BY lien, rang", parametres)
+
+    def compter_blocs(self):
+        with self._verrou:
+            return dict(self._db.execute("SELECT etat, COUNT(*) FROM blocs GROUP BY etat").fetchall())
+
+    # ----- Étape 5 : pages et fichiers -----
+    def enregistrer_page(self, url, domaine, lien_congres, titre, contenu, simhash=None, chemin=None):
+        with self.transaction() as db:
+            db.execute(
+                """INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET domaine = excluded.domaine,
+                   lien_congres = excluded.lien_congres, titre = excluded.titre, contenu = excluded.contenu,
+                   empreinte = excluded.empreinte, simhash = excluded.simhash,
+                   chemin = COALESCE(excluded.chemin, pages.chemin), maj_le = excluded.maj_le""",
+                (url, domaine, lien_congres, titre, contenu, empreinte_texte(contenu or ""),
+                 f"{simhash:016x}" if simhash is not None else None, chemin, time.time()),
+            )
+
+    def pages_domaine(self, domaine):
+        return self._lire("SELECT * FROM pages WHERE domaine = ? ORDER BY url", (domaine,))
+
+    def enregistrer_fichier(self, domaine, url, chemin, empreinte, taille, type_contenu):
+        with self.transaction() as db:
+            db.execute(
+                """INSERT INTO fichiers VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(domaine, url) DO UPDATE SET chemin = excluded.chemin,
+                   empreinte = excluded.empreinte, taille = excluded.taille, type = excluded.type,
+                   maj_le = excluded.maj_le""",
+                (domaine, url, chemin, empreinte, taille, type_contenu, time.time()),
+            )
+
+    def fichier_telecharge(self, domaine, url):
+        lignes = self._lire("SELECT * FROM fichiers WHERE domaine = ? AND url = ?", (domaine, url))
+        return lignes[0] if lignes else None
+
+    def fichiers_par_empreinte(self, empreinte):
+        """Chemins déjà stockés pour ce contenu, tous domaines confondus."""
+        with self._verrou:
+            return [chemin for (chemin,) in self._db.execute(
+                "SELECT chemin FROM fichiers WHERE empreinte = ?", (empreinte,)
+            )]
+
+    def fichiers_domaine(self, domaine):
+        return self._lire("SELECT * FROM fichiers WHERE domaine = ? ORDER BY chemin", (domaine,))
+
+    # ----- Étape 6 : analyses des pages et fichiers -----
+    def enregistrer_analyses(self, domaine, analyses):
+        """Remplace les analyses d'un domaine par celles du dernier passage."""
+        maintenant = time.time()
+        with self.transaction() as db:
+            db.execute("DELETE FROM extractions WHERE domaine = ?", (domaine,))
+            db.executemany(
+                """INSERT INTO extractions VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(domaine, type, nom) DO UPDATE SET contenu = excluded.contenu,
+                   analyse = excluded.analyse, maj_le = excluded.maj_le""",
+                ((domaine, a["type"], a["nom"], a["contenu"], _json(a["analyse"]), maintenant) for a in analyses),
+            )
+
+    # ----- Export -----
+    def exporter(self, table, domaine=None):
+        """Lignes d'une table (d'un domaine si précisé), prêtes à écrire en JSON."""
+        if table not in TABLES:
+            raise ValueError(f"Table inconnue : {table}")
+        if domaine is None:
+            return self._lire(f"SELECT * FROM {table}")
+        if table not in ("congres", "pages", "fichiers", "extractions"):
+            raise ValueError(f"La table {table} n'est pas rangée par domaine")
+        return self._lire(f"SELECT * FROM {table} WHERE domaine = ?", (domaine,))
+
+    def compter(self):
+        with self._verrou:
+            return {table: self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+
+    def fermer(self):
+        with self._verrou:
+            self._db.close()
+
+class CongresTraites:
+    """Vue qui s'utilise comme un ensemble (`in`, `add`) : congrès vus pendant ce passage et,
+    avec `reprendre`, congrès déjà extraits dans la base (vérifiés un par un, sans tout charger)."""
+
+    def __init__(self, base, reprendre=True):
+        self.base = base
+        self.reprendre = reprendre
+        self._vus = set()
+
+    def __contains__(self, lien):
+        return lien in self._vus or (self.reprendre and self.base.congres_extrait(lien))
+
+    def add(self, lien):
+        self._vus.add(lien)
+
+# ===========================
+# 🔗 Instance partagée
+# ===========================
+_base = None
+_verrou_instance = threading.Lock()
+
+def obtenir_base():
+    """Retourne la base partagée du processus."""
+    global _base
+    with _verrou_instance:
+        if _base is None:
+            _base = BaseResultats()
+    return _base
+
+# ===========================
+# ▶️ Ligne de commande
+# ===========================
+def main():
+    parser = argparse.ArgumentParser(description="Consultation et export de la base des résultats.")
+    sous_commandes = parser.add_subparsers(dest="commande", required=True)
+    sous_commandes.add_parser("stats", help="Affiche le nombre de lignes de chaque table")
+    exporter = sous_commandes.add_parser("exporter", help="Exporte une table en JSON")
+    exporter.add_argument("table", choices=TABLES)
+    exporter.add_argument("--domaine", help="N'exporte que ce domaine")
+    exporter.add_argument("--sortie", help="Fichier JSON à écrire (sortie standard par défaut)")
+    args = parser.parse_args()
+
+    base = BaseResultats()
+    if args.commande == "stats":
+        for table, nombre in base.compter().items():
+            print(f"📊 {table} : {nombre} lignes")
+    elif args.commande == "exporter":
+        try:
+            lignes = base.exporter(args.table, args.domaine)
+        except ValueError as e:
+            parser.error(str(e))
+        texte = json.dumps(lignes, indent=4, ensure_ascii=False)
+        if args.sortie:
+            with open(args.sortie, "w", encoding="utf-8") as f:
+                f.write(texte)
+            print(f"✅ {len(lignes)} lignes de {args.table} exportées dans {args.sortie}")
+        else:
+            print(texte)
+
+if __name__ == "__main__":
+    main()
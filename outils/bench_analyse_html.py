@@ -0,0 +1,79 @@
+import argparse
+import glob
+import importlib.util
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from outils.analyse_html import Selecteurs, moteurs_disponibles
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+MOTIF_PAGES = "5_scraping_pages_liees/*/pages_html/*.html"
+SCRIPT_ETAPE_2 = "2_scraping_congres/scrapping_congre_details.py"
+REPETITIONS = 3
+
+# Pages témoins ajoutées au corpus : cas où un moteur peut s'écarter de l'ancienne analyse
+PAGES_TEMOINS = [
+    # div imbriqués : :nth-of-type compte parmi les frères, pas dans tout le document
+    b"<html><body><div><div>x</div><div>y</div></div>"
+    b"<div><p><a>Lieu</a></p><p><a><span>Pays</span></a></p><p><span>fr</span></p></div>"
+    b"<div>Description</div></body></html>",
+]
+
+def selecteurs_etape_2():
+    """Table SELECTORS de l'étape 2, lue dans son script (le dossier n'est pas un paquet importable)."""
+    spec = importlib.util.spec_from_file_location("etape_2", SCRIPT_ETAPE_2)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SELECTORS
+
+def extraire_ancien(table, html):
+    """Ancienne analyse de l'étape 2 : html.parser puis un soup.select par sélecteur."""
+    soup = BeautifulSoup(html, "html.parser")
+    return {cle: [el.get_text(strip=True) for el in soup.select(css)] for cle, css in table.items()}
+
+def chronometrer(extraire, pages, repetitions):
+    """Pages analysées par seconde et résultats du dernier passage."""
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        resultats = [extraire(html) for html in pages]
+    return len(pages) * repetitions / (time.perf_counter() - debut), resultats
+
+# ===========================
+# 📊 Comparaison des moteurs sur des pages sauvegardées
+# ===========================
+def main():
+    parser = argparse.ArgumentParser(description="Mesure les pages analysées par seconde pour chaque moteur HTML.")
+    parser.add_argument("motifs", nargs="*", default=[MOTIF_PAGES], help="Motifs glob des pages HTML")
+    parser.add_argument("--repetitions", type=int, default=REPETITIONS, help="Passages sur le corpus par moteur")
+    args = parser.parse_args()
+
+    chemins = sorted({chemin for motif in args.motifs for chemin in glob.glob(motif) if os.path.isfile(chemin)})
+    if not chemins:
+        print("❌ Aucune page trouvée pour ces motifs.")
+        return
+
+    pages = list(PAGES_TEMOINS)
+    for chemin in chemins:
+        with open(chemin, "rb") as f:
+            pages.append(f.read())
+
+    table = selecteurs_etape_2()
+    reference_vitesse, reference = chronometrer(lambda html: extraire_ancien(table, html), pages, args.repetitions)
+    print(f"{'moteur':<24} {'pages/s':>10} {'gain':>7} {'écarts':>7}")
+    print(f"{'ancien (select x' + str(len(table)) + ')':<24} {reference_vitesse:>10.1f} {'1.0x':>7} {'-':>7}")
+
+    for moteur in moteurs_disponibles():
+        selecteurs = Selecteurs(table, moteur)
+        vitesse, resultats = chronometrer(selecteurs.extraire, pages, args.repetitions)
+        # Pages dont l'extraction diffère de l'ancienne (arbres différents sur du HTML mal formé)
+        ecarts = sum(1 for a, b in zip(reference, resultats) if a != b)
+        print(f"{moteur:<24} {vitesse:>10.1f} {vitesse / reference_vitesse:>6.1f}x {ecarts:>7}")
+
+    print(f"\n📊 {len(pages)} pages (dont {len(PAGES_TEMOINS)} témoins), {args.repetitions} passages par moteur")
+
+if __name__ == "__main__":
+    main()
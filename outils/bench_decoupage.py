@@ -0,0 +1,67 @@
+import argparse
+import glob
+import os
+
+from bs4 import BeautifulSoup
+
+from outils.decoupage import TAILLE_BLOC_JETONS, CHEVAUCHEMENT_JETONS, compter_jetons, decouper_en_blocs
+from outils.extraction_contenu import extraire_contenu_principal
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+MOTIF_PAGES = "5_scraping_pages_liees/*/pages_html/*.html"
+TAILLE_BLOC_FIXE = 5000  # Ancien découpage de l'étape 4, en caractères
+JETONS_PROMPT = 400  # Gabarit du prompt de l'étape 4, payé à chaque appel
+
+def decouper_fixe(texte, taille_bloc=TAILLE_BLOC_FIXE):
+    """Ancien découpage de l'étape 4 : tranches fixes de caractères."""
+    return [texte[i:i+taille_bloc] for i in range(0, len(texte), taille_bloc)]
+
+def mesurer(blocs):
+    """Nombre d'appels GPT et jetons envoyés (gabarit du prompt compris)."""
+    return len(blocs), sum(compter_jetons(bloc) + JETONS_PROMPT for bloc in blocs)
+
+# ===========================
+# 📊 Comparaison sur un corpus de pages sauvegardées
+# ===========================
+def main():
+    parser = argparse.ArgumentParser(description="Compare l'ancien découpage fixe au découpage par jetons.")
+    parser.add_argument("motifs", nargs="*", default=[MOTIF_PAGES], help="Motifs glob des pages HTML")
+    parser.add_argument("--jetons", type=int, default=TAILLE_BLOC_JETONS, help="Taille max d'un bloc (jetons)")
+    parser.add_argument("--chevauchement", type=int, default=CHEVAUCHEMENT_JETONS)
+    args = parser.parse_args()
+
+    pages = sorted({chemin for motif in args.motifs for chemin in glob.glob(motif)})
+    if not pages:
+        print("❌ Aucune page trouvée pour ces motifs.")
+        return
+
+    # Même texte brut pour les deux découpages, puis le découpage par jetons sur le contenu principal :
+    # le gain du découpage et celui de l'extraction se lisent séparément
+    variantes = ["fixe", "jetons", "jetons+extraction"]
+    totaux = {variante: [0, 0] for variante in variantes}
+    print(f"{'page':<40} " + " ".join(f"{variante:>20}" for variante in variantes))
+    for chemin in pages:
+        with open(chemin, "r", encoding="utf-8", errors="ignore") as f:
+            html = f.read()
+        brut = BeautifulSoup(html, "html.parser").get_text()
+        mesures = {
+            "fixe": mesurer(decouper_fixe(brut)),
+            "jetons": mesurer(decouper_en_blocs(brut, args.jetons, args.chevauchement)),
+            "jetons+extraction": mesurer(
+                decouper_en_blocs(extraire_contenu_principal(html), args.jetons, args.chevauchement)
+            ),
+        }
+        for variante, (appels, jetons) in mesures.items():
+            totaux[variante][0] += appels
+            totaux[variante][1] += jetons
+        nom = os.path.relpath(chemin)[-40:]
+        print(f"{nom:<40} " + " ".join(f"{f'{a} app. / {j} j.':>20}" for a, j in mesures.values()))
+
+    print(f"\n📊 {len(pages)} pages (appels GPT / jetons envoyés) :")
+    for variante, (appels, jetons) in totaux.items():
+        print(f"   {variante:<18} {appels:>6} appels {jetons:>10} jetons")
+
+if __name__ == "__main__":
+    main()
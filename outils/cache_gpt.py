@@ -0,0 +1,154 @@
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+CACHE_FILE = os.environ.get("CACHE_GPT_FICHIER", "cache_gpt.sqlite")
+
+def empreinte_bloc(bloc):
+    """Empreinte SHA-256 du texte envoyé à GPT."""
+    return hashlib.sha256(bloc.encode("utf-8")).hexdigest()
+
+# ===========================
+# 💬 Cache des extractions GPT
+# ===========================
+class CacheGPT:
+    """Résultats JSON de GPT indexés par (modèle, version du prompt, empreinte du bloc)."""
+
+    def __init__(self, fichier=CACHE_FILE):
+        self.fichier = fichier
+        self.stats = Counter()
+        self._a_sauvegarder = Counter()  # (version_prompt, hits|miss) pas encore écrits en base
+        self._verrou = threading.Lock()
+        self._db = sqlite3.connect(fichier, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS extractions (
+                modele TEXT,
+                version_prompt TEXT,
+                empreinte TEXT,
+                resultat TEXT,
+                cree_le REAL,
+                PRIMARY KEY (modele, version_prompt, empreinte)
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS compteurs (
+                version_prompt TEXT PRIMARY KEY,
+                hits INTEGER DEFAULT 0,
+                miss INTEGER DEFAULT 0
+            )
+        """)
+        self._db.commit()
+        atexit.register(self.sauvegarder_compteurs)
+
+    def _compter(self, version_prompt, cle):
+        # Compteurs gardés en mémoire : une écriture par recherche ralentirait chaque bloc
+        self.stats[cle] += 1
+        self._a_sauvegarder[(version_prompt, cle)] += 1
+
+    def sauvegarder_compteurs(self):
+        """Reporte dans la base les hits/miss accumulés depuis la dernière sauvegarde."""
+        with self._verrou:
+            if not self._a_sauvegarder:
+                return
+            for (version_prompt, cle), nombre in self._a_sauvegarder.items():
+                self._db.execute("INSERT OR IGNORE INTO compteurs (version_prompt) VALUES (?)", (version_prompt,))
+                self._db.execute(
+                    f"UPDATE compteurs SET {cle} = {cle} + ? WHERE version_prompt = ?", (nombre, version_prompt)
+                )
+            self._db.commit()
+            self._a_sauvegarder.clear()
+
+    def obtenir(self, modele, version_prompt, bloc, compter=True):
+        """Retourne le JSON déjà extrait pour ce bloc, ou None.
+
+        `compter=False` pour une relecture d'un bloc déjà compté (fusion d'un lot).
+        """
+        with self._verrou:
+            ligne = self._db.execute(
+                "SELECT resultat FROM extractions WHERE modele = ? AND version_prompt = ? AND empreinte = ?",
+                (modele, version_prompt, empreinte_bloc(bloc)),
+            ).fetchone()
+            if compter:
+                self._compter(version_prompt, "hits" if ligne else "miss")
+        return json.loads(ligne[0]) if ligne else None
+
+    def enregistrer(self, modele, version_prompt, bloc, resultat):
+        with self._verrou:
+            self._db.execute(
+                "INSERT OR REPLACE INTO extractions VALUES (?, ?, ?, ?, ?)",
+                (modele, version_prompt, empreinte_bloc(bloc), json.dumps(resultat, ensure_ascii=False), time.time()),
+            )
+            self._db.commit()
+
+    def invalider(self, version_prompt=None, modele=None):
+        """Supprime les entrées d'une version de prompt et/ou d'un modèle (tout si aucun filtre)."""
+        conditions, parametres = [], []
+        if version_prompt:
+            conditions.append("version_prompt = ?")
+            parametres.append(version_prompt)
+        if modele:
+            conditions.append("modele = ?")
+            parametres.append(modele)
+        clause = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._verrou:
+            supprimees = self._db.execute(f"DELETE FROM extractions{clause}", parametres).rowcount
+            self._db.commit()
+        return supprimees
+
+    def afficher_stats(self):
+        self.sauvegarder_compteurs()
+        total = self.stats["hits"] + self.stats["miss"]
+        if total:
+            print(f"💬 Cache GPT : {self.stats['hits']}/{total} blocs servis depuis le cache "
+                  f"({100 * self.stats['hits'] / total:.0f}%)")
+
+    def stats_globales(self):
+        """Compteurs cumulés et nombre d'entrées, par version de prompt."""
+        self.sauvegarder_compteurs()
+        with self._verrou:
+            entrees = dict(self._db.execute(
+                "SELECT version_prompt, COUNT(*) FROM extractions GROUP BY version_prompt"
+            ).fetchall())
+            compteurs = self._db.execute("SELECT version_prompt, hits, miss FROM compteurs").fetchall()
+        return [
+            {"version_prompt": version, "entrees": entrees.get(version, 0), "hits": hits, "miss": miss}
+            for version, hits, miss in compteurs
+        ]
+
+# ===========================
+# ▶️ Ligne de commande
+# ===========================
+def main():
+    parser = argparse.ArgumentParser(description="Gestion du cache des extractions GPT.")
+    sous_commandes = parser.add_subparsers(dest="commande", required=True)
+    sous_commandes.add_parser("stats", help="Affiche le taux de hit par version de prompt")
+    invalider = sous_commandes.add_parser("invalider", help="Supprime des entrées du cache")
+    invalider.add_argument("--version", help="Version du prompt à invalider (ex : etape4-v1)")
+    invalider.add_argument("--modele", help="Modèle à invalider (ex : gpt-4)")
+    invalider.add_argument("--tout", action="store_true", help="Vide entièrement le cache")
+    args = parser.parse_args()
+
+    cache = CacheGPT()
+    if args.commande == "stats":
+        for ligne in cache.stats_globales():
+            total = ligne["hits"] + ligne["miss"]
+            taux = 100 * ligne["hits"] / total if total else 0
+            print(f"📊 {ligne['version_prompt']} : {ligne['entrees']} entrées, "
+                  f"{ligne['hits']} hits / {ligne['miss']} miss ({taux:.0f}%)")
+    elif args.commande == "invalider":
+        if not (args.version or args.modele or args.tout):
+            parser.error("précisez --version, --modele ou --tout")
+        print(f"🗑️ {cache.invalider(args.version, args.modele)} entrées supprimées.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from outils.base_resultats import DELAI_VERROU
+
+# ===========================
+# 📂 Paramètres (surchargeables par variables d'environnement)
+# ===========================
+CACHE_DIR = os.environ.get("CACHE_HTTP_DOSSIER", "cache_http")
+TTL = int(os.environ.get("CACHE_HTTP_TTL", 24 * 3600))
+TAILLE_MAX = int(os.environ.get("CACHE_HTTP_TAILLE_MAX", 2 * 1024 ** 3))
+HORS_LIGNE = os.environ.get("CACHE_HTTP_HORS_LIGNE") == "1"
+DESACTIVE = os.environ.get("CACHE_HTTP_DESACTIVE") == "1"
+
+# Entêtes conservés avec la réponse (pas Content-Encoding : le corps stocké est déjà décompressé)
+ENTETES_CONSERVES = ["Content-Type", "ETag", "Last-Modified", "Cache-Control"]
+LOT_EVICTION = 100  # Entrées examinées par requête lors d'une éviction
+
+# ===========================
+# 🗄️ Cache HTTP sur disque
+# ===========================
+class CacheHTTP:
+    """Cache de réponses GET : corps adressés par contenu, index SQLite par URL.
+
+    Les entrées plus vieilles que le TTL sont revalidées avec ETag/Last-Modified,
+    et les moins récemment utilisées sont évincées au-delà de la taille maximale.
+    En mode hors ligne, seul le cache est consulté (rejeu d'un crawl précédent).
+    """
+
+    def __init__(self, dossier=CACHE_DIR, ttl=TTL, taille_max=TAILLE_MAX, hors_ligne=HORS_LIGNE):
+        self.dossier = dossier
+        self.ttl = ttl
+        self.taille_max = taille_max
+        self.hors_ligne = hors_ligne
+        self.stats = Counter()
+        self._verrou = threading.Lock()
+        os.makedirs(os.path.join(dossier, "objets"), exist_ok=True)
+        # Index partagé par les étapes lancées en parallèle : on attend le verrou plutôt que d'échouer
+        self._db = sqlite3.connect(os.path.join(dossier, "index.sqlite"), timeout=DELAI_VERROU,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS reponses (
+                url TEXT PRIMARY KEY,
+                statut INTEGER,
+                entetes TEXT,
+                empreinte TEXT,
+                taille INTEGER,
+                stocke_le REAL,
+                dernier_acces REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_acces ON reponses(dernier_acces)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_empreinte ON reponses(empreinte)")
+        # Taille totale tenue à jour à chaque écriture, partagée par les processus qui utilisent le cache
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur INTEGER)")
+        self._db.execute(
+            "INSERT OR IGNORE INTO meta SELECT 'taille_totale', COALESCE(SUM(taille), 0) FROM reponses"
+        )
+        self._db.commit()
+
+    # ----- Stockage des corps -----
+    def _chemin_objet(self, empreinte):
+        return os.path.join(self.dossier, "objets", empreinte[:2], empreinte)
+
+    def _ecrire_objet(self, contenu):
+        empreinte = hashlib.sha256(contenu).hexdigest()
+        chemin = self._chemin_objet(empreinte)
+        if not os.path.exists(chemin):
+            os.makedirs(os.path.dirname(chemin), exist_ok=True)
+            temporaire = f"{chemin}.{threading.get_ident()}.tmp"
+            with open(temporaire, "wb") as f:
+                f.write(contenu)
+            os.replace(temporaire, chemin)
+        return empreinte
+
+    # ----- Index -----
+    def _lire_entree(self, url):
+        with self._verrou:
+            ligne = self._db.execute(
+                "SELECT statut, entetes, empreinte, stocke_le FROM reponses WHERE url = ?", (url,)
+            ).fetchone()
+        if ligne is None:
+            return None
+        statut, entetes, empreinte, stocke_le = ligne
+        try:
+            with open(self._chemin_objet(empreinte), "rb") as f:
+                contenu = f.read()
+        except FileNotFoundError:
+            return None
+        return {"statut": statut, "entetes": json.loads(entetes), "contenu": contenu,
+                "empreinte": empreinte, "stocke_le": stocke_le}
+
+    def _toucher(self, url, revalide=False):
+        maintenant = time.time()
+        with self._verrou:
+            if revalide:
+                self._db.execute("UPDATE reponses SET stocke_le = ?, dernier_acces = ? WHERE url = ?",
+                                 (maintenant, maintenant, url))
+            else:
+                self._db.execute("UPDATE reponses SET dernier_acces = ? WHERE url = ?", (maintenant, url))
+            self._db.commit()
+
+    def _enregistrer(self, url, response):
+        contenu = response.content
+        empreinte = self._ecrire_objet(contenu)
+        entetes = {k: response.headers[k] for k in ENTETES_CONSERVES if k in response.headers}
+        maintenant = time.time()
+        with self._verrou:
+            # Écart de taille calculé dans la même transaction que le remplacement de l'entrée
+            self._db.execute(
+                "UPDATE meta SET valeur = valeur + ? - COALESCE((SELECT taille FROM reponses WHERE url = ?), 0) "
+                "WHERE cle = 'taille_totale'", (len(contenu), url),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO reponses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, response.status_code, json.dumps(entetes), empreinte, len(contenu), maintenant, maintenant),
+            )
+            self._db.commit()
+        self._evincer()
+        return empreinte
+
+    def _supprimer(self, url):
+        """Retire l'entrée d'une URL (le corps reste jusqu'à la prochaine éviction s'il est partagé)."""
+        with self._verrou:
+            self._db.execute(
+                "UPDATE meta SET valeur = valeur - COALESCE((SELECT taille FROM reponses WHERE url = ?), 0) "
+                "WHERE cle = 'taille_totale'", (url,),
+            )
+            self._db.execute("DELETE FROM reponses WHERE url = ?", (url,))
+            self._db.commit()
+
+    def _evincer(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de la taille maximale."""
+        with self._verrou:
+            total = self._db.execute("SELECT valeur FROM meta WHERE cle = 'taille_totale'").fetchone()[0]
+            if total <= self.taille_max:
+                return
+            orphelins = []
+            liberes = 0
+            while total - liberes > self.taille_max:
+                lot = self._db.execute(
+                    "SELECT url, empreinte, taille FROM reponses ORDER BY dernier_acces LIMIT ?", (LOT_EVICTION,)
+                ).fetchall()
+                if not lot:
+                    break
+                for url, empreinte, taille in lot:
+                    if total - liberes <= self.taille_max:
+                        break
+                    self._db.execute("DELETE FROM reponses WHERE url = ?", (url,))
+                    liberes += taille
+                    orphelins.append(empreinte)
+                    self.stats["evictions"] += 1
+            self._db.execute("UPDATE meta SET valeur = valeur - ? WHERE cle = 'taille_totale'", (liberes,))
+            for empreinte in set(orphelins):
+                encore_utilise = self._db.execute(
+                    "SELECT 1 FROM reponses WHERE empreinte = ? LIMIT 1", (empreinte,)
+                ).fetchone()
+                if not encore_utilise:
+                    try:
+                        os.remove(self._chemin_objet(empreinte))
+                    except FileNotFoundError:
+                        pass
+            self._db.commit()
+
+    # ----- API publique -----
+    def get(self, session, url, timeout, revalider=False):
+        """GET via le cache ; retourne une requests.Response (attribut `depuis_cache`).
+
+        Avec `revalider`, une entrée encore fraîche est quand même revalidée auprès du serveur.
+        """
+        entree = self._lire_entree(url)
+
+        if self.hors_ligne:
+            if entree is None:
+                self._compter("miss")
+                raise requests.ConnectionError(f"{url} absent du cache (mode hors ligne)")
+            self._compter("hits")
+            self._toucher(url)
+            return _reponse_depuis_cache(url, entree)
+
+        if entree is not None and not revalider and time.time() - entree["stocke_le"] < self._fraicheur(entree):
+            self._compter("hits")
+            self._toucher(url)
+            return _reponse_depuis_cache(url, entree)
+
+        # Requête conditionnelle si une version (expirée) est déjà en cache
+        entetes = {}
+        if entree is not None:
+            if "ETag" in entree["entetes"]:
+                entetes["If-None-Match"] = entree["entetes"]["ETag"]
+            if "Last-Modified" in entree["entetes"]:
+                entetes["If-Modified-Since"] = entree["entetes"]["Last-Modified"]
+
+        response = session.get(url, headers=entetes, timeout=timeout)
+        if response.status_code == 304 and entree is not None:
+            self._compter("revalidations")
+            self._toucher(url, revalide=True)
+            return _reponse_depuis_cache(url, entree)
+
+        self._compter("miss")
+        if response.status_code == 200:
+            if "no-store" in directives_cache(response.headers.get("Cache-Control")):
+                if entree is not None:
+                    self._supprimer(url)
+            else:
+                response.empreinte = self._enregistrer(url, response)
+        response.depuis_cache = False
+        return response
+
+    def _fraicheur(self, entree):
+        """Durée pendant laquelle une entrée est servie sans revalidation : TTL, raccourci par le serveur."""
+        directives = directives_cache(entree["entetes"].get("Cache-Control"))
+        if "no-cache" in directives:
+            return 0
+        try:
+            return min(self.ttl, int(directives["max-age"]))
+        except (KeyError, TypeError, ValueError):
+            return self.ttl
+
+    def _compter(self, cle):
+        with self._verrou:
+            self.stats[cle] += 1
+
+    def afficher_stats(self):
+        total = self.stats["hits"] + self.stats["revalidations"] + self.stats["miss"]
+        if not total:
+            return
+        taux = 100 * (self.stats["hits"] + self.stats["revalidations"]) / total
+        print(f"🗄️ Cache HTTP : {self.stats['hits']} hits, {self.stats['revalidations']} revalidations (304), "
+              f"{self.stats['miss']} miss — {taux:.0f}% servis localement")
+
+def directives_cache(valeur):
+    """Directives d'un entête Cache-Control : {"no-cache": None, "max-age": "0", ...}."""
+    directives = {}
+    for directive in (valeur or "").split(","):
+        nom, _, argument = directive.strip().partition("=")
+        if nom:
+            directives[nom.lower()] = argument.strip('"') or None
+    return directives
+
+def _reponse_depuis_cache(url, entree):
+    response = requests.Response()
+    response._content = entree["contenu"]
+    response.status_code = entree["statut"]
+    response.headers = CaseInsensitiveDict(entree["entetes"])
+    response.headers.pop("Content-Encoding", None)  # Entrées enregistrées avant qu'il ne soit écarté
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = url
+    response.depuis_cache = True
+    response.empreinte = entree["empreinte"]
+    return response
+
+# ===========================
+# 🔗 Instance partagée
+# ===========================
+_cache = None
+_verrou_instance = threading.Lock()
+
+def obtenir_cache():
+    """Retourne le cache partagé du processus, ou None s'il est désactivé."""
+    global _cache
+    if DESACTIVE:
+        return None
+    with _verrou_instance:
+        if _cache is None:
+            _cache = CacheHTTP()
+    return _cache
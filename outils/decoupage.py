@@ -0,0 +1,113 @@
+import re
+from functools import lru_cache
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+MODELE_JETONS = "gpt-4"
+TAILLE_BLOC_JETONS = 3000
+CHEVAUCHEMENT_JETONS = 100
+LONGUEUR_MAX_TITRE = 80
+
+# ===========================
+# 🔢 Comptage des jetons
+# ===========================
+@lru_cache(maxsize=None)
+def _encodeur(modele):
+    """Encodeur tiktoken du modèle, ou None si tiktoken est absent ou inutilisable."""
+    try:
+        import tiktoken
+        return tiktoken.encoding_for_model(modele)
+    except Exception:
+        return None
+
+def compter_jetons(texte, modele=MODELE_JETONS):
+    """Nombre de jetons du texte pour le modèle (≈ 4 caractères par jeton sans tiktoken)."""
+    encodeur = _encodeur(modele)
+    if encodeur is None:
+        return len(texte) // 4 + 1
+    return len(encodeur.encode(texte, disallowed_special=()))
+
+# ===========================
+# 🧱 Segmentation structurelle
+# ===========================
+def normaliser_texte(texte):
+    """Nettoie chaque ligne et réduit les suites de lignes vides à une seule."""
+    lignes = [re.sub(r"[ \t\xa0]+", " ", ligne).strip() for ligne in texte.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lignes)).strip()
+
+def est_titre(segment):
+    """Ligne courte sans ponctuation finale : probablement un titre de section."""
+    return "\n" not in segment and len(segment) <= LONGUEUR_MAX_TITRE and not segment.endswith((".", ",", ";", ":"))
+
+def _decouper_segment(segment, max_jetons, modele):
+    """Redécoupe un segment trop long : lignes, puis phrases, puis mots."""
+    for separateur in (r"\n", r"(?<=[.!?])\s+", r"\s+"):
+        morceaux = [m for m in re.split(separateur, segment) if m.strip()]
+        if len(morceaux) > 1:
+            resultat = []
+            for morceau in morceaux:
+                if compter_jetons(morceau, modele) > max_jetons:
+                    resultat.extend(_decouper_segment(morceau, max_jetons, modele))
+                else:
+                    resultat.append(morceau)
+            return resultat
+    # Dernier recours : un seul « mot » gigantesque, coupé en caractères
+    pas = max_jetons * 4
+    return [segment[i:i+pas] for i in range(0, len(segment), pas)]
+
+def segmenter(texte, max_jetons=TAILLE_BLOC_JETONS, modele=MODELE_JETONS):
+    """Découpe le texte en paragraphes (séparés par des lignes vides), chacun sous le budget."""
+    segments = []
+    for paragraphe in normaliser_texte(texte).split("\n\n"):
+        if not paragraphe.strip():
+            continue
+        if compter_jetons(paragraphe, modele) > max_jetons:
+            segments.extend(_decouper_segment(paragraphe, max_jetons, modele))
+        else:
+            segments.append(paragraphe)
+    return segments
+
+# ===========================
+# 📦 Regroupement en blocs
+# ===========================
+def decouper_en_blocs(texte, max_jetons=TAILLE_BLOC_JETONS, chevauchement=CHEVAUCHEMENT_JETONS,
+                      modele=MODELE_JETONS):
+    """Regroupe les segments en blocs d'au plus `max_jetons`, sans couper un paragraphe.
+
+    Un titre ouvre un nouveau bloc si le bloc courant est déjà à moitié plein, et
+    les derniers segments d'un bloc (jusqu'à `chevauchement` jetons) sont répétés
+    en tête du suivant pour ne pas perdre le contexte à la frontière.
+    """
+    blocs = []
+    courant, taille, nouveaux = [], 0, 0
+
+    def reprise(segments):
+        """Derniers segments (ou dernières phrases) tenant dans le chevauchement."""
+        repris, taille_reprise = [], 0
+        for segment in reversed(segments):
+            jetons = compter_jetons(segment, modele) + 1
+            if taille_reprise + jetons > chevauchement:
+                if not repris:
+                    phrases = [p for p in re.split(r"(?<=[.!?])\s+|\n", segment) if p.strip()]
+                    if len(phrases) > 1:
+                        fin, taille_fin = reprise(phrases)
+                        return ([" ".join(fin)] if fin else []), taille_fin
+                break
+            repris.insert(0, segment)
+            taille_reprise += jetons
+        return repris, taille_reprise
+
+    for segment in segmenter(texte, max_jetons - chevauchement, modele):
+        jetons = compter_jetons(segment, modele) + 1
+        if nouveaux and (taille + jetons > max_jetons or (est_titre(segment) and taille > max_jetons // 2)):
+            blocs.append("\n\n".join(courant))
+            courant, taille = reprise(courant)
+            nouveaux = 0
+        courant.append(segment)
+        taille += jetons
+        nouveaux += 1
+
+    if nouveaux:
+        blocs.append("\n\n".join(courant))
+    return blocs
@@ -0,0 +1,86 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pymupdf as fitz  # PyMuPDF
+import docx
+import pptx
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+BUDGET_CARACTERES = 10000  # Au-delà, le texte n'est de toute façon pas envoyé à GPT
+NB_PROCESSUS = os.cpu_count() or 1
+
+# ===========================
+# 📖 Lecture progressive par type de fichier
+# ===========================
+def pages_pdf(filepath):
+    """Texte d'un PDF, page par page : les pages suivantes ne sont pas chargées."""
+    with fitz.open(filepath) as doc:
+        for page in doc:
+            yield page.get_text()
+
+def paragraphes_docx(filepath):
+    """Texte d'un DOCX, paragraphe par paragraphe."""
+    for paragraphe in docx.Document(filepath).paragraphs:
+        yield paragraphe.text + "\n"
+
+def textes_pptx(filepath):
+    """Texte d'un PPTX, forme par forme et diapositive par diapositive."""
+    for slide in pptx.Presentation(filepath).slides:
+        for shape in slide.shapes:
+            if hasattr(shape, "text"):
+                yield shape.text + "\n"
+
+LECTEURS = {
+    ".pdf": pages_pdf,
+    ".docx": paragraphes_docx,
+    ".pptx": textes_pptx,
+}
+
+def lire_fichier(filepath, budget=BUDGET_CARACTERES):
+    """Lit un fichier jusqu'à `budget` caractères et retourne (chemin, texte, erreur)."""
+    lecteur = LECTEURS.get(os.path.splitext(filepath)[1].lower())
+    if lecteur is None:
+        return filepath, "", None
+
+    morceaux, taille = [], 0
+    try:
+        for morceau in lecteur(filepath):
+            morceaux.append(morceau)
+            taille += len(morceau)
+            if taille >= budget:
+                break
+    except Exception as e:
+        return filepath, "", f"Erreur lecture {os.path.splitext(filepath)[1][1:].upper()} {filepath}: {e}"
+    return filepath, "".join(morceaux)[:budget], None
+
+# ===========================
+# ⚙️ Lecture parallèle sur plusieurs cœurs
+# ===========================
+_pool = None
+_verrou_pool = threading.Lock()
+
+def pool_partage(processus=NB_PROCESSUS):
+    """Pool de processus unique : les domaines lus en même temps se partagent les mêmes cœurs."""
+    global _pool
+    with _verrou_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=processus)
+            atexit.register(_pool.shutdown)
+    return _pool
+
+def lire_fichiers(chemins, budget=BUDGET_CARACTERES, processus=NB_PROCESSUS):
+    """Lit les fichiers en parallèle dans des processus séparés, résultats dans l'ordre des chemins."""
+    chemins = list(chemins)
+    if len(chemins) <= 1 or processus <= 1:
+        for chemin in chemins:
+            yield lire_fichier(chemin, budget)
+        return
+
+    pool = pool_partage(processus)
+    taches = [pool.submit(lire_fichier, chemin, budget) for chemin in chemins]
+    for tache in taches:
+        yield tache.result()
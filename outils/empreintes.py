@@ -0,0 +1,57 @@
+import hashlib
+import re
+
+# ===========================
+# 🧬 Empreintes SimHash des contenus
+# ===========================
+BITS = 64
+TAILLE_SHINGLE = 3   # Nombre de mots par fragment comparé
+DISTANCE_MAX = 3     # Bits différents tolérés entre deux quasi-doublons
+BANDES = DISTANCE_MAX + 1  # Deux quasi-doublons partagent au moins une bande intacte
+
+def _fragments(texte):
+    mots = re.findall(r"\w+", texte.lower())
+    if len(mots) < TAILLE_SHINGLE:
+        return [" ".join(mots)] if mots else []
+    return [" ".join(mots[i:i + TAILLE_SHINGLE]) for i in range(len(mots) - TAILLE_SHINGLE + 1)]
+
+def simhash(texte):
+    """Empreinte de 64 bits : deux textes presque identiques diffèrent de peu de bits."""
+    poids = [0] * BITS
+    for fragment in _fragments(texte):
+        valeur = int.from_bytes(hashlib.blake2b(fragment.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(BITS):
+            poids[bit] += 1 if valeur >> bit & 1 else -1
+    return sum(1 << bit for bit in range(BITS) if poids[bit] > 0)
+
+def distance(a, b):
+    return bin(a ^ b).count("1")
+
+class DetecteurDoublons:
+    """Repère les contenus déjà vus à l'identique ou presque (versions imprimables, langues miroirs…)."""
+
+    def __init__(self, distance_max=DISTANCE_MAX):
+        self.distance_max = distance_max
+        self._largeur = BITS // BANDES
+        self._bandes = [{} for _ in range(BANDES)]
+
+    def _decouper(self, empreinte):
+        masque = (1 << self._largeur) - 1
+        return [(empreinte >> (i * self._largeur)) & masque for i in range(BANDES)]
+
+    def doublon(self, texte, nom):
+        """Retourne le nom du document déjà vu dont `texte` est un quasi-doublon, sinon l'enregistre."""
+        if not texte.strip():
+            return None
+        return self.doublon_empreinte(simhash(texte), nom)
+
+    def doublon_empreinte(self, empreinte, nom):
+        """Comme `doublon`, à partir d'une empreinte SimHash déjà calculée."""
+        bandes = self._decouper(empreinte)
+        for index, bande in enumerate(bandes):
+            for autre, autre_nom in self._bandes[index].get(bande, []):
+                if distance(empreinte, autre) <= self.distance_max:
+                    return autre_nom
+        for index, bande in enumerate(bandes):
+            self._bandes[index].setdefault(bande, []).append((empreinte, nom))
+        return None
@@ -0,0 +1,127 @@
+import re
+
+from bs4 import BeautifulSoup, NavigableString
+from bs4.element import CData, Comment, Doctype
+
+from outils.decoupage import compter_jetons, normaliser_texte
+from outils.pre_extraction import MOTIF_EMAIL, MOTIF_TELEPHONE
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+BALISES_SUPPRIMEES = [
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe", "object", "embed",
+    "img", "picture", "video", "audio", "form", "button", "select", "input", "textarea", "head"
+]
+BALISES_NAVIGATION = ["nav", "aside", "menu"]
+# Un <header> dans <main> ou <article> porte le titre, les dates et le lieu : seule la bannière du site est retirée
+CONTENEURS_CONTENU = ["main", "article"]
+BALISES_BLOC = [
+    "p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "tr", "table",
+    "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "address", "figcaption", "footer"
+]
+MOTIF_BOILERPLATE = re.compile(
+    r"cookie|consent|gdpr|rgpd|banner|popup|modal|newsletter|breadcrumb|share|partage|social|"
+    r"navbar|menu|sidebar|skip|advert|promo", re.IGNORECASE
+)
+MOTIF_CONTACT = re.compile(r"contact|footer|coordonn|address|adresse", re.IGNORECASE)
+TEXTE_PRINCIPAL_MIN = 200
+NOEUDS_INVISIBLES = (Comment, Doctype, CData)
+
+# ===========================
+# 🧹 Nettoyage
+# ===========================
+def _attributs(element):
+    return " ".join([element.get("id") or ""] + (element.get("class") or []))
+
+def _est_banniere(header):
+    """Vrai pour l'en-tête du site, faux pour l'en-tête d'un article ou de la zone principale."""
+    return header.get("role") == "banner" or header.find_parent(CONTENEURS_CONTENU) is None
+
+def _porte_des_coordonnees(texte):
+    return bool(MOTIF_EMAIL.search(texte) or MOTIF_TELEPHONE.search(texte))
+
+def texte_structure(element):
+    """Texte d'un élément avec une ligne vide entre blocs et ' | ' entre cellules."""
+    for chaine in list(element.find_all(string=True)):
+        if isinstance(chaine, NOEUDS_INVISIBLES):
+            chaine.extract()
+            continue
+        chaine.replace_with(NavigableString(re.sub(r"\s+", " ", chaine)))
+    for bloc in element.find_all(BALISES_BLOC):
+        bloc.insert_before("\n\n")
+        bloc.insert_after("\n\n")
+    for cellule in element.find_all(["td", "th"]):
+        cellule.insert_after(" | ")
+    for saut in element.find_all("br"):
+        saut.replace_with("\n")
+    texte = normaliser_texte(element.get_text())
+    return re.sub(r"(?: \|)+$", "", texte, flags=re.MULTILINE)
+
+def _meilleur_conteneur(racine):
+    """Conteneur au texte le plus abondant et le moins chargé en liens."""
+    meilleur, meilleur_score = racine, 0
+    for candidat in racine.find_all(["div", "section", "td"]):
+        texte = len(candidat.get_text(" ", strip=True))
+        liens = sum(len(a.get_text(" ", strip=True)) for a in candidat.find_all("a"))
+        score = texte - 2 * liens
+        if score > meilleur_score:
+            meilleur, meilleur_score = candidat, score
+    return meilleur
+
+def extraire_contenu_principal(html):
+    """Texte de la zone principale d'une page, plus les blocs contact/pied de page
+    qui portent des emails ou téléphones ; menus, bannières et scripts sont retirés."""
+    soup = BeautifulSoup(html, "html.parser")
+    for balise in soup(BALISES_SUPPRIMEES):
+        balise.decompose()
+    # Commentaires (y compris les conditionnels [if lt IE 9]), doctype et CDATA : jamais du texte visible
+    for noeud in soup.find_all(string=lambda chaine: isinstance(chaine, NOEUDS_INVISIBLES)):
+        noeud.extract()
+    corps = soup.body or soup
+
+    # Blocs de coordonnées à conserver, mis de côté avant le nettoyage
+    coordonnees = []
+    candidats = corps.find_all(["footer", "address"]) + [
+        el for el in corps.find_all(["div", "section", "p", "ul"]) if MOTIF_CONTACT.search(_attributs(el))
+    ]
+    for element in candidats:
+        if element.decomposed or not _porte_des_coordonnees(element.get_text(" ")):
+            continue
+        coordonnees.append(texte_structure(element))
+        element.decompose()
+
+    # Navigation et éléments parasites (sauf s'ils portent l'essentiel du texte)
+    longueur_totale = len(corps.get_text(" ", strip=True)) or 1
+    for element in corps.find_all(BALISES_NAVIGATION + ["footer"]):
+        if not element.decomposed:
+            element.decompose()
+    for header in corps.find_all("header"):
+        if not header.decomposed and _est_banniere(header):
+            header.decompose()
+    for element in corps.find_all(True):
+        if element.decomposed or not element.attrs:
+            continue
+        if MOTIF_BOILERPLATE.search(_attributs(element)) or element.get("role") in ("navigation", "banner", "dialog"):
+            if len(element.get_text(" ", strip=True)) < longueur_totale / 2:
+                element.decompose()
+
+    principal = corps.find("main") or corps.find(attrs={"role": "main"}) or corps.find("article")
+    if principal is None or len(principal.get_text(" ", strip=True)) < TEXTE_PRINCIPAL_MIN:
+        principal = _meilleur_conteneur(corps)
+
+    texte = texte_structure(principal)
+    for bloc in dict.fromkeys(coordonnees):
+        if bloc and bloc not in texte:
+            texte += "\n\n" + bloc
+    return texte.strip()
+
+# ===========================
+# 📊 Mesure du gain
+# ===========================
+def rapport_reduction(nom, avant, apres):
+    """Affiche et retourne la réduction de jetons entre le texte brut et le texte nettoyé."""
+    jetons_avant, jetons_apres = compter_jetons(avant), compter_jetons(apres)
+    reduction = 100 * (1 - jetons_apres / jetons_avant) if jetons_avant else 0
+    print(f"✂️ {nom} : {jetons_avant} → {jetons_apres} jetons (-{reduction:.0f}%)")
+    return jetons_avant, jetons_apres
@@ -0,0 +1,97 @@
+import json
+import os
+import threading
+import time
+
+# ===========================
+# 🌊 Flux d'enregistrements entre étapes (JSON Lines)
+# ===========================
+# Un flux est complet quand son marqueur de fin existe : une étape suivante peut
+# donc lire les enregistrements au fil de l'eau, pendant que l'étape précédente écrit.
+SUFFIXE_TERMINE = ".termine"
+SUFFIXE_PRECEDENT = ".precedent"
+ATTENTE_SUIVI = 0.5  # Secondes entre deux lectures d'un flux encore ouvert
+
+def marqueur_fin(chemin):
+    return chemin + SUFFIXE_TERMINE
+
+def est_termine(chemin):
+    return os.path.exists(marqueur_fin(chemin))
+
+def preparer_flux(chemin, garder=False):
+    """Retire un flux et son marqueur de fin avant que son étape ne le réécrive.
+
+    Avec `garder`, l'ancienne version est conservée sous `<flux>.precedent`.
+    """
+    if os.path.exists(marqueur_fin(chemin)):
+        os.remove(marqueur_fin(chemin))
+    if os.path.exists(chemin):
+        if garder:
+            os.replace(chemin, chemin + SUFFIXE_PRECEDENT)
+        else:
+            os.remove(chemin)
+
+class EcrivainFlux:
+    """Écrit des enregistrements un par un ; le marqueur de fin n'est posé qu'à une fermeture sans erreur."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.nombre = 0
+        self._verrou = threading.Lock()
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        preparer_flux(chemin)
+        self._fichier = open(chemin, "w", encoding="utf-8")
+
+    def ajouter(self, enregistrement):
+        ligne = json.dumps(enregistrement, ensure_ascii=False) + "\n"
+        with self._verrou:
+            self._fichier.write(ligne)
+            self._fichier.flush()
+            self.nombre += 1
+
+    def fermer(self, termine=True):
+        with self._verrou:
+            self._fichier.close()
+        if termine:
+            open(marqueur_fin(self.chemin), "w").close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type_exception, *exc):
+        self.fermer(termine=type_exception is None)
+
+def lire_flux(chemin, suivre=False):
+    """Enregistrements d'un flux JSON Lines, un par un (une ancienne liste .json est aussi acceptée).
+
+    Avec `suivre`, attend les enregistrements encore en cours d'écriture et ne
+    s'arrête qu'une fois le marqueur de fin posé.
+    """
+    if chemin.endswith(".json"):
+        with open(chemin, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+
+    while suivre and not os.path.exists(chemin):
+        time.sleep(ATTENTE_SUIVI)
+
+    with open(chemin, "r", encoding="utf-8") as f:
+        tampon = ""
+        fin_vue = False
+        while True:
+            ligne = f.readline()
+            if ligne:
+                tampon += ligne
+                if tampon.endswith("\n"):
+                    if tampon.strip():
+                        yield json.loads(tampon)
+                    tampon = ""
+                continue
+            # Fin de fichier : le marqueur est posé après la dernière écriture, on relit une fois
+            if not suivre or fin_vue:
+                return
+            fin_vue = est_termine(chemin)
+            if not fin_vue:
+                time.sleep(ATTENTE_SUIVI)
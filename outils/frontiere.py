@@ -0,0 +1,86 @@
+import heapq
+import itertools
+import posixpath
+from urllib.parse import urlparse
+
+# ===========================
+# 🧭 Frontière de crawl priorisée
+# ===========================
+class Frontiere:
+    """File de priorité des liens à explorer, du plus prometteur au moins prometteur.
+
+    `evaluer(candidat, frontiere)` retourne un score, ou None pour un lien à ne jamais
+    télécharger. Le score est recalculé au dépilage car la pertinence des pages
+    voisines évolue pendant le crawl. `cle(url)` regroupe les variantes d'une même page.
+    """
+
+    def __init__(self, evaluer, score_min, cle=None):
+        self.evaluer = evaluer
+        self.score_min = score_min
+        self.cle = cle or (lambda url: url)
+        self._tas = []
+        self._ordre = itertools.count()
+        self._candidats = {}
+        self._sortis = set()
+        self._rejetes = set()
+        self._voisins = {}
+
+    def ajouter(self, url, profondeur, ancre="", parent_pertinent=False):
+        """Ajoute un lien, ou enrichit le candidat si le lien a déjà été vu."""
+        cle = self.cle(url)
+        if cle in self._sortis:
+            return
+        candidat = self._candidats.get(cle)
+        if candidat is None:
+            candidat = {"url": url, "profondeur": profondeur, "ancres": [], "parent_pertinent": False}
+            self._candidats[cle] = candidat
+        candidat["profondeur"] = min(candidat["profondeur"], profondeur)
+        candidat["parent_pertinent"] = candidat["parent_pertinent"] or parent_pertinent
+        if ancre and ancre not in candidat["ancres"]:
+            candidat["ancres"].append(ancre)
+
+        score = self.evaluer(candidat, self)
+        if score is None or score < self.score_min:
+            self._rejetes.add(cle)
+            return
+        self._rejetes.discard(cle)
+        heapq.heappush(self._tas, (-score, next(self._ordre), cle))
+
+    def suivant(self):
+        """Retourne le meilleur candidat restant, ou None si la frontière est vide."""
+        while self._tas:
+            _, _, cle = heapq.heappop(self._tas)
+            if cle in self._sortis or cle in self._rejetes:
+                continue
+            candidat = self._candidats[cle]
+            score = self.evaluer(candidat, self)
+            if score is None or score < self.score_min:
+                self._rejetes.add(cle)
+                continue
+            # Score en baisse depuis l'ajout : on le remet à sa place
+            if self._tas and score < -self._tas[0][0]:
+                heapq.heappush(self._tas, (-score, next(self._ordre), cle))
+                continue
+            self._sortis.add(cle)
+            return candidat
+        return None
+
+    def noter(self, url, pertinente):
+        """Enregistre la pertinence d'une page récupérée pour ses voisines de dossier."""
+        compteur = self._voisins.setdefault(dossier(url), [0, 0])
+        compteur[0] += int(pertinente)
+        compteur[1] += 1
+
+    def voisins(self, url):
+        """Retourne (pages pertinentes, pages récupérées) dans le dossier du lien."""
+        pertinentes, total = self._voisins.get(dossier(url), (0, 0))
+        return pertinentes, total
+
+    @property
+    def nb_rejetes(self):
+        return len(self._rejetes)
+
+def dossier(url):
+    """Dossier parent du chemin d'une URL, utilisé pour regrouper les pages voisines."""
+    chemin = urlparse(url).path or "/"
+    return posixpath.dirname(chemin.rstrip("/")) or "/"
@@ -0,0 +1,18 @@
+import json
+import os
+
+# ===========================
+# 📓 Relecture des anciens journaux JSON Lines
+# ===========================
+def lire_journal(chemin):
+    """Relit un journal ligne à ligne, en ignorant une éventuelle dernière ligne tronquée."""
+    if not os.path.exists(chemin):
+        return
+    with open(chemin, "r", encoding="utf-8") as f:
+        for ligne in f:
+            if not ligne.endswith("\n"):
+                break  # Écriture interrompue par un arrêt brutal
+            try:
+                yield json.loads(ligne)
+            except json.JSONDecodeError:
+                continue
@@ -0,0 +1,106 @@
+import json
+import os
+import time
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+ENDPOINT = "/v1/chat/completions"
+FENETRE = "24h"
+INTERVALLE_SONDAGE = 60
+STATUTS_FINAUX = {"completed", "failed", "expired", "cancelled"}
+
+# ===========================
+# 📦 Soumission par lot (Batch API)
+# ===========================
+class LotGPT:
+    """Soumet des prompts via la Batch API et reprend un lot en cours après un arrêt.
+
+    L'état du lot (identifiant et métadonnées des demandes) est conservé dans
+    `fichier_etat` tant que ses résultats n'ont pas été fusionnés.
+    """
+
+    def __init__(self, client, modele, fichier_etat):
+        self.client = client
+        self.modele = modele
+        self.fichier_etat = fichier_etat
+
+    # ----- État persistant -----
+    def lot_en_cours(self):
+        """Retourne l'état du lot non encore fusionné, ou None."""
+        if not os.path.exists(self.fichier_etat):
+            return None
+        with open(self.fichier_etat, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _sauvegarder_etat(self, etat):
+        temporaire = f"{self.fichier_etat}.tmp"
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump(etat, f, ensure_ascii=False)
+        os.replace(temporaire, self.fichier_etat)
+
+    def _fichier_entree(self):
+        return f"{os.path.splitext(self.fichier_etat)[0]}_entree.jsonl"
+
+    def terminer(self):
+        """À appeler une fois les résultats fusionnés dans les fichiers de sortie."""
+        for chemin in (self.fichier_etat, self._fichier_entree()):
+            if os.path.exists(chemin):
+                os.remove(chemin)
+
+    # ----- Cycle de vie du lot -----
+    def soumettre(self, demandes, metadonnees):
+        """Écrit les demandes {custom_id: prompt} en JSONL, les envoie et crée le lot."""
+        fichier_lot = self._fichier_entree()
+        with open(fichier_lot, "w", encoding="utf-8") as f:
+            for custom_id, prompt in demandes.items():
+                f.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": ENDPOINT,
+                    "body": {"model": self.modele, "messages": [{"role": "user", "content": prompt}]}
+                }, ensure_ascii=False) + "\n")
+
+        with open(fichier_lot, "rb") as f:
+            fichier = self.client.files.create(file=f, purpose="batch")
+        lot = self.client.batches.create(input_file_id=fichier.id, endpoint=ENDPOINT, completion_window=FENETRE)
+
+        etat = {"batch_id": lot.id, "input_file_id": fichier.id, "metadonnees": metadonnees}
+        self._sauvegarder_etat(etat)
+        print(f"📦 Lot {lot.id} soumis : {len(demandes)} demandes.")
+        return etat
+
+    def attendre(self, etat, intervalle=INTERVALLE_SONDAGE):
+        """Sonde le lot jusqu'à un statut final et retourne l'objet lot."""
+        while True:
+            lot = self.client.batches.retrieve(etat["batch_id"])
+            compteurs = lot.request_counts
+            if compteurs is not None:
+                print(f"⏳ Lot {lot.id} : {lot.status} "
+                      f"({compteurs.completed}/{compteurs.total} terminées, {compteurs.failed} en échec)")
+            if lot.status in STATUTS_FINAUX:
+                return lot
+            time.sleep(intervalle)
+
+    def resultats(self, lot):
+        """Retourne {custom_id: contenu de la réponse} et {custom_id: erreur}."""
+        reponses, erreurs = {}, {}
+        if lot.output_file_id:
+            for ligne in self.client.files.content(lot.output_file_id).text.splitlines():
+                if not ligne.strip():
+                    continue
+                sortie = json.loads(ligne)
+                response = sortie.get("response") or {}
+                if response.get("status_code") == 200:
+                    contenu = response["body"]["choices"][0]["message"]["content"]
+                    reponses[sortie["custom_id"]] = contenu.strip()
+                else:
+                    erreurs[sortie["custom_id"]] = sortie.get("error") or response.get("body")
+        if lot.error_file_id:
+            for ligne in self.client.files.content(lot.error_file_id).text.splitlines():
+                if ligne.strip():
+                    sortie = json.loads(ligne)
+                    erreurs[sortie["custom_id"]] = sortie.get("error") or (sortie.get("response") or {}).get("body")
+        if lot.status != "completed":
+            print(f"⚠️ Lot {lot.id} terminé avec le statut '{lot.status}'.")
+        return reponses, erreurs
@@ -0,0 +1,193 @@
+import asyncio
+import itertools
+import os
+import re
+import time
+from collections import Counter
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+from outils.decoupage import compter_jetons
+from outils.politesse import delai_retry_after
+
+# ===========================
+# 📂 Paramètres (surchargeables par variables d'environnement)
+# ===========================
+REQUETES_PAR_MINUTE = int(os.environ.get("GPT_REQUETES_PAR_MINUTE", 500))
+JETONS_PAR_MINUTE = int(os.environ.get("GPT_JETONS_PAR_MINUTE", 30000))
+REQUETES_EN_PARALLELE = int(os.environ.get("GPT_REQUETES_EN_PARALLELE", 8))
+TENTATIVES = 5
+JETONS_REPONSE = 1000  # Réserve pour la réponse lors de l'estimation
+
+def estimer_jetons(texte):
+    """Nombre de jetons du prompt, pour réserver le budget TPM avant l'envoi."""
+    return compter_jetons(texte)
+
+# ===========================
+# 🪣 Seau à jetons
+# ===========================
+class SeauJetons:
+    """Budget par minute rechargé en continu."""
+
+    def __init__(self, par_minute):
+        self.capacite = par_minute
+        self.disponible = float(par_minute)
+        self._maj = time.monotonic()
+
+    def _recharger(self):
+        maintenant = time.monotonic()
+        self.disponible = min(self.capacite, self.disponible + (maintenant - self._maj) * self.capacite / 60)
+        self._maj = maintenant
+
+    def delai_avant(self, quantite):
+        """Secondes à attendre avant de pouvoir consommer `quantite`."""
+        self._recharger()
+        manque = min(quantite, self.capacite) - self.disponible
+        return max(0.0, manque * 60 / self.capacite)
+
+    def consommer(self, quantite):
+        """Retire `quantite` du budget ; négative, elle en rend sans dépasser la capacité."""
+        self._recharger()
+        self.disponible = min(self.capacite, self.disponible - quantite)
+
+# ===========================
+# ⏳ Lecture des indications de l'API
+# ===========================
+def _duree_openai(valeur):
+    """Convertit une durée façon OpenAI ('1s', '6m0s', '250ms') en secondes."""
+    total = 0.0
+    for nombre, unite in re.findall(r"([\d.]+)(ms|s|m|h)", valeur):
+        total += float(nombre) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unite]
+    return total
+
+def delai_indique(erreur):
+    """Délai d'attente suggéré par l'API (retry-after, x-ratelimit-reset-*), sinon None."""
+    response = getattr(erreur, "response", None)
+    if response is None:
+        return None
+    entetes = response.headers
+    if "retry-after-ms" in entetes:
+        return float(entetes["retry-after-ms"]) / 1000
+    if "retry-after" in entetes:
+        # Entête illisible : None, l'appelant retombe sur son propre backoff
+        return delai_retry_after(entetes["retry-after"])
+    delais = [_duree_openai(entetes[cle]) for cle in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+              if cle in entetes]
+    return max(delais) if delais else None
+
+def est_reessayable(erreur):
+    if isinstance(erreur, (APIConnectionError, APITimeoutError, ValueError)):
+        return True
+    if isinstance(erreur, APIStatusError):
+        return erreur.status_code == 429 or erreur.status_code >= 500
+    return False
+
+# ===========================
+# 🚦 Planificateur de requêtes GPT
+# ===========================
+class PlanificateurGPT:
+    """Exécute des complétions en parallèle sous budgets RPM/TPM.
+
+    Les demandes sont servies à tour de rôle par groupe (typiquement un congrès ou
+    un domaine) : la k-ième demande de chaque groupe passe avant la (k+1)-ième de
+    n'importe quel autre, si bien qu'un gros congrès ne bloque pas les petits.
+    """
+
+    def __init__(self, client, modele, requetes_par_minute=REQUETES_PAR_MINUTE,
+                 jetons_par_minute=JETONS_PAR_MINUTE, concurrence=REQUETES_EN_PARALLELE,
+                 tentatives=TENTATIVES):
+        self.client = client
+        self.modele = modele
+        self.concurrence = concurrence
+        self.tentatives = tentatives
+        self.stats = Counter()
+        self._requetes = SeauJetons(requetes_par_minute)
+        self._jetons = SeauJetons(jetons_par_minute)
+        self._pause_jusqua = 0.0
+        self._verrou = asyncio.Lock()
+        self._file = asyncio.PriorityQueue()
+        self._rangs = Counter()
+        self._sequence = itertools.count()
+        self._workers = []
+
+    async def __aenter__(self):
+        self._workers = [asyncio.create_task(self._travailleur()) for _ in range(self.concurrence)]
+        return self
+
+    async def __aexit__(self, *exc):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    async def soumettre(self, prompt, groupe="", analyser=None):
+        """Envoie un prompt et retourne la réponse (passée par `analyser` si fourni).
+
+        Si `analyser` lève ValueError (réponse inexploitable), la demande est réessayée.
+        """
+        rang = self._rangs[groupe]
+        self._rangs[groupe] += 1
+        futur = asyncio.get_running_loop().create_future()
+        await self._file.put((rang, next(self._sequence), prompt, analyser, futur))
+        return await futur
+
+    async def _travailleur(self):
+        while True:
+            _, _, prompt, analyser, futur = await self._file.get()
+            try:
+                resultat = await self._executer(prompt, analyser)
+                if not futur.done():
+                    futur.set_result(resultat)
+            except Exception as e:
+                if not futur.done():
+                    futur.set_exception(e)
+            finally:
+                self._file.task_done()
+
+    async def _reserver(self, jetons):
+        """Attend que la pause éventuelle et les deux budgets permettent l'envoi."""
+        async with self._verrou:
+            while True:
+                attente = max(
+                    self._pause_jusqua - time.monotonic(),
+                    self._requetes.delai_avant(1),
+                    self._jetons.delai_avant(jetons),
+                )
+                if attente <= 0:
+                    self._requetes.consommer(1)
+                    self._jetons.consommer(jetons)
+                    return
+                await asyncio.sleep(attente)
+
+    async def _executer(self, prompt, analyser):
+        estimation = estimer_jetons(prompt) + JETONS_REPONSE
+        attente = 2
+        for tentative in range(self.tentatives):
+            await self._reserver(estimation)
+            try:
+                response = await self.client.chat.completions.create(
+                    model=self.modele,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+                self.stats["requetes"] += 1
+                if response.usage is not None:
+                    # Corrige le budget avec la consommation réelle
+                    self._jetons.consommer(response.usage.total_tokens - estimation)
+                contenu = response.choices[0].message.content.strip()
+                return analyser(contenu) if analyser else contenu
+
+            except Exception as e:
+                if not est_reessayable(e) or tentative == self.tentatives - 1:
+                    self.stats["echecs"] += 1
+                    raise
+                delai = delai_indique(e)
+                if isinstance(e, APIStatusError) and e.status_code == 429:
+                    self.stats["limites_atteintes"] += 1
+                    # Tout le monde patiente : le quota est partagé
+                    self._pause_jusqua = max(self._pause_jusqua, time.monotonic() + (delai or attente))
+                print(f"⚠️ Erreur avec GPT (tentative {tentative+1}/{self.tentatives}) : {e}")
+                await asyncio.sleep(delai if delai is not None else attente)
+                attente *= 2
+
+    def afficher_stats(self):
+        print(f"🚦 GPT : {self.stats['requetes']} requêtes, {self.stats['limites_atteintes']} limites atteintes (429), "
+              f"{self.stats['echecs']} échecs définitifs")
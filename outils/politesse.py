@@ -0,0 +1,173 @@
+import email.utils
+import threading
+import time
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+# ===========================
+# 📂 Paramètres de l'adaptation
+# ===========================
+INTERVALLE_MIN = 0.5      # Délai plancher entre deux requêtes vers un hôte rapide
+INTERVALLE_MAX = 60       # Délai plafond pour un hôte en difficulté
+FACTEUR_LATENCE = 2       # Délai visé : N fois le temps de réponse moyen de l'hôte
+LISSAGE_LATENCE = 0.3     # Poids de la dernière mesure dans la moyenne glissante
+RALENTISSEMENT_ERREUR = 2 # Multiplicateur du délai après une erreur, un 429 ou un 503
+ACCELERATION = 0.8        # Le délai redescend progressivement vers sa cible après un succès
+STATUTS_SATURATION = {429, 503}
+
+# ===========================
+# 🐢 Limitation du débit par hôte
+# ===========================
+class LimiteurParHote:
+    """Espace d'au moins `intervalle` secondes deux requêtes vers le même hôte."""
+
+    def __init__(self, intervalle):
+        self.intervalle = intervalle
+        self._derniers = {}  # Créneau de la dernière requête réservée, par hôte
+        self._pas_avant = {}  # Aucune requête avant cet instant (Retry-After), par hôte
+        self._verrou = threading.Lock()
+
+    def _intervalle(self, hote):
+        return self.intervalle
+
+    def attendre(self, url):
+        """Bloque seulement si la dernière requête vers cet hôte est trop récente."""
+        hote = urlparse(url).netloc.lower()
+        with self._verrou:
+            # Intervalle lu au moment de réserver : un ralentissement signalé entre-temps s'applique aussitôt
+            maintenant = time.monotonic()
+            dernier = self._derniers.get(hote)
+            creneau = maintenant if dernier is None else max(maintenant, dernier + self._intervalle(hote))
+            creneau = max(creneau, self._pas_avant.get(hote, 0.0))
+            self._derniers[hote] = creneau
+        if creneau > maintenant:
+            time.sleep(creneau - maintenant)
+
+# ===========================
+# 🌡️ Politesse adaptative
+# ===========================
+class PolitesseAdaptative(LimiteurParHote):
+    """Délai par hôte ajusté aux temps de réponse observés, aux erreurs et au robots.txt.
+
+    Un hôte rapide descend vers INTERVALLE_MIN ; un hôte lent, en erreur ou qui
+    répond 429/503 est ralenti (Retry-After respecté). Le Crawl-delay du
+    robots.txt, lu une fois par hôte avec `lire_robots(url)`, sert de plancher.
+    """
+
+    def __init__(self, intervalle, lire_robots=None, agent="*"):
+        super().__init__(intervalle)
+        self.lire_robots = lire_robots
+        self.agent = agent
+        self._hotes = {}
+
+    def _etat(self, hote, url=None):
+        with self._verrou:
+            etat = self._hotes.get(hote)
+            if etat is None:
+                etat = self._hotes[hote] = {
+                    "intervalle": self.intervalle, "latence": None, "plancher": INTERVALLE_MIN,
+                    "crawl_delay": None, "requetes": 0, "erreurs": 0, "saturations": 0,
+                    "robots": threading.Lock(), "robots_lu": False,
+                }
+        if url is not None and not etat["robots_lu"]:
+            with etat["robots"]:
+                if not etat["robots_lu"]:
+                    self._lire_crawl_delay(etat, url)
+                    etat["robots_lu"] = True
+        return etat
+
+    def _lire_crawl_delay(self, etat, url):
+        if self.lire_robots is None:
+            return
+        morceaux = urlparse(url)
+        try:
+            texte = self.lire_robots(f"{morceaux.scheme}://{morceaux.netloc}/robots.txt")
+        except Exception:
+            texte = None
+        if not texte:
+            return
+        robots = RobotFileParser()
+        robots.parse(texte.splitlines())
+        delai = robots.crawl_delay(self.agent)
+        taux = robots.request_rate(self.agent)
+        if taux is not None and taux.requests:
+            delai = max(delai or 0, taux.seconds / taux.requests)
+        if delai:
+            delai = min(float(delai), INTERVALLE_MAX)
+            with self._verrou:
+                etat["crawl_delay"] = delai
+                etat["plancher"] = max(INTERVALLE_MIN, delai)
+                etat["intervalle"] = max(etat["intervalle"], delai)
+
+    def _intervalle(self, hote):
+        return self._hotes[hote]["intervalle"]
+
+    def attendre(self, url):
+        self._etat(urlparse(url).netloc.lower(), url)
+        super().attendre(url)
+
+    def signaler(self, url, duree, statut=None, erreur=False, retry_after=None):
+        """Ajuste le délai de l'hôte d'après une requête terminée en `duree` secondes."""
+        hote = urlparse(url).netloc.lower()
+        etat = self._etat(hote)
+        with self._verrou:
+            etat["requetes"] += 1
+            if statut in STATUTS_SATURATION or erreur:
+                etat["saturations" if statut in STATUTS_SATURATION else "erreurs"] += 1
+                intervalle = max(etat["intervalle"] * RALENTISSEMENT_ERREUR, retry_after or 0)
+                # Seule la croissance adaptative est plafonnée ; le Retry-After du serveur est respecté tel quel
+                etat["intervalle"] = min(INTERVALLE_MAX, max(etat["plancher"], intervalle))
+                if retry_after:
+                    self._pas_avant[hote] = max(self._pas_avant.get(hote, 0.0), time.monotonic() + retry_after)
+                return
+            if etat["latence"] is None:
+                etat["latence"] = duree
+            else:
+                etat["latence"] += LISSAGE_LATENCE * (duree - etat["latence"])
+            cible = min(INTERVALLE_MAX, max(etat["plancher"], FACTEUR_LATENCE * etat["latence"]))
+            # Ralentissement immédiat, accélération progressive
+            etat["intervalle"] = cible if cible > etat["intervalle"] else max(cible, etat["intervalle"] * ACCELERATION)
+
+    def resume(self, hote):
+        etat = self._etat(hote.lower())
+        latence = f"{etat['latence']:.2f} s" if etat["latence"] is not None else "—"
+        robots = f", Crawl-delay {etat['crawl_delay']:g} s" if etat["crawl_delay"] else ""
+        return (f"🐢 Politesse {hote} : délai {etat['intervalle']:.2f} s, latence moyenne {latence}, "
+                f"{etat['erreurs']} erreurs, {etat['saturations']} réponses 429/503{robots}")
+
+def delai_retry_after(valeur):
+    """Secondes demandées par un en-tête Retry-After, en secondes ou en date HTTP ; None si absent ou illisible."""
+    if valeur is None:
+        return None
+    try:
+        return max(0.0, float(valeur))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(valeur)
+        return max(0.0, date.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+# ===========================
+# ⏱️ Budget d'un domaine
+# ===========================
+class BudgetDomaine:
+    """Nombre maximal de pages récupérées et durée maximale du crawl d'un domaine."""
+
+    def __init__(self, pages_max, duree_max):
+        self.pages_max = pages_max
+        self.duree_max = duree_max
+        self.pages = 0
+        self.debut = time.monotonic()
+
+    def consommer(self):
+        self.pages += 1
+
+    def epuise(self):
+        """Raison de l'arrêt si le budget est épuisé, sinon None."""
+        if self.pages >= self.pages_max:
+            return f"{self.pages} pages récupérées"
+        if time.monotonic() - self.debut >= self.duree_max:
+            return f"{self.duree_max:g} s de crawl"
+        return None
@@ -0,0 +1,156 @@
+import re
+
+# ===========================
+# 📂 Motifs
+# ===========================
+MOIS = {
+    "janvier": 1, "janv": 1, "january": 1, "jan": 1,
+    "février": 2, "fevrier": 2, "févr": 2, "february": 2, "feb": 2,
+    "mars": 3, "march": 3, "mar": 3,
+    "avril": 4, "april": 4, "avr": 4, "apr": 4,
+    "mai": 5, "may": 5,
+    "juin": 6, "june": 6, "jun": 6,
+    "juillet": 7, "juil": 7, "july": 7, "jul": 7,
+    "août": 8, "aout": 8, "august": 8, "aug": 8,
+    "septembre": 9, "september": 9, "sept": 9, "sep": 9,
+    "octobre": 10, "october": 10, "oct": 10,
+    "novembre": 11, "november": 11, "nov": 11,
+    "décembre": 12, "decembre": 12, "december": 12, "déc": 12, "dec": 12,
+}
+_MOIS = "|".join(sorted(MOIS, key=len, reverse=True))
+
+MOTIF_EMAIL = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)*\.[a-zA-Z]{2,}\b")
+MOTIF_TELEPHONE = re.compile(r"\+\d{1,3}[\s.-]?\(?\d\)?[\d\s.-]{6,}\d|\b0\d(?:[\s.-]?\d{2}){4}\b")
+MOTIF_DATE_ISO = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+MOTIF_DATE_NUMERIQUE = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")
+# « 10 mars 2025 », « 10-12 mars 2025 », « du 10 au 12 mars 2025 », « 1er et 2 juin 2026 »
+MOTIF_DATE_TEXTE = re.compile(
+    rf"\b(\d{{1,2}})(?:er)?(?:\s*(?:-|–|au|et|to)\s*(\d{{1,2}})(?:er)?)?\s+({_MOIS})\.?\s+(\d{{4}})\b",
+    re.IGNORECASE,
+)
+MOTIF_ADRESSE = re.compile(
+    r"\b\d{1,4}(?:\s?(?:bis|ter))?,?\s+(?:rue|avenue|av\.|boulevard|bd|place|quai|allée|chemin|route|cours|impasse)"
+    r"\s+[^,\n]{2,60},?\s+\d{5}\s+[A-ZÀ-Ÿ][\w'\- ]{1,40}",
+    re.IGNORECASE,
+)
+MOTIF_LIEU = re.compile(
+    r"\b(?:Palais|Centre|Cité)\s+des\s+[Cc]ongr[èe]s(?:\s+(?:de|d'|du)\s*[A-ZÀ-Ÿ][\w\-]+)?"
+)
+
+# Indices de contenu que seul GPT sait structurer (personnes, rôles)
+MOTIF_PERSONNES = re.compile(
+    r"\b(?:Dr|Pr|Prof|Professeur|Professor|Docteur|Mme|Mr|Mrs|Président|Présidente|President|Chair|"
+    r"Speaker|Orateur|Oratrice|Intervenant|Intervenante|Conférencier|Conférencière|Modérateur|Moderator|"
+    r"Comité|Committee|Board|Bureau|Keynote)\b"
+)
+MOTS_MIN_RESUME = 50
+
+# ===========================
+# 🔎 Extraction locale
+# ===========================
+def _iso(annee, mois, jour):
+    return f"{int(annee):04d}-{int(mois):02d}-{int(jour):02d}"
+
+def extraire_dates(texte):
+    """Dates trouvées : {"texte", "début", "fin"} avec début/fin au format ISO."""
+    dates = []
+    for m in MOTIF_DATE_TEXTE.finditer(texte):
+        jour, jour_fin, mois, annee = m.groups()
+        mois = MOIS[mois.lower()]
+        dates.append({"texte": m.group(0), "début": _iso(annee, mois, jour), "fin": _iso(annee, mois, jour_fin or jour)})
+    for m in MOTIF_DATE_ISO.finditer(texte):
+        annee, mois, jour = m.groups()
+        if 1 <= int(mois) <= 12 and 1 <= int(jour) <= 31:
+            dates.append({"texte": m.group(0), "début": m.group(0), "fin": m.group(0)})
+    for m in MOTIF_DATE_NUMERIQUE.finditer(texte):
+        jour, mois, annee = m.groups()
+        if 1 <= int(mois) <= 12 and 1 <= int(jour) <= 31:
+            dates.append({"texte": m.group(0), "début": _iso(annee, mois, jour), "fin": _iso(annee, mois, jour)})
+    return dates
+
+def pre_extraire(texte):
+    """Champs structurés récupérables sans GPT : emails, téléphones, dates, adresses et lieux."""
+    return {
+        "emails": list(dict.fromkeys(m.group(0) for m in MOTIF_EMAIL.finditer(texte))),
+        "téléphones": list(dict.fromkeys(re.sub(r"\s+", " ", m.group(0)).strip() for m in MOTIF_TELEPHONE.finditer(texte))),
+        "dates": list({d["texte"]: d for d in extraire_dates(texte)}.values()),
+        "adresses": list(dict.fromkeys(m.group(0).strip() for m in MOTIF_ADRESSE.finditer(texte))),
+        "lieux": list(dict.fromkeys(m.group(0).strip() for m in MOTIF_LIEU.finditer(texte))),
+    }
+
+def texte_residuel(texte):
+    """Texte restant une fois retirés tous les éléments déjà extraits par motifs."""
+    for motif in (MOTIF_EMAIL, MOTIF_TELEPHONE, MOTIF_DATE_TEXTE, MOTIF_DATE_ISO,
+                  MOTIF_DATE_NUMERIQUE, MOTIF_ADRESSE, MOTIF_LIEU):
+        texte = motif.sub(" ", texte)
+    return texte
+
+def necessite_gpt(texte, besoin_resume):
+    """Vrai si le texte contient encore des personnes/rôles, ou assez de prose pour le résumé."""
+    residu = texte_residuel(texte)
+    if MOTIF_PERSONNES.search(residu):
+        return True
+    return besoin_resume and len(re.findall(r"[^\W\d_]{3,}", residu)) >= MOTS_MIN_RESUME
+
+# ===========================
+# 🧩 Conversion vers les schémas des étapes 4 et 6
+# ===========================
+def au_format_etape4(pre):
+    """Champs contacts/dates/lieux au schéma de l'étape 4."""
+    contacts = [{"type": "email", "valeur": e, "propriétaire": "", "source": "regex"} for e in pre["emails"]]
+    contacts += [{"type": "téléphone", "valeur": t, "propriétaire": "", "source": "regex"} for t in pre["téléphones"]]
+    dates = [{"date": d["texte"], "événement": "", "personnes_associees": [], "source": "regex"} for d in pre["dates"]]
+    return {"contacts": contacts, "dates": dates, "lieux": pre["lieux"] + pre["adresses"]}
+
+def au_format_etape6(pre):
+    """Champs contacts/dates/lieux au schéma de l'étape 6."""
+    contacts = [{"type": "email", "valeur": e, "propriétaire": {}, "source": "regex"} for e in pre["emails"]]
+    contacts += [{"type": "téléphone", "valeur": t, "propriétaire": {}, "source": "regex"} for t in pre["téléphones"]]
+    dates = [{"date_début": d["début"], "date_fin": d["fin"], "événement": "", "source": "regex"} for d in pre["dates"]]
+    lieux = [{"nom": l, "source": "regex"} for l in pre["lieux"]]
+    lieux += [{"adresse": a, "source": "regex"} for a in pre["adresses"]]
+    return {"contacts": contacts, "dates": dates, "lieux": lieux}
+
+CHAMPS_LISTES = ("contacts", "dates", "lieux", "personnes")
+
+def en_liste(valeur):
+    """Champ de liste tel que renvoyé par GPT : une valeur seule devient une liste, rien une liste vide."""
+    if valeur is None or valeur == "":
+        return []
+    return valeur if isinstance(valeur, list) else [valeur]
+
+def completer(extraction, locale):
+    """Ajoute à une extraction GPT les éléments trouvés par motifs qu'elle n'a pas déjà,
+    et note dans extraction["sources"] l'origine de chaque champ."""
+    sources = extraction.setdefault("sources", {})
+    for champ in CHAMPS_LISTES:
+        if champ in extraction:
+            extraction[champ] = en_liste(extraction[champ])
+    if "contacts" in extraction:
+        # Contacts donnés en texte brut : mis au format objet, le reste est ignoré
+        extraction["contacts"] = [
+            c if isinstance(c, dict) else {"valeur": c}
+            for c in extraction["contacts"] if isinstance(c, (dict, str))
+        ]
+    for champ in CHAMPS_LISTES:
+        if extraction.get(champ):
+            sources.setdefault(champ, [])
+            if "gpt" not in sources[champ]:
+                sources[champ].append("gpt")
+
+    deja_vus = {re.sub(r"\W", "", str(c.get("valeur", ""))).lower() for c in extraction.get("contacts", [])}
+    dates_vues = " ".join(str(d) for d in extraction.get("dates", []))
+    lieux_vus = " ".join(str(l) for l in extraction.get("lieux", []))
+    ajouts = {
+        "contacts": [c for c in locale["contacts"] if re.sub(r"\W", "", c["valeur"]).lower() not in deja_vus],
+        "dates": [d for d in locale["dates"] if (d.get("date") or d.get("date_début")) not in dates_vues],
+        "lieux": [l for l in locale["lieux"] if str(l.get("nom") or l.get("adresse") if isinstance(l, dict) else l)
+                  not in lieux_vus],
+    }
+    for champ, elements in ajouts.items():
+        if elements:
+            extraction.setdefault(champ, []).extend(elements)
+            sources.setdefault(champ, [])
+            if "regex" not in sources[champ]:
+                sources[champ].append("regex")
+    return extraction
@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from outils.recuperation import TIMEOUT, telecharger
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+VERSIONS_FILE = "versions_pages.sqlite"
+
+# États d'une page par rapport à sa dernière version traitée
+NOUVELLE = "nouvelle"
+MODIFIEE = "modifiee"
+INCHANGEE = "inchangee"
+
+# ===========================
+# 🗃️ Versions déjà traitées de chaque page
+# ===========================
+class RegistreVersions:
+    """Dernière version traitée de chaque URL, par étape, dans une base SQLite.
+
+    On garde l'ETag, le Last-Modified, l'empreinte du contenu et le résultat
+    produit par l'étape : une page inchangée n'a pas besoin d'être réanalysée.
+    """
+
+    def __init__(self, fichier=VERSIONS_FILE):
+        self.fichier = fichier
+        self._verrou = threading.Lock()
+        self._db = sqlite3.connect(fichier, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS versions (
+                etape TEXT,
+                url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                empreinte TEXT,
+                resultat TEXT,
+                vu_le REAL,
+                PRIMARY KEY (etape, url)
+            ) WITHOUT ROWID
+        """)
+        self._db.commit()
+
+    def version(self, etape, url):
+        with self._verrou:
+            ligne = self._db.execute(
+                "SELECT etag, last_modified, empreinte, resultat FROM versions WHERE etape = ? AND url = ?",
+                (etape, url),
+            ).fetchone()
+        if ligne is None:
+            return None
+        etag, last_modified, empreinte, resultat = ligne
+        return {"etag": etag, "last_modified": last_modified, "empreinte": empreinte,
+                "resultat": json.loads(resultat) if resultat is not None else None}
+
+    def enregistrer(self, etape, url, etag, last_modified, empreinte, resultat=None):
+        with self._verrou:
+            self._db.execute(
+                "INSERT OR REPLACE INTO versions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (etape, url, etag, last_modified, empreinte,
+                 json.dumps(resultat, ensure_ascii=False) if resultat is not None else None, time.time()),
+            )
+            self._db.commit()
+
+    def fermer(self):
+        with self._verrou:
+            self._db.close()
+
+def empreinte_reponse(response):
+    """Empreinte SHA-256 du corps (déjà calculée par le cache HTTP quand il est actif)."""
+    return getattr(response, "empreinte", None) or hashlib.sha256(response.content).hexdigest()
+
+# ===========================
+# 🔄 Rafraîchissement d'une étape
+# ===========================
+class Rafraichissement:
+    """Requêtes conditionnelles et classement des pages d'une étape : nouvelle, modifiée ou inchangée.
+
+    Inactif, il ne fait qu'enregistrer les versions traitées pour préparer le prochain
+    rafraîchissement ; actif, chaque page est revalidée auprès du serveur (sans TTL)
+    et l'étape peut réutiliser le résultat d'une page inchangée.
+    """
+
+    def __init__(self, etape, actif=False, registre=None):
+        self.etape = etape
+        self.actif = actif
+        self.registre = registre or RegistreVersions()
+        self.stats = Counter()
+        self._verrou = threading.Lock()
+
+    def entetes_conditionnels(self, precedente):
+        entetes = {}
+        if precedente is not None:
+            if precedente["etag"]:
+                entetes["If-None-Match"] = precedente["etag"]
+            if precedente["last_modified"]:
+                entetes["If-Modified-Since"] = precedente["last_modified"]
+        return entetes
+
+    def classer(self, precedente, response):
+        if precedente is None:
+            return NOUVELLE
+        if response.status_code == 304 or precedente["empreinte"] == empreinte_reponse(response):
+            return INCHANGEE
+        return MODIFIEE
+
+    def options(self, precedente):
+        """Options de téléchargement : revalidation conditionnelle forcée en mode actif."""
+        if not self.actif or precedente is None or precedente["resultat"] is None:
+            # Sans résultat à réutiliser, un 304 sans corps ne servirait à rien
+            return {"revalider": self.actif}
+        return {"revalider": True, "entetes": self.entetes_conditionnels(precedente)}
+
+    def recuperer(self, url, timeout=TIMEOUT):
+        """Télécharge `url` et retourne (état, réponse, version précédente)."""
+        precedente = self.registre.version(self.etape, url)
+        response = telecharger(url, timeout, **self.options(precedente))
+        return self.compter(self.classer(precedente, response)), response, precedente
+
+    async def recuperer_async(self, recuperateur, url):
+        """Comme `recuperer`, à travers un RecuperateurAsync (limites de concurrence)."""
+        precedente = await asyncio.to_thread(self.registre.version, self.etape, url)
+        response = await recuperateur.recuperer(url, **self.options(precedente))
+        return self.compter(self.classer(precedente, response)), response, precedente
+
+    def compter(self, etat):
+        with self._verrou:
+            self.stats[etat] += 1
+        return etat
+
+    def reutilisable(self, etat, precedente):
+        """Vrai si le résultat précédent peut servir tel quel."""
+        return self.actif and etat == INCHANGEE and precedente is not None and precedente["resultat"] is not None
+
+    def confirmer(self, url, response, resultat=None, precedente=None):
+        """Enregistre la version traitée ; à n'appeler qu'une fois le résultat acquis."""
+        if response.status_code == 304:
+            # Sans cache HTTP, un 304 n'a pas de corps : la version précédente reste la référence
+            etag, last_modified, empreinte = precedente["etag"], precedente["last_modified"], precedente["empreinte"]
+        else:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            empreinte = empreinte_reponse(response)
+        self.registre.enregistrer(self.etape, url, etag, last_modified, empreinte, resultat)
+
+    def afficher_rapport(self):
+        total = sum(self.stats.values())
+        if not total:
+            return
+        print(f"🔄 Rafraîchissement ({total} pages) : {self.stats[MODIFIEE]} modifiées, "
+              f"{self.stats[INCHANGEE]} inchangées, {self.stats[NOUVELLE]} nouvelles.")
@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from outils.cache_http import obtenir_cache
+
+# ===========================
+# 📂 Paramètres
+# ===========================
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+TIMEOUT = 10
+TAILLE_POOL = 10
+TAILLE_MORCEAU = 64 * 1024
+
+_local = threading.local()
+
+# ===========================
+# 🔌 Sessions HTTP (réutilisation des connexions)
+# ===========================
+def obtenir_session():
+    """Retourne la session HTTP du thread courant, créée à la demande."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adaptateur = HTTPAdapter(pool_connections=TAILLE_POOL, pool_maxsize=TAILLE_POOL)
+        session.mount("http://", adaptateur)
+        session.mount("https://", adaptateur)
+        session.headers.update(HEADERS)
+        _local.session = session
+    return session
+
+def telecharger(url, timeout=TIMEOUT, revalider=False, entetes=None):
+    """Effectue un GET synchrone (via le cache HTTP partagé) en réutilisant les connexions du thread.
+
+    `revalider` interroge le serveur même si le cache est frais ; sans cache, `entetes`
+    (If-None-Match / If-Modified-Since) peut produire une réponse 304 sans corps.
+    """
+    cache = obtenir_cache()
+    if cache is not None:
+        response = cache.get(obtenir_session(), url, timeout, revalider=revalider)
+    else:
+        response = obtenir_session().get(url, headers=entetes, timeout=timeout)
+    response.raise_for_status()
+    return response
+
+# ===========================
+# 📥 Téléchargement de fichiers en flux
+# ===========================
+class FichierRefuse(Exception):
+    """Fichier écarté avant ou pendant le téléchargement (type ou taille)."""
+
+def telecharger_en_flux(url, destination, taille_max, types_acceptes=None, timeout=TIMEOUT):
+    """Écrit la réponse dans `destination` par morceaux et retourne (empreinte SHA-256, taille, type).
+
+    Ne passe pas par le cache HTTP, qui garde les corps entiers en mémoire : la
+    mémoire utilisée reste bornée par TAILLE_MORCEAU quelle que soit la taille du fichier.
+    """
+    with obtenir_session().get(url, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        type_contenu = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if types_acceptes and type_contenu and type_contenu not in types_acceptes:
+            raise FichierRefuse(f"type {type_contenu} non accepté")
+        annonce = int(response.headers.get("Content-Length") or 0)
+        if annonce > taille_max:
+            raise FichierRefuse(f"{annonce} octets annoncés (max {taille_max})")
+
+        empreinte = hashlib.sha256()
+        taille = 0
+        try:
+            with open(destination, "wb") as f:
+                for morceau in response.iter_content(TAILLE_MORCEAU):
+                    taille += len(morceau)
+                    if taille > taille_max:
+                        raise FichierRefuse(f"plus de {taille_max} octets")
+                    empreinte.update(morceau)
+                    f.write(morceau)
+        except BaseException:
+            if os.path.exists(destination):
+                os.remove(destination)
+            raise
+    return empreinte.hexdigest(), taille, type_contenu
+
+# ===========================
+# ⚡ Récupération asynchrone
+# ===========================
+class RecuperateurAsync:
+    """Récupère des pages en parallèle avec une limite globale et une limite par hôte."""
+
+    def __init__(self, concurrence=20, concurrence_par_hote=4, timeout=TIMEOUT):
+        self.concurrence = concurrence
+        self.concurrence_par_hote = concurrence_par_hote
+        self.timeout = timeout
+        self._global = asyncio.Semaphore(concurrence)
+        self._par_hote = {}
+        self._executeur = ThreadPoolExecutor(max_workers=concurrence)
+
+    def _semaphore_hote(self, url):
+        hote = urlparse(url).netloc.lower()
+        if hote not in self._par_hote:
+            self._par_hote[hote] = asyncio.Semaphore(self.concurrence_par_hote)
+        return self._par_hote[hote]
+
+    async def recuperer(self, url, revalider=False, entetes=None):
+        """Télécharge une URL en respectant les limites de concurrence."""
+        # Limite de l'hôte d'abord : une requête en attente d'un hôte saturé ne bloque pas les autres hôtes
+        async with self._semaphore_hote(url), self._global:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executeur, telecharger, url, self.timeout, revalider, entetes)
+
+    def fermer(self):
+        self._executeur.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.fermer()
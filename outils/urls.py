@@ -0,0 +1,52 @@
+import posixpath
+import re
+from urllib.parse import parse_qsl, unquote_plus, urlencode, urlparse, urlunparse
+
+# ===========================
+# 🔗 Normalisation des URLs
+# ===========================
+# Paramètres de suivi marketing : ils ne changent jamais le contenu de la page
+PARAMETRES_SUIVI = re.compile(
+    r"^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|_gl|yclid|igshid)$",
+    re.IGNORECASE
+)
+PORTS_PAR_DEFAUT = {"http": 80, "https": 443}
+PAGES_INDEX = re.compile(r"/(index|default)\.(html?|php|aspx?)$", re.IGNORECASE)
+
+def canoniser(url, schema=None):
+    """Forme normalisée d'une URL, toujours récupérable telle quelle.
+
+    Fragment et paramètres de suivi retirés, hôte en minuscules, port par défaut
+    et segments `.`/`..` supprimés. Le reste de la requête est gardé tel quel
+    (ordre, encodage, paramètres sans valeur) : certains serveurs y sont sensibles. `schema` force http/https pour
+    aligner les liens d'un site sur le protocole de sa page d'entrée.
+    """
+    morceaux = urlparse(url.strip())
+    scheme = morceaux.scheme.lower()
+    if schema and scheme in PORTS_PAR_DEFAUT:
+        scheme = schema
+    hote = (morceaux.hostname or "").lower()
+    if morceaux.port and morceaux.port != PORTS_PAR_DEFAUT.get(scheme):
+        hote = f"{hote}:{morceaux.port}"
+
+    chemin = re.sub(r"/{2,}", "/", morceaux.path or "/")
+    normalise = posixpath.normpath(chemin)
+    if chemin.endswith("/") and normalise != "/":
+        normalise += "/"
+
+    parametres = [
+        parametre for parametre in morceaux.query.split("&")
+        if parametre and not PARAMETRES_SUIVI.match(unquote_plus(parametre.split("=", 1)[0]))
+    ]
+    return urlunparse((scheme, hote, normalise, morceaux.params, "&".join(parametres), ""))
+
+def cle_url(url):
+    """Clé de déduplication : ignore le protocole, la barre finale, les pages index et l'ordre des paramètres.
+
+    Ces variantes servent la même page mais ne résolvent pas les liens relatifs
+    de la même façon : on ne s'en sert que pour comparer, jamais pour télécharger.
+    """
+    morceaux = urlparse(canoniser(url))
+    chemin = PAGES_INDEX.sub("/", morceaux.path).rstrip("/") or "/"
+    requete = urlencode(sorted(parse_qsl(morceaux.query, keep_blank_values=True)))
+    return urlunparse(("", morceaux.netloc, chemin, morceaux.params, requete, ""))
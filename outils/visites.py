@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+import time
+
+# ===========================
+# 👣 Registre des pages visitées
+# ===========================
+class RegistreVisites:
+    """Pages déjà visitées de tous les domaines, dans une base SQLite.
+
+    Insertion et test d'appartenance en temps constant, sans charger les URLs en
+    mémoire ; chaque ajout est validé aussitôt et survit à un arrêt brutal.
+    """
+
+    def __init__(self, fichier):
+        self.fichier = fichier
+        self._verrou = threading.Lock()
+        self._db = sqlite3.connect(fichier, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS visites (
+                domaine TEXT,
+                cle TEXT,
+                visite_le REAL,
+                PRIMARY KEY (domaine, cle)
+            ) WITHOUT ROWID
+        """)
+        self._db.commit()
+
+    def contient(self, domaine, cle):
+        with self._verrou:
+            return self._db.execute(
+                "SELECT 1 FROM visites WHERE domaine = ? AND cle = ?", (domaine, cle)
+            ).fetchone() is not None
+
+    def ajouter(self, domaine, cles):
+        """Marque une ou plusieurs clés comme visitées."""
+        if isinstance(cles, str):
+            cles = [cles]
+        maintenant = time.time()
+        with self._verrou:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO visites VALUES (?, ?, ?)",
+                ((domaine, cle, maintenant) for cle in cles),
+            )
+            self._db.commit()
+
+    def nombre(self, domaine):
+        with self._verrou:
+            return self._db.execute("SELECT COUNT(*) FROM visites WHERE domaine = ?", (domaine,)).fetchone()[0]
+
+    def domaine(self, domaine):
+        return VisitesDomaine(self, domaine)
+
+    def fermer(self):
+        with self._verrou:
+            self._db.close()
+
+class VisitesDomaine:
+    """Vue d'un domaine qui s'utilise comme un ensemble (`in`, `add`, `len`)."""
+
+    def __init__(self, registre, domaine):
+        self.registre = registre
+        self.nom = domaine
+
+    def __contains__(self, cle):
+        return self.registre.contient(self.nom, cle)
+
+    def add(self, cle):
+        self.registre.ajouter(self.nom, cle)
+
+    def __len__(self):
+        return self.registre.nombre(self.nom)
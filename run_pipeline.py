@@ -1,15 +1,329 @@
+import argparse
+import asyncio
+import hashlib
+import json
 import os
+import sys
+import time
 
-print("\n🔍 Étape 1 : Scraping des sociétés savantes...")
-# os.system("py 1_scraping_societes/scrapping_societes_savantes.py")
+from outils.flux import preparer_flux
 
-print("\n🔍 Étape 2 : Scraping des congrès...")
-# os.system("py 2_scraping_congres/scrapping_congre_details.py")
+# ===========================
+# 📂 Étapes et contrats de fichiers
+# ===========================
+RACINE = os.path.dirname(os.path.abspath(__file__))
+ETAT_FILE = ".pipeline_etat.json"
 
-print("\n🔍 Étape 3 : Generer les liens...")
-# os.system("py 3_filtrage_congres/generer_liste_liens.py")
+# Chaque étape déclare ses entrées et ses sorties : les dépendances en découlent.
+# Une étape "en_flux" démarre dès que son amont démarre et lit son flux avec --suivre.
+# Une étape "rafraichissable" revalide ses pages auprès des serveurs avec --rafraichir.
+ETAPES = {
+    "1": {
+        "nom": "🔍 Scraping des sociétés savantes",
+        "script": "1_scraping_societes/scrapping_societes_savantes.py",
+        "entrees": ["url.txt"],
+        "sorties": ["1_scraping_societes/societes_savantes.json"],
+    },
+    "2": {
+        "nom": "🔍 Scraping des congrès",
+        "script": "2_scraping_congres/scrapping_congre_details.py",
+        "entrees": ["2_scraping_congres/liste_urls_congres.json"],
+        "sorties": ["2_scraping_congres/congres_bruts.jsonl"],
+        "rafraichissable": True,
+    },
+    "3": {
+        "nom": "🔗 Génération de la liste des liens",
+        "script": "3_filtrage_congres/generer_liste_liens.py",
+        "entrees": ["2_scraping_congres/congres_bruts.jsonl"],
+        "sorties": ["3_filtrage_congres/liste_congrès_reformat.jsonl"],
+        "en_flux": "2",
+    },
+    "4": {
+        "nom": "🤖 Extraction avancée avec GPT",
+        "script": "4_extraction_gpt/gpt-recovery-data-in-website.py",
+        "entrees": ["3_filtrage_congres/liste_congrès_reformat.jsonl"],
+        "sorties": ["4_extraction_gpt/congres_enrichis.jsonl"],
+        "en_flux": "3",
+        "rafraichissable": True,
+    },
+    "5": {
+        "nom": "🌐 Scraping des pages liées",
+        "script": "5_scraping_pages_liees/scraping_pages_liees.py",
+        "entrees": ["4_extraction_gpt/congres_enrichis.jsonl"],
+        "sorties": ["5_scraping_pages_liees/congres_enrichis_avec_pages.jsonl"],
+        "en_flux": "4",
+        "rafraichissable": True,
+    },
+    "6": {
+        "nom": "🤖 Analyse GPT des pages liées",
+        "script": "6_extraction_pages_liees_gpt/extraction_pages_gpt.py",
+        "entrees": ["5_scraping_pages_liees/congres_enrichis_avec_pages.jsonl"],
+        "sorties": ["6_extraction_pages_gpt"],
+        # Lit des dossiers de domaines et non un flux : démarre domaine par domaine
+        "en_flux": "5",
+        "par_domaine": True,
+    },
+}
 
-print("\n🤖 Étape 4 : Extraction avancée avec GPT...")
-os.system("py 4_extraction_gpt/gpt-recovery-data-in-website.py")
+# Marqueur posé par l'étape 5 dans le dossier d'un domaine dont le crawl est fini
+DOSSIER_CRAWL = "5_scraping_pages_liees"
+CRAWL_TERMINE = ".crawl_termine"
+INTERVALLE_SUIVI = 2  # Secondes entre deux recherches de domaines fraîchement crawlés
 
-print("\n✅ Pipeline terminé ! Les résultats sont dans 4_IA_extraction/results_congrès_données_gpt.json.")
+def dependances(id_etape):
+    """Étapes dont les sorties sont des entrées de `id_etape`."""
+    entrees = set(ETAPES[id_etape]["entrees"])
+    return [autre for autre, etape in ETAPES.items() if entrees & set(etape["sorties"])]
+
+# ===========================
+# 🧮 Empreintes de contenu
+# ===========================
+def empreinte_fichier(chemin, memo):
+    """SHA-256 d'un fichier, recalculé seulement si sa taille ou sa date a changé."""
+    stat = os.stat(chemin)
+    connu = memo.get(chemin)
+    if connu and connu[0] == stat.st_size and connu[1] == stat.st_mtime_ns:
+        return connu[2]
+    sha = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for morceau in iter(lambda: f.read(1 << 20), b""):
+            sha.update(morceau)
+    memo[chemin] = [stat.st_size, stat.st_mtime_ns, sha.hexdigest()]
+    return memo[chemin][2]
+
+def empreinte(chemins, memo):
+    """Empreinte combinée de fichiers et de dossiers, ou None si l'un d'eux manque."""
+    sha = hashlib.sha256()
+    for chemin in chemins:
+        if os.path.isdir(chemin):
+            fichiers = sorted(os.path.join(d, f) for d, _, noms in os.walk(chemin) for f in noms)
+        elif os.path.exists(chemin):
+            fichiers = [chemin]
+        else:
+            return None
+        for fichier in fichiers:
+            sha.update(fichier.encode("utf-8"))
+            sha.update(empreinte_fichier(fichier, memo).encode("ascii"))
+    return sha.hexdigest()
+
+def charger_etat():
+    if os.path.exists(ETAT_FILE):
+        with open(ETAT_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {"etapes": {}, "fichiers": {}}
+
+def sauvegarder_etat(etat):
+    with open(f"{ETAT_FILE}.tmp", "w", encoding="utf-8") as f:
+        json.dump(etat, f, indent=2, ensure_ascii=False)
+    os.replace(f"{ETAT_FILE}.tmp", ETAT_FILE)
+
+# ===========================
+# ▶️ Exécution d'une étape
+# ===========================
+async def executer(id_etape, *arguments):
+    """Lance le script d'une étape et préfixe sa sortie par son numéro."""
+    processus = await asyncio.create_subprocess_exec(
+        sys.executable, ETAPES[id_etape]["script"], *arguments,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        env={**os.environ, "PYTHONUNBUFFERED": "1"},
+    )
+    try:
+        async for ligne in processus.stdout:
+            print(f"[{id_etape}] {ligne.decode('utf-8', errors='replace').rstrip()}")
+        return await processus.wait()
+    except asyncio.CancelledError:
+        processus.kill()
+        raise
+
+def domaines_termines(depuis):
+    """Domaines dont un crawl s'est terminé après `depuis` : {domaine: date du marqueur}."""
+    termines = {}
+    if not os.path.isdir(DOSSIER_CRAWL):
+        return termines
+    for domaine in os.listdir(DOSSIER_CRAWL):
+        marqueur = os.path.join(DOSSIER_CRAWL, domaine, CRAWL_TERMINE)
+        if os.path.exists(marqueur) and os.path.getmtime(marqueur) >= depuis:
+            termines[domaine] = os.path.getmtime(marqueur)
+    return termines
+
+# ===========================
+# 🗺️ Orchestration du graphe d'étapes
+# ===========================
+class Orchestrateur:
+    """Exécute les étapes dès que leurs dépendances sont prêtes et saute celles dont rien n'a changé."""
+
+    def __init__(self, selection, forcees, rafraichir=False):
+        self.selection = selection
+        self.forcees = forcees
+        self.rafraichir = rafraichir
+        self.etat = charger_etat()
+        self.memo = self.etat.setdefault("fichiers", {})
+        self.taches = {}
+        self.demarrees = {id_etape: asyncio.Event() for id_etape in ETAPES}
+        self.debuts = {}
+
+    def enregistrer(self, id_etape):
+        etape = ETAPES[id_etape]
+        self.etat["etapes"][id_etape] = {
+            "entrees": empreinte(etape["entrees"] + [etape["script"]], self.memo),
+            "sorties": empreinte(etape["sorties"], self.memo),
+            "termine_le": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        sauvegarder_etat(self.etat)
+
+    def sautable(self, id_etape):
+        """Vrai si l'étape a déjà abouti et n'est ni forcée ni rafraîchie : seules ses empreintes décideront."""
+        return (
+            id_etape in self.etat["etapes"]
+            and id_etape not in self.forcees
+            and not (self.rafraichir and ETAPES[id_etape].get("rafraichissable"))
+        )
+
+    def a_jour(self, id_etape):
+        """Vrai si les entrées et le script sont inchangés et que les sorties sont intactes."""
+        etape = ETAPES[id_etape]
+        precedent = self.etat["etapes"].get(id_etape)
+        return (
+            self.sautable(id_etape)
+            and precedent["entrees"] == empreinte(etape["entrees"] + [etape["script"]], self.memo)
+            and precedent["sorties"] == empreinte(etape["sorties"], self.memo)
+        )
+
+    def options(self, id_etape):
+        """Arguments communs à toutes les exécutions de l'étape."""
+        return ["--rafraichir"] if self.rafraichir and ETAPES[id_etape].get("rafraichissable") else []
+
+    def demarrer(self, id_etape):
+        """Met de côté les flux de sortie de l'étape pour qu'aucune étape aval ne relise l'ancienne version."""
+        for sortie in ETAPES[id_etape]["sorties"]:
+            if sortie.endswith(".jsonl"):
+                preparer_flux(sortie, garder=True)
+        self.debuts[id_etape] = time.time()
+        self.demarrees[id_etape].set()
+
+    async def suivre_domaines(self, id_etape, amont):
+        """Analyse chaque domaine dès que l'étape `amont` a fini de le crawler (ou de le recrawler)."""
+        analyses = {}
+        while True:
+            fini = self.taches[amont].done()
+            prets = {d: date for d, date in domaines_termines(self.debuts[amont]).items() if analyses.get(d) != date}
+            if prets:
+                analyses.update(prets)
+                if await executer(id_etape, "--domaines", *sorted(prets)) != 0:
+                    return set(analyses), False
+            elif fini:
+                return set(analyses), True
+            else:
+                await asyncio.sleep(INTERVALLE_SUIVI)
+
+    async def lancer_en_flux(self, id_etape, amont):
+        """Lance l'étape pendant que `amont` tourne encore : elle lit son flux au fil de l'eau."""
+        etape = ETAPES[id_etape]
+        print(f"\n{etape['nom']} (étape {id_etape}, au fil de l'étape {amont})...")
+        self.demarrer(id_etape)
+        processus = asyncio.ensure_future(executer(id_etape, "--suivre", *self.options(id_etape)))
+        if not await self.taches[amont]:
+            # Le flux amont ne sera jamais marqué terminé : inutile d'attendre la suite
+            processus.cancel()
+            print(f"⏭️ Étape {id_etape} interrompue : l'étape {amont} a échoué.")
+            return False
+        if await processus != 0:
+            print(f"❌ Étape {id_etape} en échec.")
+            return False
+        self.enregistrer(id_etape)
+        print(f"✅ Étape {id_etape} terminée en {time.time() - self.debuts[id_etape]:.0f} s.")
+        return True
+
+    async def lancer(self, id_etape):
+        try:
+            return await self._lancer(id_etape)
+        finally:
+            self.demarrees[id_etape].set()
+
+    async def _lancer(self, id_etape):
+        etape = ETAPES[id_etape]
+        analyses_en_flux = set()
+
+        # Étape en flux : elle démarre dès que son amont tourne, sans attendre sa fin.
+        # Si elle a déjà abouti, on attend au contraire l'amont : une sortie amont identique
+        # la laisse inchangée (a_jour), ce qu'on ne peut savoir qu'une fois l'amont terminé.
+        amont = etape.get("en_flux")
+        if amont and id_etape in self.selection and not self.sautable(id_etape):
+            await self.demarrees[amont].wait()
+            if not self.taches[amont].done():
+                if not etape.get("par_domaine"):
+                    return await self.lancer_en_flux(id_etape, amont)
+                print(f"🔀 Étape {id_etape} lancée au fil de l'étape {amont}, domaine par domaine.")
+                analyses_en_flux, ok = await self.suivre_domaines(id_etape, amont)
+                if not ok:
+                    print(f"❌ Étape {id_etape} en échec.")
+                    return False
+
+        resultats = await asyncio.gather(*(self.taches[d] for d in dependances(id_etape)))
+        if not all(resultats):
+            print(f"⏭️ Étape {id_etape} ignorée : une étape précédente a échoué.")
+            return False
+        if id_etape not in self.selection:
+            return True
+
+        if empreinte(etape["entrees"], self.memo) is None:
+            print(f"❌ Étape {id_etape} : entrée manquante parmi {etape['entrees']}.")
+            return False
+        if not analyses_en_flux and self.a_jour(id_etape):
+            print(f"⏭️ Étape {id_etape} inchangée : {etape['nom']}")
+            return True
+
+        arguments = self.options(id_etape)
+        if self.rafraichir and etape.get("par_domaine") and amont in self.debuts:
+            # Rafraîchissement : seuls les domaines recrawlés parce qu'ils ont changé sont réanalysés
+            restants = sorted(set(domaines_termines(self.debuts[amont])) - analyses_en_flux)
+            if not restants:
+                self.enregistrer(id_etape)
+                return True
+            arguments = ["--domaines", *restants]
+        elif analyses_en_flux:
+            restants = sorted(set(os.listdir(DOSSIER_CRAWL)) - analyses_en_flux)
+            restants = [d for d in restants if os.path.isdir(os.path.join(DOSSIER_CRAWL, d)) and d != "__pycache__"]
+            if not restants:
+                self.enregistrer(id_etape)
+                return True
+            arguments = ["--domaines", *restants]
+
+        print(f"\n{etape['nom']} (étape {id_etape})...")
+        self.demarrer(id_etape)
+        if await executer(id_etape, *arguments) != 0:
+            print(f"❌ Étape {id_etape} en échec.")
+            return False
+        self.enregistrer(id_etape)
+        print(f"✅ Étape {id_etape} terminée en {time.time() - self.debuts[id_etape]:.0f} s.")
+        return True
+
+    async def executer_tout(self):
+        for id_etape in ETAPES:
+            self.taches[id_etape] = asyncio.ensure_future(self.lancer(id_etape))
+        resultats = await asyncio.gather(*self.taches.values())
+        sauvegarder_etat(self.etat)
+        return all(resultats)
+
+# ===========================
+# ▶️ Exécution
+# ===========================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exécute le pipeline en ne relançant que les étapes dont les entrées ont changé.")
+    parser.add_argument("--etapes", nargs="+", choices=list(ETAPES), default=list(ETAPES),
+                        help="Étapes à exécuter (par défaut toutes)")
+    parser.add_argument("--forcer", nargs="+", choices=list(ETAPES), default=[],
+                        help="Étapes à relancer même si rien n'a changé")
+    parser.add_argument("--rafraichir", action="store_true",
+                        help="Revalide les pages des étapes 2, 4 et 5 et ne retraite que celles qui ont changé")
+    args = parser.parse_args()
+
+    os.chdir(RACINE)
+    debut = time.time()
+    succes = asyncio.run(Orchestrateur(set(args.etapes), set(args.forcer), args.rafraichir).executer_tout())
+    if not succes:
+        print(f"\n❌ Pipeline interrompu après {time.time() - debut:.1f} s (voir les étapes en échec ci-dessus).")
+        sys.exit(1)
+    print(f"\n✅ Pipeline terminé en {time.time() - debut:.1f} s ! Résultats dans "
+          f"'4_extraction_gpt/congres_enrichis.jsonl', "
+          f"'5_scraping_pages_liees/congres_enrichis_avec_pages.jsonl' et '6_extraction_pages_gpt/'.")
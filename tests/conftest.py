@@ -0,0 +1,155 @@
+import email.parser
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Les tests importent `outils` comme les scripts des étapes
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ===========================
+# 🤖 Faux serveur compatible OpenAI
+# ===========================
+class FauxServeurOpenAI(ThreadingHTTPServer):
+    """Répond comme l'API OpenAI aux complétions, aux fichiers et aux lots (Batch API).
+
+    `erreurs` : réponses (statut, entêtes) servies avant les complétions suivantes.
+    `statuts_lot` : statuts successifs renvoyés aux sondages d'un lot.
+    Dans un lot, un custom_id contenant "refus" reçoit une réponse 500 et un custom_id
+    contenant "perdu" part dans le fichier d'erreurs.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), GestionnaireOpenAI)
+        self.verrou = threading.Lock()
+        self.erreurs = []
+        self.completions = []
+        self.statuts_lot = ["validating", "in_progress", "completed"]
+        self.fichiers = {}
+        self.lots = {}
+        self.sondages = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def creer_fichier(self, contenu, purpose="batch"):
+        identifiant = f"file-{len(self.fichiers)}"
+        self.fichiers[identifiant] = contenu
+        return {"id": identifiant, "object": "file", "bytes": len(contenu), "created_at": 0,
+                "filename": f"{identifiant}.jsonl", "purpose": purpose, "status": "processed"}
+
+    def etat_lot(self, identifiant):
+        lot = self.lots[identifiant]
+        statut = lot["statuts"].pop(0) if len(lot["statuts"]) > 1 else lot["statuts"][0]
+        demandes = [json.loads(ligne) for ligne in self.fichiers[lot["entree"]].decode("utf-8").splitlines()]
+        if statut in ("completed", "expired") and "sortie" not in lot:
+            lot["sortie"], lot["erreurs"] = self._resultats_lot(demandes)
+        return {
+            "id": identifiant, "object": "batch", "endpoint": "/v1/chat/completions",
+            "input_file_id": lot["entree"], "completion_window": "24h", "status": statut, "created_at": 0,
+            "output_file_id": lot.get("sortie"), "error_file_id": lot.get("erreurs"),
+            "request_counts": {"total": len(demandes), "completed": 0, "failed": 0},
+        }
+
+    def _resultats_lot(self, demandes):
+        sorties, erreurs = [], []
+        for demande in demandes:
+            custom_id = demande["custom_id"]
+            if "perdu" in custom_id:
+                erreurs.append({"custom_id": custom_id, "error": {"code": "batch_expired"}})
+            elif "refus" in custom_id:
+                sorties.append({"custom_id": custom_id,
+                                "response": {"status_code": 500, "body": {"error": "serveur"}}})
+            else:
+                sorties.append({"custom_id": custom_id, "response": {
+                    "status_code": 200, "body": completion(demande["body"])}})
+        identifiants = []
+        for lignes in (sorties, erreurs):
+            contenu = "".join(json.dumps(ligne, ensure_ascii=False) + "\n" for ligne in lignes).encode("utf-8")
+            identifiants.append(self.creer_fichier(contenu, "batch_output")["id"] if lignes else None)
+        return identifiants
+
+def completion(corps):
+    """Complétion qui renvoie « réponse à <prompt> », entourée d'espaces."""
+    prompt = corps["messages"][0]["content"]
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": corps["model"],
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": f" réponse à {prompt} "}}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+class GestionnaireOpenAI(BaseHTTPRequestHandler):
+    def _repondre(self, statut, corps, entetes=None, type_contenu="application/json"):
+        donnees = corps if isinstance(corps, bytes) else json.dumps(corps).encode("utf-8")
+        self.send_response(statut)
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(donnees)))
+        for cle, valeur in (entetes or {}).items():
+            self.send_header(cle, valeur)
+        self.end_headers()
+        self.wfile.write(donnees)
+
+    def _corps(self):
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_POST(self):
+        serveur = self.server
+        corps = self._corps()
+        if self.path == "/v1/chat/completions":
+            with serveur.verrou:
+                serveur.completions.append(time.monotonic())
+                erreur = serveur.erreurs.pop(0) if serveur.erreurs else None
+            if erreur:
+                statut, entetes = erreur
+                return self._repondre(statut, {"error": {"message": f"erreur {statut}", "type": "test"}}, entetes)
+            return self._repondre(200, completion(json.loads(corps)))
+        if self.path == "/v1/files":
+            entete = f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode()
+            message = email.parser.BytesParser().parsebytes(entete + corps)
+            parties = {partie.get_param("name", header="content-disposition"): partie
+                       for partie in message.get_payload()}
+            with serveur.verrou:
+                fichier = serveur.creer_fichier(parties["file"].get_payload(decode=True),
+                                                parties["purpose"].get_payload(decode=True).decode())
+            return self._repondre(200, fichier)
+        if self.path == "/v1/batches":
+            demande = json.loads(corps)
+            with serveur.verrou:
+                identifiant = f"batch-{len(serveur.lots)}"
+                serveur.lots[identifiant] = {"entree": demande["input_file_id"],
+                                             "statuts": list(serveur.statuts_lot)}
+                return self._repondre(200, serveur.etat_lot(identifiant))
+        self._repondre(404, {"error": {"message": self.path}})
+
+    def do_GET(self):
+        serveur = self.server
+        lot = re.fullmatch(r"/v1/batches/([\w-]+)", self.path)
+        contenu = re.fullmatch(r"/v1/files/([\w-]+)/content", self.path)
+        with serveur.verrou:
+            if lot:
+                serveur.sondages += 1
+                return self._repondre(200, serveur.etat_lot(lot.group(1)))
+            if contenu:
+                return self._repondre(200, serveur.fichiers[contenu.group(1)], type_contenu="application/jsonl")
+        self._repondre(404, {"error": {"message": self.path}})
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def serveur_openai():
+    serveur = FauxServeurOpenAI()
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
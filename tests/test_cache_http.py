@@ -0,0 +1,71 @@
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from outils.cache_http import CacheHTTP, directives_cache
+
+# ===========================
+# 🌐 Serveur local : Cache-Control choisi par le chemin
+# ===========================
+class Gestionnaire(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requetes[self.path] += 1
+        corps = f"{self.path} #{self.server.requetes[self.path]}".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(corps)))
+        cache_control = {"/no-store": "no-store", "/no-cache": "no-cache",
+                         "/max-age-0": "max-age=0, must-revalidate", "/prive": "private, max-age=600"}
+        if self.path in cache_control:
+            self.send_header("Cache-Control", cache_control[self.path])
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def serveur():
+    serveur = ThreadingHTTPServer(("127.0.0.1", 0), Gestionnaire)
+    serveur.requetes = Counter()
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
+
+def deux_fois(cache, serveur, chemin):
+    url = f"http://127.0.0.1:{serveur.server_address[1]}{chemin}"
+    with requests.Session() as session:
+        return [cache.get(session, url, 5).text for _ in range(2)]
+
+# ===========================
+# ✅ Tests
+# ===========================
+def test_reponse_ordinaire_servie_depuis_le_cache(serveur, tmp_path):
+    cache = CacheHTTP(str(tmp_path))
+    assert deux_fois(cache, serveur, "/page") == ["/page #1", "/page #1"]
+    assert serveur.requetes["/page"] == 1
+
+@pytest.mark.parametrize("chemin", ["/no-store", "/no-cache", "/max-age-0"])
+def test_cache_control_respecte(serveur, tmp_path, chemin):
+    cache = CacheHTTP(str(tmp_path))
+    assert deux_fois(cache, serveur, chemin) == [f"{chemin} #1", f"{chemin} #2"]
+    assert serveur.requetes[chemin] == 2
+
+def test_no_store_jamais_enregistre(serveur, tmp_path):
+    cache = CacheHTTP(str(tmp_path))
+    deux_fois(cache, serveur, "/no-store")
+    assert cache._db.execute("SELECT COUNT(*) FROM reponses").fetchone()[0] == 0
+
+def test_private_conserve(serveur, tmp_path):
+    # Le cache du crawler n'est partagé avec aucun autre utilisateur
+    cache = CacheHTTP(str(tmp_path))
+    assert deux_fois(cache, serveur, "/prive") == ["/prive #1", "/prive #1"]
+
+def test_directives_cache():
+    assert directives_cache('No-Cache, max-age="60", private') == {"no-cache": None, "max-age": "60", "private": None}
+    assert directives_cache(None) == {}
@@ -0,0 +1,54 @@
+import json
+import os
+
+from openai import OpenAI
+
+from outils.lot_gpt import LotGPT
+
+# Client OpenAI réel, branché sur le faux serveur local (voir conftest.py)
+def nouveau_lot(serveur_openai, fichier_etat):
+    client = OpenAI(api_key="test", base_url=serveur_openai.url, max_retries=0)
+    return LotGPT(client, "modele", str(fichier_etat))
+
+# ===========================
+# ✅ Tests
+# ===========================
+def test_soumission_enregistre_etat_et_demandes(serveur_openai, tmp_path):
+    lot = nouveau_lot(serveur_openai, tmp_path / "lot.json")
+    metadonnees = {"congres": [{"lien": "https://exemple.org", "blocs": ["a", "b"]}]}
+
+    etat = lot.soumettre({"c0-b0": "prompt a", "c0-b1": "prompt b"}, metadonnees)
+
+    assert lot.lot_en_cours() == etat
+    assert etat["metadonnees"] == metadonnees
+    envoye = serveur_openai.fichiers[etat["input_file_id"]].decode("utf-8")
+    demandes = [json.loads(ligne) for ligne in envoye.splitlines()]
+    assert [d["custom_id"] for d in demandes] == ["c0-b0", "c0-b1"]
+    assert demandes[1]["body"] == {"model": "modele", "messages": [{"role": "user", "content": "prompt b"}]}
+
+def test_reprise_puis_fusion(serveur_openai, tmp_path):
+    nouveau_lot(serveur_openai, tmp_path / "lot.json").soumettre({"c0-b0": "a", "c0-b1": "b"}, {"congres": []})
+
+    # Nouveau processus : le lot est retrouvé depuis le fichier d'état, sans nouvelle soumission
+    lot = nouveau_lot(serveur_openai, tmp_path / "lot.json")
+    etat = lot.lot_en_cours()
+    reponses, erreurs = lot.resultats(lot.attendre(etat, intervalle=0))
+
+    assert len(serveur_openai.lots) == 1
+    assert serveur_openai.sondages == 2
+    assert reponses == {"c0-b0": "réponse à a", "c0-b1": "réponse à b"}
+    assert erreurs == {}
+
+    lot.terminer()
+    assert lot.lot_en_cours() is None
+    assert os.listdir(tmp_path) == []
+
+def test_echecs_separes_des_reponses(serveur_openai, tmp_path):
+    serveur_openai.statuts_lot = ["expired"]
+    lot = nouveau_lot(serveur_openai, tmp_path / "lot.json")
+    etat = lot.soumettre({"ok": "a", "refus": "b", "perdu": "c"}, {})
+
+    reponses, erreurs = lot.resultats(lot.attendre(etat, intervalle=0))
+
+    assert reponses == {"ok": "réponse à a"}
+    assert erreurs == {"refus": {"error": "serveur"}, "perdu": {"code": "batch_expired"}}
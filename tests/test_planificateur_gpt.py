@@ -0,0 +1,159 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from openai import AsyncOpenAI, BadRequestError, RateLimitError
+
+from outils import planificateur_gpt
+from outils.planificateur_gpt import PlanificateurGPT, SeauJetons, delai_indique, estimer_jetons
+
+# ===========================
+# 🤖 Faux client OpenAI
+# ===========================
+def erreur_api(classe, statut, entetes=None):
+    response = SimpleNamespace(status_code=statut, headers=entetes or {}, request=None)
+    return classe(f"erreur {statut}", response=response, body=None)
+
+class FauxClient:
+    """Imite `client.chat.completions.create` : renvoie le prompt, ou lève les erreurs prévues."""
+
+    def __init__(self, erreurs=(), jetons_utilises=None):
+        self.erreurs = list(erreurs)
+        self.jetons_utilises = jetons_utilises
+        self.appels = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model, messages):
+        self.appels.append(time.monotonic())
+        if self.erreurs:
+            raise self.erreurs.pop(0)
+        prompt = messages[0]["content"]
+        usage = SimpleNamespace(total_tokens=self.jetons_utilises) if self.jetons_utilises is not None else None
+        message = SimpleNamespace(content=f" {prompt} ")
+        return SimpleNamespace(usage=usage, choices=[SimpleNamespace(message=message)])
+
+async def tout_soumettre(planificateur, prompts):
+    async with planificateur:
+        return await asyncio.gather(*(planificateur.soumettre(prompt) for prompt in prompts))
+
+# ===========================
+# 🪣 Budgets RPM / TPM
+# ===========================
+def test_seau_plafonne_les_remboursements():
+    seau = SeauJetons(100)
+    seau.consommer(-50)
+    assert seau.disponible == 100
+
+def test_budget_requetes_par_minute():
+    # 600 RPM : la rafale initiale passe, les 5 suivantes attendent 0,1 s chacune
+    client = FauxClient()
+    planificateur = PlanificateurGPT(client, "modele", requetes_par_minute=600,
+                                     jetons_par_minute=10 ** 9, concurrence=10)
+    prompts = [f"p{i}" for i in range(605)]
+
+    debut = time.monotonic()
+    reponses = asyncio.run(tout_soumettre(planificateur, prompts))
+
+    assert reponses == prompts
+    assert planificateur.stats["requetes"] == 605
+    assert time.monotonic() - debut >= 0.4
+
+def test_budget_jetons_par_minute(monkeypatch):
+    monkeypatch.setattr(planificateur_gpt, "JETONS_REPONSE", 0)
+    prompt = "mot " * 100
+    jetons = estimer_jetons(prompt)
+    # 6000 TPM = 100 jetons/s : les deux prompts au-delà de la rafale attendent la recharge
+    client = FauxClient(jetons_utilises=jetons)
+    planificateur = PlanificateurGPT(client, "modele", jetons_par_minute=6000, concurrence=4)
+    nombre = 6000 // jetons + 2
+
+    debut = time.monotonic()
+    asyncio.run(tout_soumettre(planificateur, [prompt] * nombre))
+
+    assert len(client.appels) == nombre
+    assert time.monotonic() - debut >= (2 * jetons - 6000 % jetons) / 100 - 0.2
+
+# ===========================
+# ⏳ Limites atteintes (429) et erreurs
+# ===========================
+def test_429_respecte_retry_after():
+    client = FauxClient(erreurs=[erreur_api(RateLimitError, 429, {"retry-after": "0.3"})])
+    planificateur = PlanificateurGPT(client, "modele")
+
+    reponses = asyncio.run(tout_soumettre(planificateur, ["bonjour"]))
+
+    assert reponses == ["bonjour"]
+    assert planificateur.stats["limites_atteintes"] == 1
+    assert client.appels[1] - client.appels[0] >= 0.3
+
+def test_429_met_tout_le_monde_en_pause():
+    # La seconde demande, arrivée pendant la pause due au 429 de la première, attend elle aussi
+    client = FauxClient(erreurs=[erreur_api(RateLimitError, 429, {"retry-after-ms": "300"})])
+    planificateur = PlanificateurGPT(client, "modele", concurrence=2)
+
+    async def scenario():
+        async with planificateur:
+            premiere = asyncio.ensure_future(planificateur.soumettre("a", groupe="x"))
+            await asyncio.sleep(0.05)
+            seconde = asyncio.ensure_future(planificateur.soumettre("b", groupe="y"))
+            return await asyncio.gather(premiere, seconde)
+
+    assert asyncio.run(scenario()) == ["a", "b"]
+    assert len(client.appels) == 3
+    assert min(client.appels[1:]) - client.appels[0] >= 0.3
+
+def test_erreur_non_reessayable_remontee():
+    client = FauxClient(erreurs=[erreur_api(BadRequestError, 400)])
+    planificateur = PlanificateurGPT(client, "modele")
+
+    with pytest.raises(BadRequestError):
+        asyncio.run(tout_soumettre(planificateur, ["bonjour"]))
+    assert len(client.appels) == 1
+    assert planificateur.stats["echecs"] == 1
+
+@pytest.mark.parametrize("entetes, attendu", [
+    ({"retry-after": "2"}, 2.0),
+    ({"retry-after-ms": "250"}, 0.25),
+    ({"x-ratelimit-reset-requests": "1s", "x-ratelimit-reset-tokens": "6m0s"}, 360.0),
+    ({"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0.0),
+    ({"retry-after": "bientôt"}, None),
+    ({}, None),
+])
+def test_delai_indique(entetes, attendu):
+    assert delai_indique(erreur_api(RateLimitError, 429, entetes)) == attendu
+
+# ===========================
+# 🌐 Client OpenAI réel contre un faux serveur local
+# ===========================
+def client_local(serveur_openai):
+    # Sans nouvelles tentatives du client : c'est le planificateur qui gère les 429
+    return AsyncOpenAI(api_key="test", base_url=serveur_openai.url, max_retries=0)
+
+def test_client_reel_reponses(serveur_openai):
+    planificateur = PlanificateurGPT(client_local(serveur_openai), "modele", concurrence=3)
+
+    reponses = asyncio.run(tout_soumettre(planificateur, ["a", "b", "c"]))
+
+    assert reponses == ["réponse à a", "réponse à b", "réponse à c"]
+    assert planificateur.stats["requetes"] == 3
+
+def test_client_reel_429_avec_retry_after(serveur_openai):
+    serveur_openai.erreurs = [(429, {"Retry-After": "0.3"}), (503, {"retry-after-ms": "200"})]
+    planificateur = PlanificateurGPT(client_local(serveur_openai), "modele", concurrence=1)
+
+    reponses = asyncio.run(tout_soumettre(planificateur, ["a"]))
+
+    assert reponses == ["réponse à a"]
+    assert planificateur.stats["limites_atteintes"] == 1
+    premier, second, troisieme = serveur_openai.completions
+    assert second - premier >= 0.3
+    assert troisieme - second >= 0.2
+
+def test_client_reel_erreur_non_reessayable(serveur_openai):
+    serveur_openai.erreurs = [(400, {})]
+    planificateur = PlanificateurGPT(client_local(serveur_openai), "modele")
+
+    with pytest.raises(BadRequestError):
+        asyncio.run(tout_soumettre(planificateur, ["a"]))
+    assert len(serveur_openai.completions) == 1
@@ -0,0 +1,31 @@
+import email.utils
+import time
+
+import pytest
+
+from outils.politesse import PolitesseAdaptative, delai_retry_after
+
+@pytest.mark.parametrize("valeur, attendu", [
+    ("3", 3.0),
+    ("-1", 0.0),
+    ("Wed, 21 Oct 2015 07:28:00 GMT", 0.0),
+    ("bientôt", None),
+    (None, None),
+])
+def test_delai_retry_after(valeur, attendu):
+    assert delai_retry_after(valeur) == attendu
+
+def test_retry_after_en_date_http():
+    valeur = email.utils.formatdate(time.time() + 30, usegmt=True)
+    assert 28 <= delai_retry_after(valeur) <= 30
+
+def test_429_date_repousse_la_requete_suivante():
+    politesse = PolitesseAdaptative(0)
+    url = "https://exemple.org/page"
+    politesse.attendre(url)
+    retry_after = delai_retry_after(email.utils.formatdate(time.time() + 2, usegmt=True))
+    politesse.signaler(url, 0.1, statut=429, retry_after=retry_after)
+
+    debut = time.monotonic()
+    politesse.attendre(url)
+    assert time.monotonic() - debut >= retry_after - 0.05
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from outils import recuperation
+from outils.recuperation import RecuperateurAsync
+
+DUREE_REPONSE = 0.1
+TOUS = "*"  # Compteur tous hôtes confondus
+
+# ===========================
+# 🌐 Serveur local qui mesure la concurrence par hôte
+# ===========================
+class Serveur(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), Gestionnaire)
+        self.verrou = threading.Lock()
+        self.en_cours = Counter()
+        self.maximum = Counter()
+
+class Gestionnaire(BaseHTTPRequestHandler):
+    def do_GET(self):
+        hote = self.headers["Host"].split(":")[0]
+        serveur = self.server
+        with serveur.verrou:
+            for cle in (hote, TOUS):
+                serveur.en_cours[cle] += 1
+                serveur.maximum[cle] = max(serveur.maximum[cle], serveur.en_cours[cle])
+        time.sleep(DUREE_REPONSE)
+        with serveur.verrou:
+            for cle in (hote, TOUS):
+                serveur.en_cours[cle] -= 1
+        corps = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def serveur(monkeypatch):
+    # Sans cache HTTP : chaque requête doit atteindre le serveur
+    monkeypatch.setattr(recuperation, "obtenir_cache", lambda: None)
+    serveur = Serveur()
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
+
+async def tout_recuperer(urls, concurrence, concurrence_par_hote):
+    async with RecuperateurAsync(concurrence, concurrence_par_hote) as recuperateur:
+        return await asyncio.gather(*(recuperateur.recuperer(url) for url in urls))
+
+# ===========================
+# ✅ Tests
+# ===========================
+def test_limite_par_hote_respectee(serveur):
+    port = serveur.server_address[1]
+    urls = [f"http://127.0.0.1:{port}/p{i}" for i in range(10)]
+
+    reponses = asyncio.run(tout_recuperer(urls, concurrence=10, concurrence_par_hote=2))
+
+    assert [r.text for r in reponses] == [f"/p{i}" for i in range(10)]
+    assert serveur.maximum["127.0.0.1"] == 2
+
+def test_hotes_servis_en_parallele(serveur):
+    # 127.0.0.1 et localhost désignent le même serveur mais comptent comme deux hôtes
+    port = serveur.server_address[1]
+    urls = [f"http://{hote}:{port}/p{i}" for i in range(6) for hote in ("127.0.0.1", "localhost")]
+
+    debut = time.monotonic()
+    asyncio.run(tout_recuperer(urls, concurrence=10, concurrence_par_hote=3))
+    duree = time.monotonic() - debut
+
+    assert serveur.maximum["127.0.0.1"] == 3
+    assert serveur.maximum["localhost"] == 3
+    # 12 requêtes, 6 à la fois : deux vagues et non quatre
+    assert duree < 4 * DUREE_REPONSE
+
+def test_limite_globale_respectee(serveur):
+    port = serveur.server_address[1]
+    urls = [f"http://{hote}:{port}/p{i}" for i in range(4) for hote in ("127.0.0.1", "localhost")]
+
+    asyncio.run(tout_recuperer(urls, concurrence=2, concurrence_par_hote=4))
+
+    assert serveur.maximum[TOUS] == 2